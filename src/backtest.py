@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+backtest.py
+-----------
+Simulate every historical start (data/historical_ks) in one batched pass
+and write data/historical_ks_sim.parquet for calibrate.py / scoring.py.
+
+k_rates are attached in bulk (one kpred_sim.load_k_rates per season and
+role), so each start becomes a row of an (n_starts × 10) rate matrix:
+pitcher, then the nine batters, unknown players at DEFAULT. Each trial's
+outs target is drawn from the starter's leash distribution (leash.py, the
+same season's table, so in-sample), or fixed with --innings; PAs follow
+the batting order (log5 matchups, see matchup.py) unless --sequence
+uniform. The matrix is
+cut into --chunk starts, and each chunk is simulated with
+k_pred_core.sim_batch in a worker process, seeded by (--seed, chunk
+number). Every finished chunk is written to
+data/backtest/<run>/chunk_NNNNN.parquet, so an interrupted run resumes
+where it stopped; manifest.json records the run parameters and the
+modification times of the rate and leash sources, and a rerun with
+different ones (e.g. after a new harvest or `leash.py build`) is refused
+unless --fresh.
+
+Output columns, besides those of historical_ks:
+  exp_ks, p_over (P(K ≥ --line)), p_over_<line> for each --lines,
+  p10, p90, k_hist (counts of 0, 1, 2, ... Ks over the trials)
+
+Usage (from src/):
+  python backtest.py [--sims 10000] [--lines 4.5 5.5 7.5] [--jobs 8] [--innings 6]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from data_io import DATA_DIR, read_table, resolve, source_sql, write_query, write_table
+from k_pred_core import SEQUENCES, engine_tag, hist_quantiles, k_histogram, pa_table, sample_outs, sim_batch
+from kpred_sim import load_k_rates
+from leash import LEASH_NAME, MAX_OUTS, Leash
+from matchup import MATCHUPS, slot_rates
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT = 0.252
+BACKTEST_DIR = DATA_DIR / "backtest"
+
+
+def line_tag(line: float) -> str:
+    return f"{line:g}".replace(".", "_")
+
+
+def rate_matrix(starts: pd.DataFrame) -> np.ndarray:
+    """(n_starts × 10) k_rates: pitcher, then batters in lineup order."""
+    P = np.full((len(starts), 10), DEFAULT)
+    seasons = starts["season"].astype(str).to_numpy()
+    lineups = starts["lineup_ids"].str.split(",")
+    for season in np.unique(seasons):
+        rows = np.flatnonzero(seasons == season)
+        pitchers, batters = load_k_rates(season, "pitcher"), load_k_rates(season, "batter")
+        P[rows, 0] = [pitchers.get(int(pid), DEFAULT) for pid in starts["pitcher_id"].to_numpy()[rows]]
+        for r in rows:
+            ids = [int(b) for b in lineups.iat[r] if b][:9]
+            P[r, 1:1 + len(ids)] = [batters.get(b, DEFAULT) for b in ids]
+    return P
+
+
+def run_chunk(chunk_id: int, rows: np.ndarray, P: np.ndarray, outs: int | np.ndarray, n_sims: int,
+              main_line: float, lines: list[float], seed: int, run_dir: Path, sequence: str = "order",
+              matchup: str = "log5") -> int:
+    """
+    Simulate one chunk of starts and write it as chunk_<id>.parquet.
+    outs: a fixed target, or (starts × outs) leash distributions to sample.
+    """
+    import pandas as pd
+    rng = np.random.default_rng([seed, chunk_id])
+    if np.ndim(outs) == 2:
+        outs = sample_outs(outs, n_sims, rng)
+    slots = slot_rates(P, matchup) if sequence == "order" else None
+    ks = sim_batch(pa_table(P, sequence, slots), outs, n_sims, rng, ordered=sequence == "order")
+    hist = k_histogram(ks)
+    q = hist_quantiles(hist, [0.1, 0.9])
+    df = pd.DataFrame({"start_row": rows})
+    df["exp_ks"] = ks.mean(axis=1)
+    df["p_over"] = (ks >= main_line).mean(axis=1)
+    for line in lines:
+        df[f"p_over_{line_tag(line)}"] = (ks >= line).mean(axis=1)
+    df["p10"], df["p90"] = q[:, 0].astype(float), q[:, 1].astype(float)
+    df["k_hist"] = [row[: np.flatnonzero(row)[-1] + 1].tolist() for row in hist]
+    tmp = write_table(df, f"partial_{chunk_id:05d}", data_dir=run_dir)
+    tmp.replace(run_dir / f"chunk_{chunk_id:05d}.parquet")  # only whole chunks count as done
+    return chunk_id
+
+
+def source_stamps(seasons, leash: bool) -> dict[str, int | None]:
+    """mtime_ns of every file the k_rates (kpred_sim.load_k_rates) and the leash are read from."""
+    paths = [DATA_DIR / f"player_stats_{s}.duckdb" for s in sorted(set(map(str, seasons)))]
+    paths.append(DATA_DIR / "player_stats.duckdb")
+    paths += sorted((DATA_DIR / "player_stats_parquet").glob("*/*/*.parquet"))
+    if leash:
+        try:
+            paths.append(resolve(LEASH_NAME))
+        except FileNotFoundError:
+            pass
+    return {p.relative_to(DATA_DIR).as_posix(): p.stat().st_mtime_ns for p in paths if p.exists()}
+
+
+def check_manifest(run_dir: Path, params: dict, fresh: bool) -> None:
+    manifest = run_dir / "manifest.json"
+    if fresh and run_dir.exists():
+        shutil.rmtree(run_dir)
+    if manifest.exists():
+        old = json.loads(manifest.read_text())
+        if old != params:
+            changed = sorted(k for k in params.keys() | old.keys() if old.get(k) != params.get(k))
+            raise SystemExit(f"❌ {run_dir} was started with different {', '.join(changed)}; "
+                             f"rerun with --fresh or pick another --run")
+        return
+    run_dir.mkdir(parents=True, exist_ok=True)
+    manifest.write_text(json.dumps(params, indent=2))
+
+
+def main():
+    p = argparse.ArgumentParser(description="Backtest the K simulator over every historical start ⏪")
+    p.add_argument("--input", default="historical_ks", help="Starts artifact (name or path)")
+    p.add_argument("--output", default="historical_ks_sim", help="Artifact name written to data/")
+    p.add_argument("--run", default="default", help="Run name under data/backtest/ (chunks live there)")
+    p.add_argument("--sims", type=int, default=10000, help="Simulation trials per start 🎲")
+    p.add_argument("--innings", type=float, help="Fixed innings per start instead of the leash (outs = 3×)")
+    p.add_argument("--sequence", choices=SEQUENCES, default="order", help="PA order in the simulator")
+    p.add_argument("--matchup", choices=MATCHUPS, default="log5", help="Pitcher × batter rule in batting order")
+    p.add_argument("--line", type=float, default=6.5, help="Main K line → p_over")
+    p.add_argument("--lines", type=float, nargs="*", default=[4.5, 5.5, 7.5], help="Extra lines → p_over_<line>")
+    p.add_argument("--chunk", type=int, default=256, help="Starts per chunk")
+    p.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--fresh", action="store_true", help="Discard chunks from an earlier run")
+    p.add_argument("--csv", action="store_true", help="Also export a CSV copy")
+    args = p.parse_args()
+    import duckdb
+    from tqdm import tqdm
+
+    # row order fixes chunk membership; (game_pk, side) is not unique in the history
+    starts = read_table(args.input).sort_values(["date", "game_pk", "side"], kind="stable").reset_index(drop=True)
+    lines = sorted(set(args.lines) - {args.line})
+    outs = "leash" if args.innings is None else int(round(args.innings * 3))
+    run_dir = BACKTEST_DIR / args.run
+    check_manifest(run_dir, {
+        "input": str(args.input), "n_starts": len(starts), "sims": args.sims, "outs": outs,
+        "line": args.line, "lines": lines, "chunk": args.chunk, "seed": args.seed,
+        "engine": engine_tag(args.sequence, args.matchup),
+        "sources": source_stamps(starts["season"].unique(), outs == "leash"),
+    }, args.fresh)
+
+    P = rate_matrix(starts)
+    print(f"📊 {len(starts)} starts, {(P == DEFAULT).mean():.1%} of rates defaulted")
+    if outs == "leash":
+        leash = Leash()
+        if not leash.available:
+            raise SystemExit("❌ No leash table: run 'python leash.py build' or pass --innings")
+        seasons, pids = starts["season"].astype(str).to_numpy(), starts["pitcher_id"].to_numpy()
+        outs = np.zeros((len(starts), MAX_OUTS + 1))
+        for season in np.unique(seasons):
+            outs[seasons == season] = leash.pmf(pids[seasons == season], season)
+
+    bounds = range(0, len(starts), args.chunk)
+    todo = [i for i, _ in enumerate(bounds) if not (run_dir / f"chunk_{i:05d}.parquet").exists()]
+    if len(todo) < len(bounds):
+        print(f"⏩ Resuming: {len(bounds) - len(todo)}/{len(bounds)} chunks already done")
+    if todo:
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(todo))) as pool:
+            futures = []
+            for i in todo:
+                rows = np.arange(bounds[i], min(bounds[i] + args.chunk, len(starts)))
+                chunk_outs = outs[rows] if np.ndim(outs) else outs
+                futures.append(pool.submit(run_chunk, i, rows, P[rows], chunk_outs, args.sims,
+                                           args.line, lines, args.seed, run_dir, args.sequence,
+                                           args.matchup))
+            for f in tqdm(as_completed(futures), total=len(futures), desc="Chunks"):
+                f.result()
+
+    con = duckdb.connect()
+    con.register("starts", starts.rename_axis("start_row").reset_index())
+    chunks = source_sql(run_dir / "chunk_*.parquet")
+    out = write_query(con, f"SELECT s.* EXCLUDE (start_row), c.* EXCLUDE (start_row) FROM starts s "
+                           f"JOIN {chunks} c USING (start_row) ORDER BY start_row",
+                      args.output, args.csv)
+    con.close()
+    print(f"✅ Backtest of {len(starts)} starts saved to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+box_parse.py
+------------
+Boxscore parsing shared by every harvester, so player_stats and
+historical_ks are derived from the same starter and lineup rules.
+
+boxscore_sql.py mirrors these rules in SQL; keep the two in step.
+"""
+
+
+def outs_from_ip(ip_str: str) -> int:
+    if not ip_str:
+        return 0
+    if "." in ip_str:
+        w, f = ip_str.split(".")
+        return int(w) * 3 + int(f)
+    return int(ip_str) * 3
+
+
+def starting_pitcher(players: dict) -> int | None:
+    """
+    Given the boxscore 'players' dict, returns the player ID of the starting pitcher.
+    Tries in order:
+      1) stats.pitching.gamesStarted >= 1
+      2) gameStatus.isStarter == True, among players who pitched
+      3) pitcher with most outs recorded (IP * 3).
+    """
+    # 1) Look for any pitcher marked as having started
+    for pid, pdata in players.items():
+        pitch = pdata.get("stats", {}).get("pitching") or {}
+        if pitch.get("gamesStarted", 0) >= 1:
+            return int(pid.replace("ID", ""))
+
+    # 2) Fallback: gameStatus flag (position players carry it too)
+    for pid, pdata in players.items():
+        pitch = pdata.get("stats", {}).get("pitching") or {}
+        if pitch and pdata.get("gameStatus", {}).get("isStarter"):
+            return int(pid.replace("ID", ""))
+
+    # 3) Last resort: highest IP
+    best_pid, best_outs = None, -1
+    for pid, pdata in players.items():
+        pitch = pdata.get("stats", {}).get("pitching") or {}
+        outs = outs_from_ip(pitch.get("inningsPitched", "0.0"))
+        if outs > best_outs:
+            best_outs, best_pid = outs, pid
+    return int(best_pid.replace("ID", "")) if best_pid else None
+
+
+def extract_lineup(box_side: dict) -> list[int]:
+    """
+    Given a box['teams'][side] dict, returns the nine-man batting order as ints.
+    Handles both:
+      - A list of strings like ['ID660271', 'ID518692', …]
+      - A list of ints like [660271, 518692, …]
+    Falls back to reading each player's battingOrder field if needed.
+    """
+    # Primary: MLB sometimes provides a battingOrder list
+    order = box_side.get("battingOrder") or box_side.get("batters") or []
+    if isinstance(order, list) and len(order) >= 9:
+        lineup = []
+        for pid in order[:9]:
+            if isinstance(pid, int):
+                lineup.append(pid)
+            else:
+                # strip 'ID' if present, then convert
+                s = pid.replace("ID", "")
+                try:
+                    lineup.append(int(s))
+                except ValueError:
+                    continue
+        return lineup
+
+    # Fallback: inspect players for battingOrder metadata
+    tmp = []
+    for pid, pdata in box_side.get("players", {}).items():
+        bo = pdata.get("battingOrder")
+        if bo:
+            try:
+                spot = int(bo.split("-")[0])
+                pid_int = int(pid.replace("ID", ""))
+                tmp.append((spot, pid_int))
+            except ValueError:
+                continue
+    tmp.sort()
+    return [pid for _, pid in tmp[:9]] if len(tmp) >= 9 else []
+
+
+def new_skips() -> dict:
+    return dict(not_final=0, box_err=0, no_sp=0, k_missing=0, bad_lineup=0)
+
+
+def parse_game(box: dict, game_pk: int, date: str, season: str,
+               skips: dict) -> tuple[list[dict], list[dict]]:
+    """
+    Single pass over one boxscore.
+
+    Returns (stat_rows, hist_rows):
+      • stat_rows – per-game K / opportunity rows for each starter and the
+                    batters in each lineup (summed into player_stats)
+      • hist_rows – one historical_ks row per side with a usable starter,
+                    recorded K total and nine-man lineup
+    Reasons for dropping a historical side are tallied in `skips`.
+    """
+    stat_rows, hist_rows = [], []
+    teams = box["teams"]
+    starters = {side: starting_pitcher(teams[side]["players"]) for side in ("away", "home")}
+    both_sp = all(starters.values())
+    if not both_sp:
+        skips["no_sp"] += 1
+
+    for side in ("away", "home"):
+        t = teams[side]
+        sp = starters[side]
+        if not sp:
+            continue
+
+        pitching = t["players"].get(f"ID{sp}", {}).get("stats", {}).get("pitching") or {}
+        k_act = pitching.get("strikeOuts")
+        opps = pitching.get("battersFaced") or outs_from_ip(pitching.get("inningsPitched", "0.0"))
+        stat_rows.append({
+            "season":        season,
+            "game_pk":       game_pk,
+            "player_id":     sp,
+            "player_role":   "pitcher",
+            "k_total":       k_act or 0,
+            "opportunities": opps,
+        })
+
+        lineup = extract_lineup(t)
+        for pid in lineup:
+            bat = t["players"].get(f"ID{pid}", {}).get("stats", {}).get("batting") or {}
+            stat_rows.append({
+                "season":        season,
+                "game_pk":       game_pk,
+                "player_id":     pid,
+                "player_role":   "batter",
+                "k_total":       bat.get("strikeOuts", 0) or 0,
+                "opportunities": bat.get("plateAppearances", bat.get("atBats", 0)) or 0,
+            })
+
+        if not both_sp:
+            continue
+        if k_act is None:
+            skips["k_missing"] += 1
+            continue
+        if len(lineup) != 9:
+            skips["bad_lineup"] += 1
+            continue
+        hist_rows.append({
+            "game_pk":    game_pk,
+            "date":       date,
+            "season":     season,
+            "side":       side,
+            "pitcher_id": sp,
+            "k_actual":   k_act,
+            "lineup_ids": ",".join(map(str, lineup)),
+        })
+    return stat_rows, hist_rows
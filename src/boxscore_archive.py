@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+boxscore_archive.py
+-------------------
+Keep a raw copy of every boxscore the harvesters download so the
+extraction logic can be re-run (or replaced by SQL) without hitting
+the MLB API again.
+
+Layout:
+  • data/boxscores/<season>/<game_pk>.json
+    {"game_pk": ..., "date": "YYYY-MM-DD", "season": "YYYY", "boxscore": {...}}
+"""
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+
+import statsapi
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = BASE_DIR / "data"
+ARCHIVE_DIR = DATA_DIR / "boxscores"
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by every fetch worker: `rate` requests
+    per second on average, with bursts of up to `burst` requests.
+    """
+
+    def __init__(self, rate: float, burst: int | None = None):
+        if rate <= 0:
+            raise ValueError(f"rate must be > 0 requests per second, got {rate}")
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, int(rate)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def api_get(endpoint: str, params: dict, limiter: TokenBucket | None = None,
+            retries: int = 4, backoff: float = 0.5):
+    """
+    statsapi.get behind the shared rate limiter, retrying failures with
+    jittered exponential backoff before re-raising the last error.
+    """
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return statsapi.get(endpoint, params)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
+def archive_path(season: str, game_pk: int) -> Path:
+    return ARCHIVE_DIR / str(season) / f"{int(game_pk)}.json"
+
+
+def fetch_boxscore(game_pk: int, date: str, season: str, refresh: bool = False,
+                   limiter: TokenBucket | None = None) -> dict:
+    """
+    Return the boxscore for `game_pk`, reading the archived copy when present.
+    Freshly fetched boxscores are written to the archive before returning;
+    only those count against `limiter`.
+    """
+    path = archive_path(season, game_pk)
+    if path.exists() and not refresh:
+        with path.open() as f:
+            return json.load(f)["boxscore"]
+
+    box = api_get("game_boxscore", {"gamePk": game_pk}, limiter)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    with tmp.open("w") as f:
+        json.dump({"game_pk": int(game_pk), "date": date, "season": str(season), "boxscore": box}, f)
+    os.replace(tmp, path)
+    return box
+
+
+def iter_archived(seasons: list[str] | None = None):
+    """
+    Yield (game_pk, date, season, boxscore) for every archived game,
+    optionally restricted to `seasons`.
+    """
+    dirs = [ARCHIVE_DIR / s for s in seasons] if seasons else sorted(ARCHIVE_DIR.glob("*"))
+    for d in dirs:
+        for path in sorted(d.glob("*.json")):
+            with path.open() as f:
+                rec = json.load(f)
+            yield rec["game_pk"], rec["date"], rec["season"], rec["boxscore"]
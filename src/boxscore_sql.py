@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+boxscore_sql.py
+---------------
+Set-based extraction of the harvest tables straight from the archived
+boxscore JSON (see boxscore_archive.py), using DuckDB's read_json/unnest
+instead of walking every boxscore dict in Python.
+
+Derives, for every archived game at once:
+  • starters        (same rules as box_parse.starting_pitcher)
+  • batting orders  (same rules as box_parse.extract_lineup)
+  • strikeouts, batters faced, plate appearances
+
+Outputs:
+  • data/player_stats.duckdb  (stats.pitcher_stats, stats.batter_stats)
+  • data/historical_ks.parquet (+ .csv)
+  • data/historical_ks.duckdb (table: historical_ks)
+
+Usage (from src/):
+  python boxscore_sql.py [2024 2025] [--validate]
+"""
+import argparse
+import time
+from pathlib import Path
+
+import duckdb
+
+from boxscore_archive import ARCHIVE_DIR
+from data_io import write_query
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = BASE_DIR / "data"
+STATS_DB = DATA_DIR / "player_stats.duckdb"
+HIST_DB = DATA_DIR / "historical_ks.duckdb"
+
+# ── SQL ──────────────────────────────────────────────────────────────────────
+# One row per (game, side): the team JSON blob.
+TEAMS_SQL = """
+CREATE OR REPLACE TEMP TABLE box_team AS
+SELECT b.game_pk, b.date, b.season, s.side,
+       json_extract(b.boxscore, '$.teams.' || s.side) AS team
+  FROM read_json(?, columns = {game_pk: 'BIGINT', date: 'VARCHAR',
+                               season: 'VARCHAR', boxscore: 'JSON'}) b
+ CROSS JOIN (VALUES ('away'), ('home')) s(side)
+"""
+
+# One row per (game, side, player), keeping the boxscore key order as `ord`
+# because the Python rules pick the *first* qualifying player.
+PLAYERS_SQL = """
+CREATE OR REPLACE TEMP TABLE box_player AS
+WITH keyed AS (
+    SELECT game_pk, date, season, side, team,
+           json_keys(team -> 'players') AS keys
+      FROM box_team
+), flat AS (
+    SELECT game_pk, date, season, side,
+           unnest(keys) AS pkey,
+           generate_subscripts(keys, 1) AS ord,
+           team
+      FROM keyed
+), parsed AS (
+    SELECT game_pk, date, season, side, pkey, ord,
+           CAST(replace(pkey, 'ID', '') AS BIGINT)              AS player_id,
+           team -> 'players' -> pkey                             AS p
+      FROM flat
+)
+SELECT game_pk, date, season, side, pkey, ord, player_id,
+       COALESCE(TRY_CAST(p ->> '$.stats.pitching.gamesStarted' AS INTEGER), 0) AS games_started,
+       COALESCE(TRY_CAST(p ->> '$.gameStatus.isStarter' AS BOOLEAN), false)  AS is_starter,
+       COALESCE(len(json_keys(p, '$.stats.pitching')), 0) > 0                AS pitched,
+       TRY_CAST(p ->> '$.stats.pitching.strikeOuts' AS INTEGER)              AS p_k,
+       TRY_CAST(p ->> '$.stats.pitching.battersFaced' AS INTEGER)            AS p_bf,
+       COALESCE(
+           TRY_CAST(split_part(p ->> '$.stats.pitching.inningsPitched', '.', 1) AS INTEGER) * 3
+         + COALESCE(TRY_CAST(NULLIF(split_part(p ->> '$.stats.pitching.inningsPitched', '.', 2), '') AS INTEGER), 0),
+           0)                                                                AS outs,
+       TRY_CAST(p ->> '$.stats.batting.strikeOuts' AS INTEGER)               AS b_k,
+       TRY_CAST(p ->> '$.stats.batting.plateAppearances' AS INTEGER)         AS b_pa,
+       TRY_CAST(p ->> '$.stats.batting.atBats' AS INTEGER)                   AS b_ab,
+       TRY_CAST(split_part(p ->> '$.battingOrder', '-', 1) AS INTEGER)       AS bo_spot
+  FROM parsed
+"""
+
+# box_parse.starting_pitcher: gamesStarted ≥ 1, else gameStatus.isStarter
+# among players who pitched, else most outs (first in key order wins ties).
+STARTER_SQL = """
+CREATE OR REPLACE TEMP TABLE starter AS
+SELECT game_pk, season, side, player_id, p_k, outs,
+       COALESCE(NULLIF(p_bf, 0), outs) AS opportunities
+  FROM (
+    SELECT *, row_number() OVER (
+               PARTITION BY game_pk, side
+               ORDER BY CASE WHEN games_started >= 1 THEN 0
+                             WHEN is_starter AND pitched THEN 1 ELSE 2 END,
+                        CASE WHEN games_started >= 1 OR (is_starter AND pitched)
+                             THEN 0 ELSE -outs END,
+                        ord) AS rk
+      FROM box_player)
+ WHERE rk = 1
+"""
+
+# box_parse.extract_lineup: battingOrder (or batters) when it
+# has ≥ 9 entries, otherwise the players' own battingOrder spots.
+LINEUP_SQL = """
+CREATE OR REPLACE TEMP TABLE lineup AS
+WITH listed AS (
+    SELECT game_pk, side,
+           COALESCE(
+               CASE WHEN json_array_length(team -> 'battingOrder') > 0
+                    THEN team -> 'battingOrder' END,
+               team -> 'batters') AS order_json
+      FROM box_team
+), primary_order AS (
+    SELECT game_pk, side,
+           list_filter(
+               list_transform(
+                   json_extract_string(order_json, '$[*]')[1:9],
+                   x -> TRY_CAST(replace(x, 'ID', '') AS BIGINT)),
+               x -> x IS NOT NULL) AS lineup
+      FROM listed
+     WHERE COALESCE(json_array_length(order_json), 0) >= 9
+), spots AS (
+    SELECT game_pk, side,
+           list(player_id ORDER BY bo_spot, player_id) AS spotted
+      FROM box_player
+     WHERE bo_spot IS NOT NULL
+     GROUP BY game_pk, side
+)
+SELECT t.game_pk, t.side,
+       COALESCE(po.lineup,
+                CASE WHEN len(s.spotted) >= 9 THEN s.spotted[1:9] END,
+                []::BIGINT[]) AS lineup
+  FROM box_team t
+  LEFT JOIN primary_order po USING (game_pk, side)
+  LEFT JOIN spots s USING (game_pk, side)
+"""
+
+HIST_SQL = """
+CREATE OR REPLACE TEMP TABLE hist AS
+WITH both_sides AS (
+    SELECT game_pk
+      FROM starter
+     GROUP BY game_pk
+    HAVING count(*) = 2
+)
+SELECT t.game_pk, t.date, t.season, t.side,
+       s.player_id                      AS pitcher_id,
+       s.p_k                            AS k_actual,
+       array_to_string(l.lineup, ',')   AS lineup_ids
+  FROM box_team t
+  JOIN both_sides USING (game_pk)
+  JOIN starter s USING (game_pk, side)
+  JOIN lineup l USING (game_pk, side)
+ WHERE s.p_k IS NOT NULL
+   AND len(l.lineup) = 9
+ ORDER BY t.date, t.game_pk, t.side
+"""
+
+# box_parse.parse_game: a row per starter plus one per batter in that
+# side's lineup (batters missing from the players dict count as 0 / 0).
+STAT_ROWS_SQL = """
+CREATE OR REPLACE TEMP TABLE stat_rows AS
+WITH batter AS (
+    SELECT s.game_pk, s.season, s.side, unnest(l.lineup) AS player_id
+      FROM starter s
+      JOIN lineup l USING (game_pk, side)
+)
+SELECT season, game_pk, player_id, 'pitcher' AS player_role,
+       COALESCE(p_k, 0) AS k_total, opportunities
+  FROM starter
+UNION ALL
+SELECT b.season, b.game_pk, b.player_id, 'batter',
+       COALESCE(p.b_k, 0),
+       COALESCE(p.b_pa, p.b_ab, 0)
+  FROM batter b
+  LEFT JOIN box_player p USING (game_pk, side, player_id)
+"""
+
+AGG_SQL = """
+CREATE OR REPLACE TABLE {db}.stats.{role}_stats AS
+SELECT season, player_id,
+       SUM(k_total)        AS k_total,
+       SUM(opportunities)  AS opportunities,
+       SUM(k_total) / NULLIF(SUM(opportunities),0) AS k_rate
+  FROM stat_rows
+ WHERE player_role = '{role}'
+ GROUP BY season, player_id
+"""
+
+# ── HELPERS ──────────────────────────────────────────────────────────────────
+def archive_globs(seasons: list[str]) -> list[str]:
+    if seasons:
+        return [(ARCHIVE_DIR / s / "*.json").as_posix() for s in seasons]
+    return [(ARCHIVE_DIR / "*" / "*.json").as_posix()]
+
+
+def extract(con: duckdb.DuckDBPyConnection, seasons: list[str]) -> None:
+    """Populate the temp tables hist and stat_rows from the archive."""
+    con.execute(TEAMS_SQL, [archive_globs(seasons)])
+    con.execute(PLAYERS_SQL)
+    con.execute(STARTER_SQL)
+    con.execute(LINEUP_SQL)
+    con.execute(HIST_SQL)
+    con.execute(STAT_ROWS_SQL)
+
+
+def validate(con: duckdb.DuckDBPyConnection, seasons: list[str]) -> bool:
+    """
+    Re-run box_parse.parse_game over the same archive and compare
+    row-for-row with the SQL tables.
+    """
+    import pandas as pd
+
+    from box_parse import new_skips, parse_game
+    from boxscore_archive import iter_archived
+
+    hist_rows, stat_rows = [], []
+    skips = new_skips()
+    for gid, date, season, box in iter_archived(seasons or None):
+        s_rows, h_rows = parse_game(box, gid, date, season, skips)
+        stat_rows.extend(s_rows)
+        hist_rows.extend(h_rows)
+
+    hist_cols = ["game_pk", "date", "season", "side", "pitcher_id", "k_actual", "lineup_ids"]
+    stat_cols = ["season", "game_pk", "player_id", "player_role", "k_total", "opportunities"]
+    checks = [
+        ("historical_ks", pd.DataFrame(hist_rows, columns=hist_cols),
+         con.execute("SELECT * FROM hist").fetchdf(), hist_cols),
+        ("player_stats", pd.DataFrame(stat_rows, columns=stat_cols),
+         con.execute("SELECT * FROM stat_rows").fetchdf(), stat_cols),
+    ]
+    ok = True
+    for name, py_df, sql_df, cols in checks:
+        py_df = py_df.astype(str).sort_values(cols).reset_index(drop=True)
+        sql_df = sql_df[cols].astype(str).sort_values(cols).reset_index(drop=True)
+        if py_df.equals(sql_df):
+            print(f"✔️  {name}: {len(sql_df):,} rows match the Python extraction")
+        else:
+            ok = False
+            diff = py_df.merge(sql_df, how="outer", indicator=True).query("_merge != 'both'")
+            print(f"❌ {name}: {len(diff):,} rows differ (python={len(py_df):,}, sql={len(sql_df):,})")
+            print(diff.head(10).to_string(index=False))
+    return ok
+
+# ── MAIN ─────────────────────────────────────────────────────────────────────
+def main():
+    p = argparse.ArgumentParser(
+        description="Extract player_stats and historical_ks from archived boxscores with DuckDB"
+    )
+    p.add_argument("seasons", nargs="*", help="Seasons to extract; defaults to every archived season")
+    p.add_argument("--validate", action="store_true",
+                   help="Compare the SQL output with the Python extraction instead of writing tables")
+    args = p.parse_args()
+
+    t0 = time.perf_counter()
+    con = duckdb.connect()
+    extract(con, args.seasons)
+    n_hist = con.execute("SELECT count(*) FROM hist").fetchone()[0]
+    print(f"⏱️  Extracted {n_hist:,} starts in {time.perf_counter() - t0:.1f}s")
+
+    if args.validate:
+        ok = validate(con, args.seasons)
+        con.close()
+        raise SystemExit(0 if ok else 1)
+
+    con.execute(f"ATTACH '{STATS_DB.as_posix()}' AS stats_db")
+    con.execute("CREATE SCHEMA IF NOT EXISTS stats_db.stats;")
+    for role in ("pitcher", "batter"):
+        con.execute(AGG_SQL.format(db="stats_db", role=role))
+    con.execute("DETACH stats_db")
+
+    con.execute(f"ATTACH '{HIST_DB.as_posix()}' AS hist_db")
+    con.execute("CREATE OR REPLACE TABLE hist_db.historical_ks AS SELECT * FROM hist;")
+    con.execute("DETACH hist_db")
+    out = write_query(con, "SELECT * FROM hist", "historical_ks", csv=True, data_dir=DATA_DIR)
+    con.close()
+
+    print(f"✅  Saved {n_hist:,} starts → {out.name} & {HIST_DB.name}; "
+          f"stats.pitcher_stats/batter_stats → {STATS_DB.name} "
+          f"({time.perf_counter() - t0:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
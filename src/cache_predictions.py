@@ -2,42 +2,44 @@
 """
 cache_predictions.py
 --------------------
-Append today's strikeout projections to a persistent cache.
-If the cache file doesn't exist, initialize it with headers.
-By default, it will find the latest `today_ks_proj_YYYY-MM-DD.csv` in data/ if no --pred is provided.
+Append today's strikeout projections to the persistent prediction store
+(data/predictions.duckdb, see prediction_store.py). Only the new rows are
+written; rerunning for the same date and model version replaces them.
+Each priced line's p_raw_<line> column is kept with the row, so the
+online calibrator can fit a map per line.
+By default, it will find the latest `today_ks_proj_YYYY-MM-DD` file in data/ if no --pred is provided.
 Usage (from project root):
-  python src/cache_predictions.py [--pred data/today_k_proj_YYYY-MM-DD.csv]
+  python src/cache_predictions.py [--pred data/today_ks_proj_YYYY-MM-DD.parquet] [--model-version v1]
 """
 import argparse
 from pathlib import Path
-import pandas as pd
-
-data_dir = Path(__file__).resolve().parent.parent / 'data'
-CACHE_PATH = data_dir / 'cached_predictions.csv'
 
+import prediction_store
+from data_io import columns_of, read_table
 
-def ensure_cache():
-    if not CACHE_PATH.exists():
-        # Initialize empty cache with the correct columns
-        cols = ['date', 'game_id', 'side', 'pitcher_id', 'exp_raw', 'p_raw', 'exp_cal', 'p_cal']
-        pd.DataFrame(columns=cols).to_csv(CACHE_PATH, index=False)
+data_dir = Path(__file__).resolve().parent.parent / 'data'
 
 
 def find_latest_pred():
-    # find all today_ks_proj.csv and return latest by filename
-    files = sorted(data_dir.glob('today_ks_proj.csv'))
+    # find all today_ks_proj_*.{parquet,csv} and return latest by filename
+    files = sorted({f.with_suffix('') for f in data_dir.glob('today_ks_proj_*.*')
+                    if f.suffix in ('.parquet', '.csv')})
     if not files:
-        raise FileNotFoundError("No today_ks_proj_*.csv files found in data/")
-    return files[-1]
+        raise FileNotFoundError("No today_ks_proj_* files found in data/")
+    return files[-1].with_suffix('.parquet')
 
 
 def main():
     parser = argparse.ArgumentParser(
-        description="Append today's projections to cached_predictions.csv"
+        description="Append today's projections to the prediction store"
     )
     parser.add_argument(
         '--pred', required=False,
-        help='Path to today_ks_proj_YYYY-MM-DD.csv'
+        help='Path to today_ks_proj_YYYY-MM-DD.{parquet,csv}'
+    )
+    parser.add_argument(
+        '--model-version', default=prediction_store.DEFAULT_VERSION,
+        help='Model version the projections were made with'
     )
     args = parser.parse_args()
 
@@ -46,31 +48,25 @@ def main():
         pred_path = Path(args.pred)
     else:
         pred_path = find_latest_pred()
-        print(f"ℹ️  No --pred provided, using latest: {pred_path.name}")
+        print(f"ℹ️  No --pred provided, using latest: {pred_path.stem}")
 
-    if not pred_path.exists():
+    # Load today's projections
+    try:
+        line_cols = [c for c in columns_of(pred_path) if c.startswith('p_raw_')]
+        pred_df = read_table(pred_path, ['game_id', 'side'] + prediction_store.VALUE_COLS + line_cols)
+    except FileNotFoundError:
         print(f"❌ Prediction file not found: {pred_path}")
         return
-
-    ensure_cache()
-
-    # Load existing cache
-    cache_df = pd.read_csv(CACHE_PATH)
-    # Load today's projections
-    pred_df = pd.read_csv(pred_path)
+    pred_df = prediction_store.pack_lines(pred_df)
 
     # Extract date from filename
-    date_str = pred_path.stem.split('_')[-1]
-    pred_df['date'] = date_str
-
-    # Select and order columns
-    new_rows = pred_df[['date', 'game_id', 'side', 'pitcher_id', 'exp_raw', 'p_raw', 'exp_cal', 'p_cal']]
+    pred_df['date'] = pred_path.stem.split('_')[-1]
 
-    # Append and save
-    updated = pd.concat([cache_df, new_rows], ignore_index=True)
-    updated.to_csv(CACHE_PATH, index=False)
+    con = prediction_store.connect()
+    n = prediction_store.upsert(con, pred_df, args.model_version)
+    con.close()
 
-    print(f"💾 Appended {len(new_rows)} rows to {CACHE_PATH}")
+    print(f"💾 Stored {n} rows in {prediction_store.STORE_DB} (model {args.model_version})")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+cal_report.py
+-------------
+Calibration plots, kept off the retrain path.
+
+calibrate.py and online_calibrate.py save their models first and then
+hand plotting to this script in a background process (or skip it with
+--no-plots). matplotlib is only imported here, with the headless Agg
+backend, and every start is summarized with hexbins / bins instead of
+being scattered, so rendering time stays flat as history grows.
+
+Usage (from src/):
+  python cal_report.py sim    --sim ../data/historical_ks_sim.parquet --calibration models/calibration.json --out models
+  python cal_report.py online --state models/online_cal_state.json --calibration models/calibration_online.json \\
+                              --store ../data/predictions.duckdb --truth ../data/historical_ks.parquet --out plots
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+import calibration
+from data_io import read_table
+
+
+def launch(argv: list[str], log: Path) -> subprocess.Popen:
+    """Run this script with `argv` in a detached background process, logging to `log`."""
+    log.parent.mkdir(parents=True, exist_ok=True)
+    with log.open("w") as f:
+        return subprocess.Popen([sys.executable, str(Path(__file__).resolve()), *map(str, argv)],
+                                stdout=f, stderr=subprocess.STDOUT, start_new_session=True)
+
+
+def _pyplot():
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def plot_exp(x: np.ndarray, y: np.ndarray, cal: calibration.Calibration, path: Path, title: str) -> None:
+    """Hexbin of simulated E[K] vs actual K with binned means and the linear fit."""
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(6, 6))
+    hb = ax.hexbin(x, y, gridsize=40, mincnt=1, cmap="Blues")
+    fig.colorbar(hb, ax=ax, label="starts")
+
+    edges = np.linspace(x.min(), x.max(), 21)
+    idx = np.clip(np.digitize(x, edges) - 1, 0, len(edges) - 2)
+    count = np.bincount(idx, minlength=len(edges) - 1)
+    keep = count > 0
+    ax.plot((np.bincount(idx, weights=x, minlength=len(count)) / np.maximum(count, 1))[keep],
+            (np.bincount(idx, weights=y, minlength=len(count)) / np.maximum(count, 1))[keep],
+            "o", c="C3", ms=4, label="binned mean")
+    xs = np.linspace(x.min(), x.max(), 100)
+    ax.plot(xs, cal.exp(xs), c="C1", lw=2, label=f"fit: {cal.slope:.3f}·x + {cal.intercept:.3f}")
+    ax.set_xlabel("Simulated E[K]")
+    ax.set_ylabel("Actual K")
+    ax.set_title(title)
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def plot_prob(mean_p: np.ndarray, observed: np.ndarray, count: np.ndarray,
+              cal: calibration.Calibration, line: float, path: Path, title: str) -> None:
+    """Reliability bins (sized by count) with the isotonic map."""
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(6, 6))
+    ax.scatter(mean_p, observed, s=10 + 200 * count / count.max(), alpha=0.5, label="bins")
+    if (xy := cal.iso_map(line)) is not None:
+        ax.plot(*xy, c="C1", lw=2, label="isotonic")
+    ax.plot([0, 1], [0, 1], "--", c="gray")
+    ax.set_xlabel(f"simulated P(K≥{line})")
+    ax.set_ylabel("observed freq")
+    ax.set_title(title)
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def report_sim(args) -> None:
+    df = read_table(args.sim, ["exp_ks", "k_actual"]).dropna()
+    cal = calibration.load(args.calibration)
+    out = args.out / "cal_exp_ks.png"
+    plot_exp(df["exp_ks"].to_numpy(float), df["k_actual"].to_numpy(float), cal, out,
+             "Calibration of Simulated vs. Actual Strikeouts")
+    print(f"✅  Saved plot → {out}")
+
+
+def report_online(args) -> None:
+    import json
+    import prediction_store
+
+    cal = calibration.load(args.calibration)
+    with args.state.open() as f:
+        state = json.load(f)
+
+    con = prediction_store.connect(args.store, read_only=True)
+    df = prediction_store.settled_pairs(con, args.truth, only_new=False).dropna(subset=["exp_raw", "k_actual"])
+    con.close()
+    out = args.out / "cal_exp_ks_online.png"
+    plot_exp(df["exp_raw"].to_numpy(float), df["k_actual"].to_numpy(float), cal, out,
+             "Online MLB Ks Calibration (exp)")
+    print(f"✅  Saved plot → {out}")
+
+    line = state["line"]
+    prob = state["prob"]["lines"].get(f"{line:g}")
+    if prob is None:
+        print(f"⚠️  No binned probabilities at line {line:g} yet – skipping the P(over) plot")
+        return
+    count = np.asarray(prob["count"], dtype=float)
+    keep = count > 0
+    out = args.out / "cal_p_over_online.png"
+    plot_prob(np.asarray(prob["psum"])[keep] / count[keep], np.asarray(prob["hits"])[keep] / count[keep],
+              count[keep], cal, line, out, "Online MLB Ks Calibration (prob)")
+    print(f"✅  Saved plot → {out}")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Render calibration plots")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    s = sub.add_parser("sim", help="calibrate.py plots from a sim file")
+    s.add_argument("--sim", type=Path, required=True)
+    s.add_argument("--calibration", type=Path, required=True)
+    s.add_argument("--out", type=Path, required=True)
+    s.set_defaults(func=report_sim)
+
+    o = sub.add_parser("online", help="online_calibrate.py plots from its state + the store")
+    o.add_argument("--state", type=Path, required=True)
+    o.add_argument("--calibration", type=Path, required=True)
+    o.add_argument("--store", type=Path, required=True)
+    o.add_argument("--truth", type=Path, required=True)
+    o.add_argument("--out", type=Path, required=True)
+    o.set_defaults(func=report_online)
+
+    args = p.parse_args()
+    args.out.mkdir(parents=True, exist_ok=True)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
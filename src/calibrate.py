@@ -3,16 +3,126 @@
 calibrate.py
 ------------
 Fit a linear calibration between simulated K expectations (exp_ks)
-and actual strikeouts (k_actual), then plot and save the calibration.
+and actual strikeouts (k_actual), then save (and plot) the calibration.
+When the sim file also has probabilities, an isotonic map P(K ≥ line) is
+fitted for each line it prices: p_over at --line and every
+p_over_<line> column (backtest.py --lines), e.g. p_over_5_5 → 5.5.
+
+With --folds K the fit is first cross-validated in time order: the
+starts are cut into K+1 blocks of consecutive dates, and fold i trains on
+blocks 0..i (expanding window) and scores block i+1. Folds are fitted in
+parallel processes and reported as one table (models/calibration_cv.*)
+before the final fit on all history.
+
+The fit is written to models/calibration.json (see calibration.py), the
+batch artifact; online_calibrate.py keeps its own file, and each run here
+replaces this one with a fresh fit. The plot is rendered afterwards by cal_report.py in a background
+process (--no-plots skips it). sklearn, pandas and DuckDB load only once
+arguments are parsed.
 """
+from __future__ import annotations
+
 import argparse
-import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
-from sklearn.linear_model import LinearRegression
+
+import cal_report
+import calibration
+from data_io import columns_of, read_table, write_table
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+EPS = 1e-6
+
+
+def prob_columns(columns, line: float) -> dict[str, float]:
+    """Sim probability columns → the line each one prices."""
+    probs = {"p_over": line} if "p_over" in columns else {}
+    for c in columns:
+        if c.startswith("p_over_"):
+            probs[c] = float(c[len("p_over_"):].replace("_", "."))
+    return probs
+
+
+def fit(exp_ks: np.ndarray, k_actual: np.ndarray, p_over: dict[float, np.ndarray]) -> calibration.Calibration:
+    """
+    Linear E[K] fit, plus an isotonic P(over) map for each line in `p_over`
+    (line → P(K ≥ line)); each model uses the rows where its own inputs are present.
+    """
+    from sklearn.isotonic import IsotonicRegression
+    from sklearn.linear_model import LinearRegression
+
+    lin = ~np.isnan(exp_ks)
+    lr = LinearRegression().fit(exp_ks[lin].reshape(-1, 1), k_actual[lin])
+    cal = calibration.Calibration(lr.coef_[0], lr.intercept_)
+    for line, p in p_over.items():
+        if (prob := ~np.isnan(p)).any():
+            iso = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip")
+            iso.fit(p[prob], (k_actual[prob] >= line).astype(float))
+            cal.set_isotonic(line, iso.X_thresholds_, iso.y_thresholds_)
+    return cal
+
+
+def time_folds(dates: np.ndarray, k: int) -> list[tuple[np.ndarray, np.ndarray]]:
+    """Expanding-window (train, test) index pairs over k+1 blocks of whole dates."""
+    days = np.unique(dates)
+    if len(days) < k + 1:
+        raise ValueError(f"{k} folds need at least {k + 1} distinct dates, got {len(days)}")
+    order = np.argsort(dates, kind="stable")
+    blocks = np.array_split(days, k + 1)
+    block_of = np.searchsorted(np.array([b[0] for b in blocks]), dates[order], side="right") - 1
+    return [(order[block_of <= i], order[block_of == i + 1]) for i in range(k)]
+
+
+def score_fold(fold: int, train: dict, test: dict, probs: dict[str, float], line: float) -> dict:
+    """Fit on `train`, score raw vs calibrated predictions on `test` (probabilities at `line`)."""
+    cal = fit(train["exp_ks"], train["k_actual"], {ln: train[c] for c, ln in probs.items()})
+    lin = ~np.isnan(test["exp_ks"])
+    y, exp_raw = test["k_actual"][lin], test["exp_ks"][lin]
+    exp_cal = cal.exp(exp_raw)
+    row = {
+        "fold": fold,
+        "n_train": len(train["k_actual"]),
+        "n_test": len(test["k_actual"]),
+        "test_start": test["date"].min(),
+        "test_end": test["date"].max(),
+        "slope": cal.slope,
+        "intercept": cal.intercept,
+        "mae_raw": float(np.abs(exp_raw - y).mean()),
+        "mae_cal": float(np.abs(exp_cal - y).mean()),
+        "rmse_raw": float(np.sqrt(((exp_raw - y) ** 2).mean())),
+        "rmse_cal": float(np.sqrt(((exp_cal - y) ** 2).mean())),
+    }
+    if "p_over" in test:
+        prob = ~np.isnan(test["p_over"])
+        hit = (test["k_actual"][prob] >= line).astype(float)
+        p_raw = np.clip(test["p_over"][prob], EPS, 1 - EPS)
+        p_cal = np.clip(cal.p_over(test["p_over"][prob], line), EPS, 1 - EPS)
+        row.update({
+            "brier_raw": float(((p_raw - hit) ** 2).mean()),
+            "brier_cal": float(((p_cal - hit) ** 2).mean()),
+            "logloss_raw": float(-(hit * np.log(p_raw) + (1 - hit) * np.log(1 - p_raw)).mean()),
+            "logloss_cal": float(-(hit * np.log(p_cal) + (1 - hit) * np.log(1 - p_cal)).mean()),
+        })
+    return row
+
+
+def cross_validate(df: pd.DataFrame, folds: int, probs: dict[str, float], line: float, jobs: int) -> pd.DataFrame:
+    import pandas as pd
+    cols = {c: df[c].to_numpy() for c in df.columns}
+    tasks = [
+        (i, {c: v[tr] for c, v in cols.items()}, {c: v[te] for c, v in cols.items()}, probs, line)
+        for i, (tr, te) in enumerate(time_folds(cols["date"], folds))
+    ]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+        rows = list(pool.map(score_fold, *zip(*tasks)))
+    return pd.DataFrame(rows)
+
 
 def main():
     p = argparse.ArgumentParser(
@@ -20,59 +130,73 @@ def main():
     )
     p.add_argument(
         "--sim", type=Path, default=Path("../data/historical_ks_sim.csv"),
-        help="CSV with columns k_actual and exp_ks"
+        help="Parquet/CSV with columns k_actual and exp_ks (Parquet preferred)"
     )
     p.add_argument(
-        "--outdir", type=Path, default=Path("models"),
+        "--outdir", type=Path, default=calibration.MODEL_DIR,
         help="Directory to save calibration plot and JSON"
     )
+    p.add_argument(
+        "--line", type=float, default=6.5,
+        help="K line that the sim's p_over refers to (p_over_<line> columns name their own)"
+    )
+    p.add_argument(
+        "--folds", type=int, default=0,
+        help="Time-ordered expanding-window CV folds before the final fit (0 = off)"
+    )
+    p.add_argument(
+        "--jobs", type=int, default=os.cpu_count() or 1,
+        help="Processes for fitting CV folds"
+    )
+    p.add_argument(
+        "--no-plots", action="store_true",
+        help="Skip the background calibration plot"
+    )
     args = p.parse_args()
 
-    # Load your simulation results
-    df = pd.read_csv(args.sim)
-    if not {"k_actual", "exp_ks"}.issubset(df.columns):
-        raise ValueError("Input CSV must have 'k_actual' and 'exp_ks' columns")
-
-    # Prepare X and y
-    X = df[["exp_ks"]].to_numpy()        # shape (n_samples, 1)
-    y = df["k_actual"].to_numpy()        # shape (n_samples,)
-
-    # Fit linear model
-    lr = LinearRegression()
-    lr.fit(X, y)
-    slope = lr.coef_[0]
-    intercept = lr.intercept_
-    print(f"Calibration result: k_actual ≈ {slope:.4f}·exp_ks + {intercept:.4f}")
+    # Load your simulation results (only the columns we fit)
+    available = columns_of(args.sim)
+    missing = [c for c in ("exp_ks", "k_actual") if c not in available]
+    if missing:
+        raise ValueError(f"{args.sim} is missing required column(s): {', '.join(missing)}")
+    if args.folds and "date" not in available:
+        raise ValueError("Cross-validation needs a 'date' column in the sim file")
+    probs = prob_columns(available, args.line)
+    cols = ["date", "exp_ks", "k_actual", *probs]
+    df = read_table(args.sim, [c for c in cols if c in available])
+    # k_actual (and the fold date) is needed by every model; exp_ks / p_over gaps are masked per model
+    df = df.dropna(subset=["k_actual"] + (["date"] if args.folds else []))
+    for c in ("exp_ks", "k_actual", *probs):
+        df[c] = df[c].astype(float)
 
     # Ensure output directory exists
     args.outdir.mkdir(parents=True, exist_ok=True)
+    json_path = args.outdir / calibration.ARTIFACT_NAME
 
-    # Plot calibration
-    plt.figure(figsize=(6, 6))
-    plt.scatter(df["exp_ks"], df["k_actual"], alpha=0.3, label="Historical starts")
-    # regression line
-    xs = np.linspace(df["exp_ks"].min(), df["exp_ks"].max(), 100).reshape(-1, 1)
-    ys = lr.predict(xs)
-    plt.plot(xs.flatten(), ys, linewidth=2, label="Fit: slope×exp_ks + intercept")
-    plt.xlabel("Simulated E[K]")
-    plt.ylabel("Actual K")
-    plt.title("Calibration of Simulated vs. Actual Strikeouts")
-    plt.legend()
-    plt.grid(True)
-    plt.tight_layout()
-
-    # Save plot and JSON
-    plot_path = args.outdir / "cal_exp_ks.png"
-    json_path = args.outdir / "calibration.json"
-    plt.savefig(plot_path)
-    plt.close()
-    print(f"✅  Saved plot → {plot_path}")
-
-    # Save parameters
-    params = {"slope": float(slope), "intercept": float(intercept)}
-    with json_path.open("w") as f:
-        json.dump(params, f, indent=2)
+    # Held-out evaluation, folds fitted in parallel
+    if args.folds:
+        report = cross_validate(df, args.folds, probs, args.line, args.jobs)
+        print(report.set_index("fold").T.to_string())
+        out = write_table(report, "calibration_cv", csv=True, data_dir=args.outdir)
+        print(f"✅  Saved CV report → {out}")
+
+    # Final fit on all history
+    fitted = fit(df["exp_ks"].to_numpy(), df["k_actual"].to_numpy(),
+                 {line: df[c].to_numpy(float) for c, line in probs.items()})
+    print(f"Calibration result: k_actual ≈ {fitted.slope:.4f}·exp_ks + {fitted.intercept:.4f}")
+    if fitted.has_isotonic:
+        print("Isotonic P(over) maps at lines " + ", ".join(f"{ln:g}" for ln in fitted.lines))
+
+    # Save parameters (the batch artifact; the online fit lives in its own file)
+    fitted.meta = {"source": "calibrate", "n": int(df["exp_ks"].notna().sum()), "cv_folds": args.folds}
+    calibration.save(fitted, json_path)
     print(f"✅  Saved parameters → {json_path}")
 
+    # Plot calibration off the critical path
+    if not args.no_plots:
+        log = args.outdir / "cal_report.log"
+        cal_report.launch(["sim", "--sim", args.sim, "--calibration", json_path, "--out", args.outdir], log)
+        print(f"🖼️  Rendering plot in the background (log → {log})")
+
 if __name__ == "__main__":
     main()
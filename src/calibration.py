@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+calibration.py
+--------------
+Pickle-free calibration artifacts shared by the fitters and the
+projection path (today_proj.py, proj_service.py, lineup_watch.py).
+
+Each fitter owns its own file, so neither overwrites the other's fit:
+  • models/calibration.json         calibrate.py, batch fit on the sim history ("batch")
+  • models/calibration_online.json  online_calibrate.py, running fit on settled predictions ("online")
+The projection picks one explicitly (--calibration batch|online, default
+batch); the artifact's meta records which fitter wrote it.
+
+Both hold plain numbers:
+  {"version": 2, "created": ..., "meta": {...},
+   "linear":    {"slope": a, "intercept": b},             # E[K]_cal = a·E[K]_raw + b
+   "isotonic":  [{"line": 6.5, "x": [...], "y": [...]},   # P_cal = interp(P_raw; x, y)
+                 ...]}                                     # one map per fitted line
+Loading it needs only json + numpy, and Calibration applies the maps to
+whole arrays at once. A line without its own map has no calibrated
+probability (NaN): a map fitted at one line is never borrowed for another.
+Version 1 files (a single isotonic map) load as a one-line map; a
+version-less {"slope", "intercept"} file (the old calibrate.py output)
+loads as linear-only.
+
+Usage (from src/):
+  python calibration.py convert [../models]   # old mlb_*.pkl → models/calibration.json
+"""
+import argparse
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+ARTIFACT_VERSION = 2
+ARTIFACT_NAME = "calibration.json"                # calibrate.py
+ONLINE_ARTIFACT_NAME = "calibration_online.json"  # online_calibrate.py
+ARTIFACTS = {"batch": ARTIFACT_NAME, "online": ONLINE_ARTIFACT_NAME}
+MODEL_DIR = Path(__file__).resolve().parent.parent / "models"
+
+
+def artifact_path(source: str = "batch", model_dir: Path = MODEL_DIR) -> Path:
+    """The artifact written by the `source` fitter (see ARTIFACTS)."""
+    if source not in ARTIFACTS:
+        raise ValueError(f"unknown calibration {source!r}; expected one of {tuple(ARTIFACTS)}")
+    return Path(model_dir) / ARTIFACTS[source]
+
+
+class Calibration:
+    """Linear E[K] map plus isotonic P(over) maps keyed by line, evaluated vectorized."""
+
+    def __init__(self, slope: float = 1.0, intercept: float = 0.0,
+                 isotonic: dict | None = None, meta: dict | None = None):
+        self.slope = float(slope)
+        self.intercept = float(intercept)
+        self.isotonic: dict[float, tuple[np.ndarray, np.ndarray]] = {}
+        for line, (x, y) in (isotonic or {}).items():
+            self.set_isotonic(line, x, y)
+        self.meta = meta or {}
+
+    @property
+    def has_isotonic(self) -> bool:
+        return bool(self.isotonic)
+
+    @property
+    def lines(self) -> list[float]:
+        """Lines with an isotonic map, ascending."""
+        return sorted(self.isotonic)
+
+    def set_isotonic(self, line: float, x, y) -> None:
+        if len(x):
+            self.isotonic[float(line)] = (np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+
+    def iso_map(self, line: float) -> tuple[np.ndarray, np.ndarray] | None:
+        """Breakpoints of the map fitted at `line`, or None."""
+        for fitted, xy in self.isotonic.items():
+            if np.isclose(fitted, line):
+                return xy
+        return None
+
+    def exp(self, exp_raw):
+        return self.slope * np.asarray(exp_raw, dtype=float) + self.intercept
+
+    def p_over(self, p_raw, line: float):
+        """Calibrated P(K ≥ line) (any shape); NaN without a map for `line`."""
+        p_raw = np.asarray(p_raw, dtype=float)
+        xy = self.iso_map(line)
+        if xy is None:
+            return np.full_like(p_raw, np.nan)
+        return np.interp(p_raw, *xy)
+
+    def p_over_lines(self, p_raw, lines):
+        """(sides × lines) P(K ≥ line) → calibrated per line; NaN for lines without a map."""
+        p_raw = np.asarray(p_raw, dtype=float)
+        p_cal = np.full_like(p_raw, np.nan)
+        for j, line in enumerate(lines):
+            p_cal[..., j] = self.p_over(p_raw[..., j], line)
+        return p_cal
+
+    def to_dict(self) -> dict:
+        return {
+            "version": ARTIFACT_VERSION,
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "meta": self.meta,
+            "linear": {"slope": self.slope, "intercept": self.intercept},
+            "isotonic": [{"line": line, "x": x.tolist(), "y": y.tolist()}
+                         for line, (x, y) in sorted(self.isotonic.items())],
+        }
+
+
+def load(path: Path) -> Calibration:
+    with Path(path).open() as f:
+        d = json.load(f)
+    if "version" not in d:  # legacy calibrate.py output
+        return Calibration(d["slope"], d["intercept"], meta={"legacy": True})
+    if d["version"] > ARTIFACT_VERSION:
+        raise ValueError(f"{path} is artifact version {d['version']}, this code reads ≤ {ARTIFACT_VERSION}")
+    maps = d.get("isotonic") or []
+    if isinstance(maps, dict):  # version 1: one map
+        maps = [maps]
+    # a map that records no line cannot be matched to one
+    isotonic = {m["line"]: (m["x"], m["y"]) for m in maps if m.get("line") is not None}
+    return Calibration(d["linear"]["slope"], d["linear"]["intercept"], isotonic, d.get("meta"))
+
+
+def save(cal: Calibration, path: Path) -> Path:
+    """Write atomically, so a reader never sees a half-written artifact."""
+    path = Path(path)
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w") as f:
+        json.dump(cal.to_dict(), f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def convert_pickles(model_dir: Path, line: float = 6.5) -> Path:
+    """One-off migration of mlb_exp_lin.pkl / mlb_p_over_iso.pkl (needs sklearn), fitted at `line`."""
+    import pickle
+    with (model_dir / "mlb_exp_lin.pkl").open("rb") as f:
+        lin = pickle.load(f)
+    cal = Calibration(float(lin.coef_[0]), float(lin.intercept_), meta={"source": "pickle"})
+    iso_pkl = model_dir / "mlb_p_over_iso.pkl"
+    if iso_pkl.exists():
+        with iso_pkl.open("rb") as f:
+            iso = pickle.load(f)
+        cal.set_isotonic(line, iso.X_thresholds_, iso.y_thresholds_)
+    return save(cal, model_dir / ARTIFACT_NAME)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Manage calibration artifacts")
+    p.add_argument("command", choices=["convert"])
+    p.add_argument("model_dir", type=Path, nargs="?", default=MODEL_DIR)
+    p.add_argument("--line", type=float, default=6.5, help="K line the pickled isotonic map was fitted on")
+    args = p.parse_args()
+
+    out = convert_pickles(args.model_dir, args.line)
+    print(f"✔️  Pickled calibrators → {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,12 +10,80 @@ Usage (from project root):
     2024 2025
 
 This will look for data/player_stats_{season}.duckdb for each season
-and merge their 'player_stats' tables into data/player_stats.duckdb.
+and upsert their 'player_stats' tables into data/player_stats.duckdb,
+keyed on (season, player_id, player_role), so reruns replace rows
+instead of duplicating them.
+
+The combined table is also exported as a Hive-partitioned Parquet
+dataset, data/player_stats_parquet/season=YYYY/role=<role>/, so lookups
+filtering on season and role only read the matching files.
 """
 import sys
 from pathlib import Path
 import duckdb
 
+KEY = ("season", "player_id", "player_role")
+
+# per-season sources come in two layouts: the combined one, and the
+# roster/season-totals one (group = pitching|hitting)
+SELECT_COMBINED = """
+    SELECT CAST(season AS VARCHAR) AS season, player_id, player_role,
+           k_total, opportunities, k_rate
+      FROM {src}
+"""
+SELECT_TOTALS = """
+    SELECT CAST(season AS VARCHAR) AS season, player_id,
+           CASE WHEN "group" = 'pitching' THEN 'pitcher' ELSE 'batter' END AS player_role,
+           strikeouts AS k_total,
+           CAST(CASE WHEN "group" = 'pitching' THEN batters_faced
+                     ELSE plate_appearances END AS INTEGER) AS opportunities,
+           k_rate
+      FROM {src}
+"""
+
+
+def ensure_table(con: duckdb.DuckDBPyConnection) -> None:
+    """Create the keyed table, migrating an older un-keyed one (dropping duplicates)."""
+    ddl = (
+        "CREATE TABLE {name} ("
+        "season VARCHAR, player_id INTEGER, player_role VARCHAR,"
+        "k_total INTEGER, opportunities INTEGER, k_rate DOUBLE,"
+        "PRIMARY KEY (season, player_id, player_role))"
+    )
+    exists = con.execute(
+        "SELECT count(*) FROM information_schema.tables WHERE table_name = 'player_stats'"
+    ).fetchone()[0]
+    if not exists:
+        con.execute(ddl.format(name="player_stats"))
+        return
+
+    keyed = con.execute(
+        "SELECT count(*) FROM duckdb_constraints() "
+        "WHERE table_name = 'player_stats' AND constraint_type = 'PRIMARY KEY'"
+    ).fetchone()[0]
+    if keyed:
+        return
+    con.execute(ddl.format(name="player_stats_keyed"))
+    con.execute(f"""
+        INSERT INTO player_stats_keyed
+        SELECT * FROM player_stats
+        QUALIFY row_number() OVER (PARTITION BY {', '.join(KEY)} ORDER BY opportunities DESC NULLS LAST) = 1
+    """)
+    con.execute("DROP TABLE player_stats")
+    con.execute("ALTER TABLE player_stats_keyed RENAME TO player_stats")
+    print("ℹ️  Migrated player_stats to a keyed table (duplicates dropped)")
+
+
+def export_parquet(con: duckdb.DuckDBPyConnection, out_dir: Path) -> None:
+    con.execute(f"""
+        COPY (SELECT season, player_role AS role, player_id, k_total, opportunities, k_rate
+                FROM player_stats)
+          TO '{out_dir.as_posix()}'
+          (FORMAT PARQUET, PARTITION_BY (season, role), OVERWRITE)
+    """)
+    print(f"🗂️  Exported Hive-partitioned Parquet → {out_dir}")
+
+
 def main():
     # Seasons passed as args
     seasons = sys.argv[1:]
@@ -27,16 +95,12 @@ def main():
     base_dir = Path(__file__).resolve().parent.parent
     data_dir = base_dir / "data"
     out_db = data_dir / "player_stats.duckdb"
+    out_parquet = data_dir / "player_stats_parquet"
 
     # Initialize output DB
     con = duckdb.connect(str(out_db))
     con.execute("PRAGMA threads=4;")
-    # Create combined table if not exists
-    con.execute(
-        "CREATE TABLE IF NOT EXISTS player_stats ("
-        "season VARCHAR, player_id INTEGER, player_role VARCHAR,"
-        "k_total INTEGER, opportunities INTEGER, k_rate DOUBLE)"
-    )
+    ensure_table(con)
 
     for season in seasons:
         input_db = data_dir / f"player_stats_{season}.duckdb"
@@ -45,28 +109,34 @@ def main():
             continue
 
         alias = f"db_{season}"
-        con.execute(f"ATTACH '{input_db}' AS {alias}")
-        # Check table presence
-        exists = con.execute(
-            f"SELECT count(*) FROM information_schema.tables "
-            f"WHERE table_schema='{alias}' AND table_name='player_stats'"
-        ).fetchone()[0]
-        if not exists:
+        con.execute(f"ATTACH '{input_db}' AS {alias} (READ_ONLY)")
+        # Check table presence and layout
+        cols = {c for (c,) in con.execute(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_catalog = ? AND table_name = 'player_stats'", [alias]
+        ).fetchall()}
+        if not cols:
             print(f"⚠️  No 'player_stats' table in {input_db.name}")
             con.execute(f"DETACH {alias}")
             continue
+        select = SELECT_COMBINED if "player_role" in cols else SELECT_TOTALS
 
-        # Append records
-        con.execute(
-            f"INSERT INTO player_stats "
-            f"SELECT * FROM {alias}.player_stats;"
-        )
-        print(f"✅  Appended stats from season {season}")
+        # Upsert records, one row per key (keep the largest sample)
+        before = con.execute("SELECT count(*) FROM player_stats").fetchone()[0]
+        con.execute(f"""
+            INSERT OR REPLACE INTO player_stats
+            SELECT * FROM ({select.format(src=f'{alias}.player_stats')})
+             WHERE season = ? AND player_id IS NOT NULL
+            QUALIFY row_number() OVER (PARTITION BY {', '.join(KEY)} ORDER BY opportunities DESC NULLS LAST) = 1
+        """, [season])
+        after = con.execute("SELECT count(*) FROM player_stats").fetchone()[0]
+        print(f"✅  Upserted stats from season {season} ({after - before:+,} rows)")
         con.execute(f"DETACH {alias}")
 
     # Final count
     total = con.execute("SELECT count(*) FROM player_stats").fetchone()[0]
     print(f"🏁 Total rows in merged 'player_stats': {total}")
+    export_parquet(con, out_parquet)
     con.close()
 
 if __name__ == '__main__':
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+data_io.py
+----------
+Typed Parquet I/O for the pipeline's interchange files.
+
+Writers store each artifact as data/<name>.parquet with the column types
+in SCHEMAS (CSV export kept as an option). Readers go through DuckDB so
+only the requested columns are decoded and WHERE filters are pushed down
+to the Parquet row groups; a CSV is read only when no Parquet exists yet,
+and then with the SCHEMAS types instead of DuckDB's guesses, so a column
+has the same type whichever file it came from.
+DuckDB itself is imported on first use, so importing this module is cheap.
+
+Usage (from src/):
+  python data_io.py convert [historical_ks historical_ks_sim ...]   # CSV → Parquet
+"""
+from __future__ import annotations
+
+import argparse
+import csv as _csv
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import duckdb
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = BASE_DIR / "data"
+
+# artifact name (glob) → column types; unlisted columns keep inferred types
+SCHEMAS = {
+    "historical_ks": {
+        "game_pk": "BIGINT", "date": "VARCHAR", "season": "VARCHAR", "side": "VARCHAR",
+        "pitcher_id": "BIGINT", "k_actual": "INTEGER", "lineup_ids": "VARCHAR",
+    },
+    "historical_ks_sim*": {
+        "game_pk": "BIGINT", "date": "VARCHAR", "season": "VARCHAR", "side": "VARCHAR",
+        "pitcher_id": "BIGINT", "k_actual": "INTEGER", "lineup_ids": "VARCHAR",
+        "exp_ks": "DOUBLE", "p_over": "DOUBLE", "p10": "DOUBLE", "p90": "DOUBLE",
+    },
+    "eval_predictions": {"k_actual": "INTEGER", "k_pred": "DOUBLE", "prob_over": "DOUBLE"},
+    "cached_predictions": {
+        "date": "VARCHAR", "game_id": "BIGINT", "side": "VARCHAR", "pitcher_id": "BIGINT",
+        "exp_raw": "DOUBLE", "p_raw": "DOUBLE", "exp_cal": "DOUBLE", "p_cal": "DOUBLE",
+    },
+    "schedule*": {
+        "game_id": "BIGINT", "official_date": "VARCHAR", "away_pid": "BIGINT", "home_pid": "BIGINT",
+        "away_lineup": "VARCHAR", "home_lineup": "VARCHAR",
+    },
+    "player_stats_*": {
+        "season": "VARCHAR", "game_pk": "BIGINT", "player_id": "BIGINT", "player_role": "VARCHAR",
+        "k_total": "INTEGER", "opportunities": "INTEGER",
+    },
+    "leash": {"season": "VARCHAR", "pitcher_id": "BIGINT", "n_starts": "INTEGER"},
+    "today_ks_proj*": {
+        "game_id": "BIGINT", "side": "VARCHAR", "pitcher_id": "BIGINT",
+        "exp_raw": "DOUBLE", "p_raw": "DOUBLE", "exp_cal": "DOUBLE", "p_cal": "DOUBLE",
+    },
+}
+
+
+def schema_for(name: str) -> dict:
+    for pattern, cols in SCHEMAS.items():
+        if fnmatch(name, pattern):
+            return cols
+    return {}
+
+
+def typed_select(src: str, columns: list[str], name: str) -> str:
+    types = schema_for(name)
+    cols = [f'CAST("{c}" AS {types[c]}) AS "{c}"' if c in types else f'"{c}"' for c in columns]
+    return f"SELECT {', '.join(cols)} FROM {src}"
+
+
+def resolve(name_or_path: str | Path, data_dir: Path = DATA_DIR) -> Path:
+    """
+    Map an artifact name or path to the file to read, preferring Parquet:
+    'historical_ks' → data/historical_ks.parquet if present, else the CSV.
+    An explicit .csv path reads its Parquet twin only when that twin is at
+    least as new as the CSV.
+    """
+    p = Path(name_or_path)
+    if p.suffix not in (".parquet", ".csv"):
+        p = data_dir / f"{p.name}.parquet"
+    parquet, csv = p.with_suffix(".parquet"), p.with_suffix(".csv")
+    if parquet.exists() and not (p.suffix == ".csv" and csv.exists()
+                                 and parquet.stat().st_mtime < csv.stat().st_mtime):
+        return parquet
+    if csv.exists():
+        return csv
+    raise FileNotFoundError(f"No Parquet or CSV found for {name_or_path}")
+
+
+def csv_types(path: Path) -> dict:
+    """The artifact's SCHEMAS types for the columns present in the CSV header."""
+    with path.open(newline="") as f:
+        header = next(_csv.reader(f), [])
+    types = schema_for(path.stem)
+    return {c: types[c] for c in header if c in types}
+
+
+def source_sql(path: Path) -> str:
+    if path.suffix == ".parquet":
+        return f"read_parquet('{path.as_posix()}')"
+    types = ", ".join(f"'{c}': '{t}'" for c, t in csv_types(path).items())
+    opts = f", types = {{{types}}}" if types else ""
+    return f"read_csv_auto('{path.as_posix()}', header = true{opts})"
+
+
+def columns_of(name_or_path: str | Path) -> list[str]:
+    """Column names of an artifact, read from the file metadata only."""
+    import duckdb
+    con = duckdb.connect()
+    try:
+        return [r[0] for r in con.execute(f"DESCRIBE SELECT * FROM {source_sql(resolve(name_or_path))}").fetchall()]
+    finally:
+        con.close()
+
+
+def read_table(name_or_path: str | Path, columns: list[str] | None = None,
+               where: str | None = None, params: list | None = None,
+               con: duckdb.DuckDBPyConnection | None = None):
+    """
+    Read an artifact as a DataFrame, decoding only `columns` and pushing
+    `where` (DuckDB SQL, `?` placeholders bound from `params`) into the scan.
+    """
+    import duckdb
+    path = resolve(name_or_path)
+    cols = ", ".join(f'"{c}"' for c in columns) if columns else "*"
+    sql = f"SELECT {cols} FROM {source_sql(path)}"
+    if where:
+        sql += f" WHERE {where}"
+    own = con is None
+    con = con or duckdb.connect()
+    try:
+        return con.execute(sql, params or []).fetchdf()
+    finally:
+        if own:
+            con.close()
+
+
+def write_query(con: duckdb.DuckDBPyConnection, query: str, name: str,
+                csv: bool = False, data_dir: Path = DATA_DIR) -> Path:
+    """COPY a DuckDB query to data/<name>.parquet with the artifact's types."""
+    columns = [d[0] for d in con.execute(f"SELECT * FROM ({query}) LIMIT 0").description]
+    typed = typed_select(f"({query})", columns, name)
+    out = data_dir / f"{name}.parquet"
+    con.execute(f"COPY ({typed}) TO '{out.as_posix()}' (FORMAT PARQUET)")
+    if csv:
+        con.execute(f"COPY ({typed}) TO '{out.with_suffix('.csv').as_posix()}' (HEADER, DELIMITER ',')")
+    return out
+
+
+def write_table(df, name: str, csv: bool = False, data_dir: Path = DATA_DIR) -> Path:
+    """Write a DataFrame to data/<name>.parquet (and optionally .csv)."""
+    import duckdb
+    con = duckdb.connect()
+    try:
+        con.register("frame", df)
+        return write_query(con, "SELECT * FROM frame", name, csv, data_dir)
+    finally:
+        con.close()
+
+
+def main():
+    p = argparse.ArgumentParser(description="Convert CSV artifacts in data/ to typed Parquet")
+    p.add_argument("command", choices=["convert"])
+    p.add_argument("names", nargs="*", help="Artifact names (default: every CSV in data/)")
+    args = p.parse_args()
+
+    import duckdb
+    names = args.names or sorted(f.stem for f in DATA_DIR.glob("*.csv"))
+    con = duckdb.connect()
+    for name in names:
+        csv = DATA_DIR / f"{name}.csv"
+        if not csv.exists():
+            print(f"⚠️  File not found: {csv}")
+            continue
+        out = write_query(con, f"SELECT * FROM {source_sql(csv)}", name)
+        print(f"✔️  {csv.name} → {out.name}")
+    con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,10 @@ from pathlib import Path
 import duckdb
 import pandas as pd
 from tqdm import tqdm
-from k_pred_core import sim_many
+from data_io import write_table
+from k_pred_core import sample_outs, sim_batch
 from kpred_sim import fetch_k_rate
+from leash import Leash
 
 def main():
     p=argparse.ArgumentParser()
@@ -21,20 +23,20 @@ def main():
     con=duckdb.connect(str(sched_db))
     sched=con.execute('SELECT game_id,away_pid,home_pid,away_lineup,home_lineup FROM main.schedule',).fetchdf()
     con.close()
-    out_rows=[]; total=len(sched)*2; pbar=tqdm(total=total,desc='Sims sides')
+    leash=Leash(); out_rows=[]; total=len(sched)*2; pbar=tqdm(total=total,desc='Sims sides')
     for _,g in sched.iterrows():
         for side in ['away','home']:
             pid=int(g[f'{side}_pid']); lineup=list(map(int,g[f'{side}_lineup'].split(',')))
             rp=fetch_k_rate(pid,d[:4],'pitcher')
             bp=[fetch_k_rate(b,d[:4],'batter') for b in lineup]
             prates=[rp or 0.252]+[b or 0.252 for b in bp]
-            outs=27;  # maybe parameterize
-            res=sim_many(prates,outs,sims)
+            outs=sample_outs(leash.pmf([pid],d[:4]),sims)[0]  # per-trial outs from the leash table
+            res=sim_batch(prates,outs[None,:],sims)[0]
             out_rows.append({'game_id':g['game_id'],'side':side,'mean_k':res.mean(),'p_k':(res>=outs).mean()})
             pbar.update(1)
     pbar.close()
     df=pd.DataFrame(out_rows)
-    df.to_csv(base/'data'/f'sim_results_{d}.csv',index=False)
-    print(f"✅ Simulations saved to sim_results_{d}.csv")
+    out=write_table(df,f'sim_results_{d}',csv=True,data_dir=base/'data')
+    print(f"✅ Simulations saved to {out.name}")
 
 if __name__=='__main__': main()
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+harvest.py
+----------
+Single pass over every regular-season game: each boxscore is fetched
+once and parsed once (box_parse.parse_game) into both
+
+  • player_stats   – pitcher & batter K / opportunity aggregates
+  • historical_ks  – one row per start with k_actual and the lineup
+
+Runs as a producer/consumer pipeline:
+  schedule → N fetch workers (shared token-bucket rate limit, jittered
+  retries) → M parse workers → 1 writer batching rows into DuckDB
+so throughput is bounded by --rate rather than by per-request latency.
+Rows are buffered column-wise and handed to DuckDB as Arrow record
+batches of ~--batch rows, so memory stays flat however many seasons run.
+
+Progress is checkpointed in the staging DB: every flush commits the
+batch rows together with their game_pks (harvest_progress), and each
+date is flushed as soon as all of its games are done. A killed or
+crashed run resumes from the checkpoint on restart; --fresh discards it.
+If a checkpoint itself fails (DuckDB error, full disk) the writer stops
+the workers and the error is raised from the main thread instead of
+leaving them blocked on the queues.
+
+--incremental skips the season crawl: it reads the latest date and the
+known game_pks in historical_ks, fetches the schedule from that date
+through yesterday and upserts the games not harvested yet – the nightly
+in-season refresh. Without a staging DB it is seeded from the exported
+historical_ks.duckdb and player_stats_<season>.parquet files; player
+stats are only re-exported when every staged start has its per-game rows.
+
+Outputs:
+  • data/harvest.duckdb       (staging: player_games, historical_ks,
+                               harvest_progress, harvest_runs)
+  • data/player_stats.duckdb  (stats.pitcher_stats, stats.batter_stats)
+  • data/historical_ks.duckdb (table: historical_ks)
+  • data/player_stats_<season>.parquet, data/historical_ks.parquet
+    (+ matching .csv unless --no-csv)
+
+Usage (from src/):
+  python harvest.py [2024 2025] [--only stats|historical] [--rate 10] [--workers 8]
+  python harvest.py --incremental
+  python harvest.py --export-only        # re-export tables/CSVs from staging
+"""
+import argparse
+import queue
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+
+import duckdb
+import pyarrow as pa
+from tqdm import tqdm
+
+from boxscore_archive import TokenBucket, api_get, fetch_boxscore
+from box_parse import new_skips, parse_game
+from data_io import write_query
+
+# ── CONFIG ───────────────────────────────────────────────────────────────────
+SEASONS = ["2024", "2025"]
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = BASE_DIR / "data"
+DATA_DIR.mkdir(exist_ok=True)
+STAGE_DB = DATA_DIR / "harvest.duckdb"
+STATS_DB = DATA_DIR / "player_stats.duckdb"
+HIST_DB = DATA_DIR / "historical_ks.duckdb"
+
+STAGE_COLUMNS = {
+    "player_games": {
+        "season": "VARCHAR", "game_pk": "BIGINT", "player_id": "BIGINT",
+        "player_role": "VARCHAR", "k_total": "INTEGER", "opportunities": "INTEGER",
+    },
+    "historical_ks": {
+        "game_pk": "BIGINT", "date": "VARCHAR", "season": "VARCHAR", "side": "VARCHAR",
+        "pitcher_id": "BIGINT", "k_actual": "BIGINT", "lineup_ids": "VARCHAR",
+    },
+}
+
+ARROW_TYPES = {"VARCHAR": pa.string(), "BIGINT": pa.int64(), "INTEGER": pa.int32()}
+
+CHECKPOINT_DDL = [
+    "CREATE TABLE IF NOT EXISTS harvest_progress "
+    "(game_pk BIGINT PRIMARY KEY, date VARCHAR, season VARCHAR)",
+    "CREATE TABLE IF NOT EXISTS harvest_runs "
+    "(seasons VARCHAR PRIMARY KEY, started TIMESTAMP, finished TIMESTAMP)",
+]
+
+_DONE = object()
+
+# ── HELPERS ──────────────────────────────────────────────────────────────────
+def season_schedule(year: str, limiter: TokenBucket | None = None):
+    return api_get("schedule", {"sportId": 1, "season": year, "gameTypes": "R"}, limiter)["dates"]
+
+
+def stage_connect(path: Path = STAGE_DB) -> duckdb.DuckDBPyConnection:
+    con = duckdb.connect(str(path))
+    for table, cols in STAGE_COLUMNS.items():
+        ddl = ", ".join(f"{c} {t}" for c, t in cols.items())
+        con.execute(f"CREATE TABLE IF NOT EXISTS {table} ({ddl})")
+    for ddl in CHECKPOINT_DDL:
+        con.execute(ddl)
+    return con
+
+
+def range_schedule(start: str, end: str, limiter: TokenBucket | None = None):
+    return api_get(
+        "schedule",
+        {"sportId": 1, "startDate": start, "endDate": end, "gameTypes": "R"},
+        limiter,
+    )["dates"]
+
+
+def final_games(dates: list[dict], skips: dict, known: set[int] = frozenset()) -> list[tuple]:
+    jobs = []
+    for d in dates:
+        for g in d["games"]:
+            if g["status"]["detailedState"] != "Final":
+                skips["not_final"] += 1
+                continue
+            if g["gamePk"] in known:
+                continue
+            jobs.append((g["gamePk"], d["date"], d["date"][:4]))
+    return jobs
+
+
+def schedule_jobs(seasons: list[str], limiter: TokenBucket, skips: dict) -> list[tuple]:
+    jobs = []
+    for season in seasons:
+        jobs.extend(final_games(season_schedule(season, limiter), skips))
+    return jobs
+
+
+def seed_staging(con: duckdb.DuckDBPyConnection) -> None:
+    """
+    Seed an empty staging DB from the exported artifacts of an earlier
+    harvest: historical_ks from historical_ks.duckdb and player_games from
+    the per-game player_stats_<season>.parquet files.
+    """
+    if not con.execute("SELECT count(*) FROM historical_ks").fetchone()[0] and HIST_DB.exists():
+        con.execute(f"ATTACH '{HIST_DB.as_posix()}' AS hist_db (READ_ONLY)")
+        con.execute("INSERT INTO historical_ks SELECT * FROM hist_db.historical_ks")
+        con.execute("DETACH hist_db")
+    games = sorted(DATA_DIR.glob("player_stats_[0-9][0-9][0-9][0-9].parquet"))
+    if not con.execute("SELECT count(*) FROM player_games").fetchone()[0] and games:
+        cols = ", ".join(STAGE_COLUMNS["player_games"])
+        con.execute(f"INSERT INTO player_games SELECT {cols} FROM read_parquet(?)",
+                    [[g.as_posix() for g in games]])
+
+
+def stats_complete(con: duckdb.DuckDBPyConnection, seasons: list[str]) -> bool:
+    """True when every staged start of `seasons` also has its player_games rows."""
+    missing = con.execute("""
+        SELECT count(DISTINCT h.game_pk) FROM historical_ks h
+         WHERE h.season IN (SELECT unnest(?::VARCHAR[]))
+           AND h.game_pk NOT IN (SELECT game_pk FROM player_games)
+    """, [seasons]).fetchone()[0]
+    return not missing
+
+
+def incremental_jobs(con: duckdb.DuckDBPyConnection, limiter: TokenBucket,
+                     skips: dict) -> list[tuple]:
+    """
+    Jobs for Final games from the latest date in historical_ks through
+    yesterday whose game_pk has not been harvested yet. The last date is
+    scanned again, so games that were not Final (or failed) then are
+    picked up; today's games wait until they are over.
+    """
+    seed_staging(con)
+    last = con.execute("SELECT max(date) FROM historical_ks").fetchone()[0]
+    if last is None:
+        raise SystemExit("❌ historical_ks is empty – run a full harvest before --incremental")
+    known = {pk for (pk,) in con.execute(
+        "SELECT game_pk FROM historical_ks UNION SELECT game_pk FROM player_games "
+        "UNION SELECT game_pk FROM harvest_progress"
+    ).fetchall()}
+
+    end = (date.today() - timedelta(days=1)).isoformat()
+    print(f"📅  Incremental: games from {last} through {end}")
+    if last > end:
+        return []
+    return final_games(range_schedule(last, end, limiter), skips, known)
+
+
+def fetch_worker(jobs: queue.Queue, parsed: queue.Queue, written: queue.Queue,
+                 limiter: TokenBucket, skips: dict, stop: threading.Event) -> None:
+    while (job := jobs.get()) is not _DONE:
+        if stop.is_set():  # the writer failed: drain the queue without fetching
+            continue
+        gid, day, season = job
+        try:
+            box = fetch_boxscore(gid, day, season, limiter=limiter)
+        except Exception:
+            skips["box_err"] += 1
+            written.put((gid, day, season, None))
+            continue
+        parsed.put((gid, day, season, box))
+
+
+def parse_worker(parsed: queue.Queue, written: queue.Queue, skips: dict, stop: threading.Event) -> None:
+    while (item := parsed.get()) is not _DONE:
+        if stop.is_set():
+            continue
+        gid, day, season, box = item
+        try:
+            result = parse_game(box, gid, day, season, skips)
+        except Exception:  # a malformed boxscore must not take the parser down
+            skips["parse_err"] += 1
+            result = ([], [])
+        written.put((gid, day, season, result))
+
+
+class RowBuffer:
+    """
+    Column-wise buffer for one staging table, drained as an Arrow record
+    batch. Whole games are appended, so a batch never splits a game.
+    """
+
+    def __init__(self, table: str):
+        self.table = table
+        self.schema = pa.schema([(c, ARROW_TYPES[t]) for c, t in STAGE_COLUMNS[table].items()])
+        self.columns = {name: [] for name in self.schema.names}
+
+    def __len__(self) -> int:
+        return len(self.columns[self.schema.names[0]])
+
+    def extend(self, rows: list[dict]) -> None:
+        for name, col in self.columns.items():
+            col.extend(r[name] for r in rows)
+
+    def drain(self) -> pa.RecordBatch:
+        batch = pa.RecordBatch.from_pydict(self.columns, schema=self.schema)
+        for col in self.columns.values():
+            col.clear()
+        return batch
+
+
+def flush(con: duckdb.DuckDBPyConnection, buf: RowBuffer) -> None:
+    """Upsert one batch: rows of a re-harvested game replace the old ones."""
+    if not len(buf):
+        return
+    con.register("batch_rb", buf.drain())
+    con.execute(f"DELETE FROM {buf.table} WHERE game_pk IN (SELECT game_pk FROM batch_rb)")
+    con.execute(f"INSERT INTO {buf.table} SELECT * FROM batch_rb")
+    con.unregister("batch_rb")
+
+
+def checkpoint(con: duckdb.DuckDBPyConnection, buf: dict, done: list[tuple]) -> None:
+    """Commit buffered rows and the game_pks they came from atomically."""
+    con.execute("BEGIN TRANSACTION")
+    for rows in buf.values():
+        flush(con, rows)
+    if done:
+        con.executemany("INSERT OR REPLACE INTO harvest_progress VALUES (?, ?, ?)", done)
+        done.clear()
+    con.execute("COMMIT")
+
+
+def writer(written: queue.Queue, con: duckdb.DuckDBPyConnection, jobs_list: list[tuple],
+           batch_size: int, pbar: tqdm, stop: threading.Event, errors: list) -> None:
+    """
+    The only thread touching DuckDB: batches rows and checkpoints them
+    whenever the batch fills up or a date has no games left in flight.
+    Failed fetches are not marked done, so a rerun retries them. If a
+    checkpoint fails, the error goes to `errors`, `stop` is set and the
+    queue is drained until the workers have wound down.
+    """
+    remaining = {}
+    for _, day, _ in jobs_list:
+        remaining[day] = remaining.get(day, 0) + 1
+    buf = {table: RowBuffer(table) for table in STAGE_COLUMNS}
+    done = []
+    item = None
+    try:
+        while (item := written.get()) is not _DONE:
+            gid, day, season, result = item
+            if result is not None:
+                s_rows, h_rows = result
+                buf["player_games"].extend(s_rows)
+                buf["historical_ks"].extend(h_rows)
+                done.append((gid, day, season))
+            pbar.update(1)
+            remaining[day] -= 1
+            if remaining[day] == 0 or max(map(len, buf.values())) >= batch_size:
+                checkpoint(con, buf, done)
+        checkpoint(con, buf, done)
+    except Exception as e:
+        errors.append(e)
+        stop.set()
+        while item is not _DONE:
+            item = written.get()
+
+
+def harvest(con: duckdb.DuckDBPyConnection, jobs_list: list[tuple], limiter: TokenBucket,
+            fetch_workers: int, parse_workers: int, batch_size: int) -> dict:
+    """Run the fetch → parse → write pipeline over `jobs_list`; returns skip counts."""
+    jobs = queue.Queue(maxsize=fetch_workers * 4)
+    parsed = queue.Queue(maxsize=parse_workers * 4)
+    written = queue.Queue(maxsize=parse_workers * 4)
+    fetch_skips = [new_skips() for _ in range(fetch_workers)]
+    parse_skips = [dict(new_skips(), parse_err=0) for _ in range(parse_workers)]
+    stop, errors = threading.Event(), []
+
+    fetchers = [threading.Thread(target=fetch_worker, args=(jobs, parsed, written, limiter, s, stop), daemon=True)
+                for s in fetch_skips]
+    parsers = [threading.Thread(target=parse_worker, args=(parsed, written, s, stop), daemon=True)
+               for s in parse_skips]
+    pbar = tqdm(total=len(jobs_list), desc="Games", unit="game")
+    write_thread = threading.Thread(target=writer, args=(written, con, jobs_list, batch_size, pbar, stop, errors),
+                                    daemon=True)
+    for t in (*fetchers, *parsers, write_thread):
+        t.start()
+
+    for job in jobs_list:
+        if stop.is_set():
+            break
+        jobs.put(job)
+    for _ in fetchers:
+        jobs.put(_DONE)
+    for t in fetchers:
+        t.join()
+    for _ in parsers:
+        parsed.put(_DONE)
+    for t in parsers:
+        t.join()
+    written.put(_DONE)
+    write_thread.join()
+    pbar.close()
+    if errors:
+        raise errors[0]
+
+    skips = dict(new_skips(), parse_err=0)
+    for s in (*fetch_skips, *parse_skips):
+        for k, v in s.items():
+            skips[k] = skips.get(k, 0) + v
+    return skips
+
+
+def save_player_stats(con: duckdb.DuckDBPyConnection, seasons: list[str], csv: bool = True) -> None:
+    """stats.* aggregates over every staged season; per-game files for `seasons`."""
+    for season in seasons:
+        n = con.execute("SELECT count(*) FROM player_games WHERE season = ?", [season]).fetchone()[0]
+        out = write_query(con, f"SELECT * FROM player_games WHERE season = '{season}'",
+                          f"player_stats_{season}", csv, DATA_DIR)
+        print(f"✔️  Wrote {n:,} rows → {out.name}" + (" (+ .csv)" if csv else ""))
+
+    con.execute(f"ATTACH '{STATS_DB.as_posix()}' AS stats_db")
+    con.execute("CREATE SCHEMA IF NOT EXISTS stats_db.stats;")
+    # replace entire tables, aggregated by season/player/role
+    for role in ("pitcher", "batter"):
+        con.execute(f"""
+            CREATE OR REPLACE TABLE stats_db.stats.{role}_stats AS
+            SELECT season, player_id,
+                   SUM(k_total)        AS k_total,
+                   SUM(opportunities)  AS opportunities,
+                   SUM(k_total) / NULLIF(SUM(opportunities),0) AS k_rate
+              FROM player_games
+             WHERE player_role = '{role}'
+             GROUP BY season, player_id
+        """)
+    print("📊 DuckDB tables now:", con.execute(
+        "SELECT table_name FROM information_schema.tables "
+        "WHERE table_catalog = 'stats_db' AND table_schema = 'stats'"
+    ).fetchall())
+    con.execute("DETACH stats_db")
+
+
+def save_historical(con: duckdb.DuckDBPyConnection, csv: bool = True) -> None:
+    con.execute(f"ATTACH '{HIST_DB.as_posix()}' AS hist_db")
+    con.execute("""
+        CREATE OR REPLACE TABLE hist_db.historical_ks AS
+        SELECT * FROM historical_ks ORDER BY date, game_pk, side
+    """)
+    n = con.execute("SELECT count(*) FROM hist_db.historical_ks").fetchone()[0]
+    out = write_query(con, "SELECT * FROM hist_db.historical_ks", "historical_ks", csv, DATA_DIR)
+    con.execute("DETACH hist_db")
+    if n:
+        print(f"✅  Saved {n:,} starts → {HIST_DB.name} & {out.name}" + (" (+ .csv)" if csv else ""))
+    else:
+        print("⚠️  No starts harvested – inspect skip counts above to diagnose.")
+
+def export(con: duckdb.DuckDBPyConnection, seasons: list[str], only: str | None, csv: bool) -> None:
+    if only != "historical":
+        save_player_stats(con, seasons, csv)
+    if only != "stats":
+        save_historical(con, csv)
+
+# ── MAIN ─────────────────────────────────────────────────────────────────────
+def main(argv: list[str] | None = None):
+    p = argparse.ArgumentParser(
+        description="Harvest player_stats and historical_ks in one pass over each season"
+    )
+    p.add_argument("seasons", nargs="*", default=SEASONS, help="Seasons to harvest (default: 2024 2025)")
+    p.add_argument("--incremental", action="store_true",
+                   help="Only fetch games from the latest date in historical_ks through yesterday")
+    p.add_argument("--only", choices=("stats", "historical"),
+                   help="Write just one of the two datasets (the games are still parsed once)")
+    p.add_argument("--rate", type=float, default=10.0, help="Max MLB API requests per second")
+    p.add_argument("--workers", type=int, default=8, help="Concurrent boxscore fetch workers")
+    p.add_argument("--parsers", type=int, default=2, help="Parse workers")
+    p.add_argument("--batch", type=int, default=5000, help="Rows per DuckDB insert")
+    p.add_argument("--no-csv", dest="csv", action="store_false",
+                   help="Skip the CSV copies; DuckDB tables and Parquet only")
+    p.add_argument("--export-only", action="store_true",
+                   help="Skip harvesting; re-export the DuckDB tables and files from staging")
+    p.add_argument("--fresh", action="store_true",
+                   help="Ignore an unfinished run's checkpoint and rebuild the seasons from scratch")
+    args = p.parse_args(argv)
+    if args.rate <= 0:
+        p.error("--rate must be > 0")
+
+    con = stage_connect()
+    if args.export_only:
+        export(con, args.seasons, args.only, args.csv)
+        con.close()
+        return
+
+    limiter = TokenBucket(args.rate)
+    sched_skips = new_skips()
+    if args.incremental:
+        jobs = incremental_jobs(con, limiter, sched_skips)
+        seasons = sorted({season for _, _, season in jobs})
+    else:
+        seasons = args.seasons
+        run_key = ",".join(seasons)
+        run = con.execute("SELECT finished FROM harvest_runs WHERE seasons = ?", [run_key]).fetchone()
+        if run is not None and run[0] is None and not args.fresh:
+            print(f"↩️  Resuming unfinished harvest of {run_key} from checkpoint")
+        else:
+            # full rebuild of the requested seasons
+            for table in (*STAGE_COLUMNS, "harvest_progress"):
+                con.execute(f"DELETE FROM {table} WHERE season IN (SELECT unnest(?::VARCHAR[]))", [seasons])
+            con.execute("INSERT OR REPLACE INTO harvest_runs VALUES (?, now(), NULL)", [run_key])
+        done = {pk for (pk,) in con.execute(
+            "SELECT game_pk FROM harvest_progress WHERE season IN (SELECT unnest(?::VARCHAR[]))", [seasons]
+        ).fetchall()}
+        jobs = [j for j in schedule_jobs(seasons, limiter, sched_skips) if j[0] not in done]
+
+    print(f"⏳  Harvesting {len(jobs):,} games…")
+    skips = harvest(con, jobs, limiter, args.workers, args.parsers, args.batch)
+    skips["not_final"] += sched_skips["not_final"]
+    print("Skip counts:", skips)
+    if not args.incremental:
+        if skips["box_err"]:
+            print(f"⚠️  {skips['box_err']} boxscores failed – rerun to resume and retry them")
+        else:
+            con.execute("UPDATE harvest_runs SET finished = now() WHERE seasons = ?", [run_key])
+    if args.incremental and not jobs:
+        print("✔️  Nothing new to harvest.")
+        con.close()
+        return
+
+    only = args.only
+    if args.incremental and only != "historical" and not stats_complete(con, seasons):
+        print("⚠️  Per-game player stats are missing for earlier games of "
+              f"{', '.join(seasons)} – keeping the existing player stats (run a full harvest to rebuild them)")
+        if only == "stats":
+            con.close()
+            return
+        only = "historical"
+    export(con, seasons, only, args.csv)
+    con.close()
+
+
+if __name__ == "__main__":
+    main()
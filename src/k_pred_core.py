@@ -1,14 +1,22 @@
 import numpy as np
-import math
+
+# identifies the simulator in cached results; bump when its output changes
+ENGINE = "sim_batch/1"
+
+# how PAs pick their K probability:
+#   uniform – any of pitcher + 9 batters at random (sim_game's pool)
+#   order   – batting order, slot = PA number mod 9, from a (sides × 9)
+#             slot table (slot_table, or matchup.matchup_matrix for log5)
+SEQUENCES = ("order", "uniform")
 
 def sim_game(pks: np.ndarray, outs_lambda: float) -> int:
     """
     Simulate one full 'start':
       • pks: array of strikeout probabilities per PA
-      • outs_lambda: target total outs (line * 3)
+      • outs_lambda: target total outs (innings * 3)
     Returns total Ks recorded.
     """
-    outs_target = int(outs_lambda * 3)
+    outs_target = int(outs_lambda)
     outs = ks = 0
     while outs < outs_target:
         i = np.random.randint(len(pks))
@@ -27,3 +35,118 @@ def sim_many(pks: np.ndarray, n: int, outs_lambda: float) -> np.ndarray:
         dtype=int,
         count=n
     )
+
+def engine_tag(sequence: str, matchup: str = "pool") -> str:
+    """ENGINE plus the PA sequencing (and, in batting order, the matchup rule)."""
+    return f"{ENGINE}:{sequence}" + (f"+{matchup}" if sequence == "order" else "")
+
+def slot_table(p_rates: np.ndarray) -> np.ndarray:
+    """
+    (S × 10) [pitcher, batters 1–9] k_rates → (S × 9) K probability of
+    each lineup slot facing the pitcher: the mean of the two rates, i.e.
+    the same pooling sim_game applies, made per matchup.
+    """
+    p_rates = np.atleast_2d(p_rates)
+    return (p_rates[:, :1] + p_rates[:, 1:]) / 2
+
+def pa_table(p_rates: np.ndarray, sequence: str, slots: np.ndarray | None = None) -> np.ndarray:
+    """
+    (S × 10) k_rates → the pks table sim_batch / sim_common expect for
+    `sequence`; in batting order a precomputed (S × 9) `slots` table wins.
+    """
+    if sequence not in SEQUENCES:
+        raise ValueError(f"unknown PA sequence {sequence!r}; expected one of {SEQUENCES}")
+    if sequence == "uniform":
+        return np.atleast_2d(p_rates)
+    return slot_table(p_rates) if slots is None else np.atleast_2d(slots)
+
+def sim_batch(pks: np.ndarray, outs, n: int, rng=None, ordered: bool = False) -> np.ndarray:
+    """
+    Vectorized `sim_game` for many sides at once:
+      • pks: (S × L) strikeout probabilities, one row per side; each PA
+        draws one of the row's L entries uniformly, as sim_game does, or
+        with `ordered` PA t of every trial uses column t mod L (a slot_table)
+      • outs: outs target – scalar, one per side (S,), or one per trial
+        (S × n), e.g. drawn from a leash distribution with sample_outs
+      • n: trials per side
+    Every trial advances one PA per step and finished trials drop out, so
+    the work is one array op per PA instead of one Python loop per PA.
+    Returns (S × n) K counts.
+    """
+    rng = np.random.default_rng(rng)
+    pks = np.atleast_2d(np.asarray(pks, dtype=np.float32))
+    S, L = pks.shape
+    outs = np.asarray(outs)
+    target = np.broadcast_to(outs[:, None] if outs.ndim == 1 else outs, (S, n)).ravel()
+
+    ks = np.zeros(S * n, dtype=np.int32)
+    left = target.astype(np.int32)           # outs still to record, per trial
+    live = np.flatnonzero(left > 0)          # trials still pitching
+    row = live // n
+    pa = 0
+    while live.size:
+        col = pa % L if ordered else rng.integers(L, size=live.size)
+        k = rng.random(live.size, dtype=np.float32) < pks[row, col]
+        ks[live] += k
+        left[live] -= ~k
+        keep = left[live] > 0
+        live, row = live[keep], row[keep]
+        pa += 1
+    return ks.reshape(S, n)
+
+def sample_outs(pmf: np.ndarray, n: int, rng=None) -> np.ndarray:
+    """
+    (S × K) outs distributions (P(outs = 0..K-1) per side) → (S × n) outs
+    targets, by inverse CDF. Row i's CDF is shifted by i so one
+    searchsorted over the flattened table serves every side.
+    """
+    rng = np.random.default_rng(rng)
+    pmf = np.atleast_2d(pmf)
+    S, K = pmf.shape
+    cdf = np.cumsum(pmf, axis=1)
+    cdf /= cdf[:, -1:]
+    shift = np.arange(S)[:, None]
+    u = rng.random((S, n)) + shift
+    idx = np.searchsorted((cdf + shift).ravel(), u.ravel(), side="right").reshape(S, n) - shift * K
+    return np.minimum(idx, K - 1).astype(np.int32)
+
+def sim_common(pks: np.ndarray, outs, n: int, rng=None, ordered: bool = False) -> np.ndarray:
+    """
+    `sim_batch` with common random numbers: all S rows (a baseline and its
+    perturbations) consume the same random stream – trial j of every row
+    sees the same PA draws and K uniforms, step for step. Differences
+    between rows then come only from the perturbation, not from sampling
+    noise, so paired differences need far fewer trials.
+      • pks: (S × L) strikeout probabilities (a slot_table with `ordered`)
+      • outs: outs target – scalar, one per row (S,), or one per trial
+        (S × n), e.g. a shared sample_outs draw shifted per row
+    Returns (S × n) K counts.
+    """
+    rng = np.random.default_rng(rng)
+    pks = np.atleast_2d(np.asarray(pks, dtype=np.float32))
+    S, L = pks.shape
+    outs = np.asarray(outs, dtype=np.int32)
+    left = np.broadcast_to(outs if outs.ndim == 2 else outs.reshape(-1, 1), (S, n)).copy()
+    ks = np.zeros((S, n), dtype=np.int32)
+    alive = left > 0
+    pa = 0
+    while alive.any():
+        p = pks[:, [pa % L]] if ordered else pks[:, rng.integers(L, size=n)]
+        k = rng.random(n, dtype=np.float32) < p  # one draw per trial, shared by rows
+        ks += k & alive
+        left -= ~k & alive
+        alive = left > 0
+        pa += 1
+    return ks
+
+def k_histogram(ks: np.ndarray) -> np.ndarray:
+    """(S × n) K counts → (S × max K + 1) per-side histograms, in one bincount."""
+    S = ks.shape[0]
+    width = int(ks.max()) + 1
+    flat = ks + width * np.arange(S)[:, None]
+    return np.bincount(flat.ravel(), minlength=S * width).reshape(S, width)
+
+def hist_quantiles(hist: np.ndarray, qs) -> np.ndarray:
+    """(S × K) histograms → (S × len(qs)) smallest k with CDF ≥ q."""
+    cdf = np.cumsum(hist, axis=1) / hist.sum(axis=1, keepdims=True)
+    return np.stack([(cdf >= q).argmax(axis=1) for q in qs], axis=1)
@@ -1,11 +1,13 @@
-import duckdb
 from pathlib import Path
 
 def fetch_k_rate(player_id: int, season: str, group: str) -> float | None:
     """
     Look up k_rate for pitcher or batter from per-season DuckDB.
-    Falls back to combined player_stats.duckdb if per-season DB or table is missing.
+    Falls back to the partitioned player_stats Parquet dataset (only the
+    season/role partition is read), then to combined player_stats.duckdb.
     """
+    import duckdb
+
     # Determine per-season DB path
     season_db = Path(__file__).resolve().parent.parent / "data" / f"player_stats_{season}.duckdb"
     combined_db = Path(__file__).resolve().parent.parent / "data" / "player_stats.duckdb"
@@ -39,13 +41,25 @@ def fetch_k_rate(player_id: int, season: str, group: str) -> float | None:
         except duckdb.CatalogException:
             pass
 
+    # Partitioned export from combine_player_stats.py
+    parquet_dir = Path(__file__).resolve().parent.parent / "data" / "player_stats_parquet"
+    if (parquet_dir / f"season={season}" / f"role={group}").exists():
+        res = con.execute(
+            f"SELECT k_rate FROM read_parquet('{parquet_dir.as_posix()}/*/*/*.parquet', hive_partitioning = true) "
+            "WHERE season = ? AND role = ? AND player_id = ? LIMIT 1",
+            [season, group, player_id]
+        ).fetchone()
+        if res:
+            con.close()
+            return res[0]
+
     # As ultimate fallback, if combined has a default table
     if db_path == combined_db:
         # Try generic player_stats table
         try:
             res = con.execute(
-                "SELECT k_rate FROM player_stats WHERE season = ? AND player_id = ? LIMIT 1",
-                [season, player_id]
+                "SELECT k_rate FROM player_stats WHERE season = ? AND player_role = ? AND player_id = ? LIMIT 1",
+                [season, group, player_id]
             ).fetchone()
             if res:
                 return res[0]
@@ -54,3 +68,54 @@ def fetch_k_rate(player_id: int, season: str, group: str) -> float | None:
 
     con.close()
     return None
+
+def load_k_rates(season: str, group: str) -> dict[int, float]:
+    """
+    Bulk version of fetch_k_rate: every k_rate for one season and role
+    (group = 'pitcher' | 'batter'), read with one query per source.
+    Sources are consulted in fetch_k_rate's order; earlier ones win.
+    Each database is opened once for all of its queries.
+    """
+    import duckdb
+
+    data_dir = Path(__file__).resolve().parent.parent / "data"
+    season_db = data_dir / f"player_stats_{season}.duckdb"
+    combined_db = data_dir / "player_stats.duckdb"
+    parquet_dir = data_dir / "player_stats_parquet"
+    tbl = "pitcher_stats" if group == "pitcher" else "batter_stats"
+    totals_group = "pitching" if group == "pitcher" else "hitting"
+
+    # (database, query) in priority order
+    sources = []
+    for db in (season_db, combined_db):
+        if db.exists():
+            sources += [
+                (db, f"SELECT player_id, k_rate FROM stats.{tbl} WHERE season = $season"),
+                (db, f"SELECT player_id, k_rate FROM {tbl} WHERE season = $season"),
+                (db, "SELECT player_id, k_rate FROM player_stats "
+                     "WHERE CAST(season AS VARCHAR) = $season AND player_role = $group"),
+                (db, "SELECT player_id, k_rate FROM player_stats "
+                     "WHERE CAST(season AS VARCHAR) = $season AND \"group\" = $totals_group"),
+            ]
+        if db == season_db and (parquet_dir / f"season={season}" / f"role={group}").exists():
+            sources.append((None,
+                f"SELECT player_id, k_rate FROM read_parquet('{parquet_dir.as_posix()}/*/*/*.parquet', "
+                "hive_partitioning = true) WHERE season = $season AND role = $group"))
+
+    params = {"season": str(season), "group": group, "totals_group": totals_group}
+    rates: dict[int, float] = {}
+    cons = {}
+    try:
+        for db, sql in reversed(sources):
+            if db not in cons:
+                cons[db] = duckdb.connect(db.as_posix(), read_only=True) if db else duckdb.connect()
+            try:
+                used = {k: v for k, v in params.items() if f"${k}" in sql}
+                rows = cons[db].execute(sql, used).fetchall()
+            except (duckdb.CatalogException, duckdb.BinderException):
+                continue
+            rates.update({int(pid): float(k) for pid, k in rows if pid is not None and k is not None})
+    finally:
+        for con in cons.values():
+            con.close()
+    return rates
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+leash.py
+--------
+Empirical "leash" model: how many outs a starter records.
+
+`build` reads the starters' inningsPitched straight from the archived
+boxscores (boxscore_sql's starter rules) and stores one outs histogram per
+pitcher-season in data/leash.parquet:
+  season, pitcher_id, n_starts, counts (starts with 0, 1, ..., MAX_OUTS outs)
+
+Leash turns that table into (sides × MAX_OUTS+1) outs distributions: a
+pitcher's own histogram shrunk toward the season's league histogram with
+a prior worth `prior` starts. The simulator samples one outs target per
+trial from these rows (k_pred_core.sample_outs), so every trial gets its
+own, realistic outing length. Without a table every side falls back to a
+fixed DEFAULT_OUTS.
+
+Usage (from src/):
+  python leash.py build [2024 2025]
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from data_io import DATA_DIR, read_table, write_table
+
+LEASH_NAME = "leash"
+MAX_OUTS = 30           # longer outings are folded into the last bin
+DEFAULT_OUTS = 18       # six innings, when no leash table is available
+PRIOR_STARTS = 15.0     # league histogram's weight, in starts, when shrinking a pitcher's
+
+OUTS_SQL = """
+SELECT season, player_id AS pitcher_id, least(outs, ?) AS outs, count(*) AS n
+  FROM starter
+ WHERE outs IS NOT NULL
+ GROUP BY ALL
+"""
+
+
+def build(seasons: list[str]):
+    """Per pitcher-season outs histograms from the boxscore archive."""
+    import duckdb
+    import pandas as pd
+
+    from boxscore_sql import extract
+
+    con = duckdb.connect()
+    try:
+        extract(con, seasons)
+        rows = con.execute(OUTS_SQL, [MAX_OUTS]).fetchdf()
+    finally:
+        con.close()
+    keys = rows[["season", "pitcher_id"]].drop_duplicates().sort_values(["season", "pitcher_id"])
+    counts = np.zeros((len(keys), MAX_OUTS + 1), dtype=np.int64)
+    row_of = {k: i for i, k in enumerate(keys.itertuples(index=False, name=None))}
+    idx = [row_of[k] for k in zip(rows["season"], rows["pitcher_id"])]
+    np.add.at(counts, (idx, rows["outs"].to_numpy()), rows["n"].to_numpy())
+    return pd.DataFrame({
+        "season": keys["season"].astype(str).to_numpy(),
+        "pitcher_id": keys["pitcher_id"].to_numpy(),
+        "n_starts": counts.sum(axis=1),
+        "counts": list(counts),
+    })
+
+
+class Leash:
+    """
+    Outs distributions per pitcher, read once from data/leash.parquet.
+    A season missing from the table borrows the latest earlier season.
+    """
+
+    def __init__(self, path: Path | str = LEASH_NAME, prior: float = PRIOR_STARTS):
+        self.path = path
+        self.prior = prior
+        self._seasons: dict[str, tuple[np.ndarray, dict[int, np.ndarray]]] | None = None
+
+    def _load(self) -> dict:
+        if self._seasons is None:
+            try:
+                df = read_table(self.path)
+            except FileNotFoundError:
+                df = None
+            seasons = {}
+            if df is not None:
+                for season, g in df.groupby(df["season"].astype(str)):
+                    counts = np.vstack(g["counts"].to_numpy()).astype(float)
+                    league = counts.sum(axis=0) / counts.sum()
+                    seasons[season] = (league, dict(zip(g["pitcher_id"].astype(int), counts)))
+            self._seasons = seasons
+        return self._seasons
+
+    @property
+    def available(self) -> bool:
+        return bool(self._load())
+
+    def _season(self, season: str):
+        seasons = self._load()
+        earlier = sorted(s for s in seasons if s <= str(season))
+        return seasons[earlier[-1] if earlier else min(seasons)]
+
+    def pmf(self, pids, season: str) -> np.ndarray:
+        """(len(pids) × MAX_OUTS+1) outs distributions, shrunk toward the league."""
+        pids = list(pids)
+        if not self.available:
+            out = np.zeros((len(pids), MAX_OUTS + 1))
+            out[:, DEFAULT_OUTS] = 1.0
+            return out
+        league, by_pid = self._season(season)
+        zero = np.zeros_like(league)
+        counts = np.vstack([by_pid.get(int(pid), zero) for pid in pids]) if pids else np.zeros((0, len(league)))
+        return (counts + self.prior * league) / (counts.sum(axis=1, keepdims=True) + self.prior)
+
+    def clear(self) -> None:
+        self._seasons = None
+
+
+def main():
+    p = argparse.ArgumentParser(description="Build the starters' outs-recorded (leash) tables 🪢")
+    p.add_argument("command", choices=["build"])
+    p.add_argument("seasons", nargs="*", help="Seasons to include; defaults to every archived season")
+    args = p.parse_args()
+
+    df = build(args.seasons)
+    out = write_table(df, LEASH_NAME, data_dir=DATA_DIR)
+    league = np.vstack(df["counts"].to_numpy()).sum(axis=0)
+    mean = (league * np.arange(len(league))).sum() / league.sum()
+    print(f"✅ {int(league.sum()):,} starts by {len(df):,} pitcher-seasons → {out} "
+          f"(league mean {mean / 3:.2f} IP)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+lineup_watch.py
+---------------
+Watch a date's schedule for posted lineups and late pitcher changes.
+
+Every --interval seconds the hydrated schedule endpoint
+(hydrate=probablePitcher,lineups) is polled with If-None-Match /
+If-Modified-Since, so an unchanged slate costs one 304 and no parsing.
+Probable pitchers and batting orders are diffed against main.schedule in
+data/schedule.duckdb; changes are written back and emitted as JSON lines
+(stdout or --out). Affected slates are then re-projected through
+today_proj with the side cache, so only the changed sides are simulated.
+
+A failed poll (network, a DuckDB file locked by schedule_fetch.py or
+today_proj.py, a projection error) is logged and retried on the next
+interval: the schedule is then fetched in full rather than revalidated,
+and a re-projection that did not finish is run again.
+
+Usage (from src/):
+  python lineup_watch.py [--date 2025-07-11] [--interval 120] [--out ../data/lineup_changes.jsonl] [--once]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DB_PATH = DATA_DIR / "schedule.duckdb"  # written by schedule_fetch.py
+SCHEDULE_URL = "https://statsapi.mlb.com/api/v1/schedule"
+COLUMNS = ["game_id", "official_date", "away_pid", "home_pid", "away_lineup", "home_lineup"]
+WATCH_STATES = ("Preview", "Live")  # abstractGameState values still worth watching
+
+
+class ConditionalFetcher:
+    """GET JSON with ETag / Last-Modified revalidation; returns None on 304."""
+
+    def __init__(self, timeout: float = 10.0):
+        self.timeout = timeout
+        self.validators: dict[str, dict[str, str]] = {}
+        self.requests = self.not_modified = 0
+
+    def get(self, url: str) -> dict | None:
+        req = urllib.request.Request(url, headers={"Accept": "application/json", **self.validators.get(url, {})})
+        self.requests += 1
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                body = json.load(resp)
+                headers = resp.headers
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                self.not_modified += 1
+                return None
+            raise
+        v = {}
+        if headers.get("ETag"):
+            v["If-None-Match"] = headers["ETag"]
+        if headers.get("Last-Modified"):
+            v["If-Modified-Since"] = headers["Last-Modified"]
+        self.validators[url] = v
+        return body
+
+    def forget(self, url: str) -> None:
+        """Drop `url`'s validators, so the next get() fetches it in full."""
+        self.validators.pop(url, None)
+
+
+def schedule_url(d: str) -> str:
+    return SCHEDULE_URL + "?" + urllib.parse.urlencode(
+        {"sportId": 1, "date": d, "hydrate": "probablePitcher,lineups"})
+
+
+def parse_schedule(resp: dict, d: str) -> pd.DataFrame:
+    """Hydrated schedule → rows shaped like main.schedule (missing info left empty)."""
+    import pandas as pd
+    rows = []
+    for day in resp.get("dates", []):
+        for g in day.get("games", []):
+            if g.get("status", {}).get("abstractGameState") not in WATCH_STATES:
+                continue
+            rec = {"game_id": g["gamePk"], "official_date": d}
+            lineups = g.get("lineups") or {}
+            for side in ("away", "home"):
+                pp = g["teams"][side].get("probablePitcher") or {}
+                rec[f"{side}_pid"] = pp.get("id")
+                players = lineups.get(f"{side}Players") or []
+                rec[f"{side}_lineup"] = ",".join(str(p["id"]) for p in players[:9])
+            rows.append(rec)
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def load_current(db_path: Path, d: str) -> pd.DataFrame:
+    import duckdb
+    import pandas as pd
+    con = duckdb.connect(db_path.as_posix())
+    try:
+        return con.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM main.schedule WHERE official_date = ?", [d]
+        ).fetchdf()
+    except duckdb.CatalogException:
+        return pd.DataFrame(columns=COLUMNS)
+    finally:
+        con.close()
+
+
+def _norm(v):
+    if v is None or v == "" or (isinstance(v, float) and v != v):  # NaN
+        return None
+    return v if isinstance(v, str) else int(v)
+
+
+def diff(old: pd.DataFrame, new: pd.DataFrame) -> tuple[list[dict], pd.DataFrame]:
+    """
+    Compare polled rows with stored ones. Empty polled values (lineup not
+    posted yet, no probable) never overwrite stored ones.
+    Returns (changes, merged rows for the date).
+    """
+    import pandas as pd
+    old_by = {int(r["game_id"]): r for r in old.to_dict("records")}
+    changes, merged = [], []
+    for rec in new.to_dict("records"):
+        gid = int(rec["game_id"])
+        prev = old_by.pop(gid, None)
+        row = dict(prev) if prev else {c: None for c in COLUMNS} | {"game_id": gid, "official_date": rec["official_date"]}
+        for side in ("away", "home"):
+            for field, col in (("pitcher", f"{side}_pid"), ("lineup", f"{side}_lineup")):
+                before, after = _norm(row.get(col)), _norm(rec[col])
+                if after is None or after == before:
+                    continue
+                changes.append({"game_id": gid, "side": side, "field": field, "old": before, "new": after})
+                row[col] = after
+        merged.append(row)
+    merged += list(old_by.values())  # games no longer watched (final, postponed) stay as stored
+    return changes, pd.DataFrame(merged, columns=COLUMNS)
+
+
+def store(db_path: Path, d: str, rows: pd.DataFrame) -> None:
+    import duckdb
+    con = duckdb.connect(db_path.as_posix())
+    try:
+        con.register("rows_df", rows)
+        con.execute("CREATE TABLE IF NOT EXISTS main.schedule AS SELECT * FROM rows_df LIMIT 0")
+        con.execute("BEGIN")
+        con.execute("DELETE FROM main.schedule WHERE official_date = ?", [d])
+        con.execute(f"INSERT INTO main.schedule ({', '.join(COLUMNS)}) SELECT {', '.join(COLUMNS)} FROM rows_df")
+        con.execute("COMMIT")
+    finally:
+        con.close()
+
+
+class Projector:
+    """
+    Re-projects a date through today_proj, keeping rates and matchup tables
+    warm. The side cache is opened per run only, so today_proj.py and
+    side_cache.py can use the DuckDB file while the watcher waits.
+    """
+
+    def __init__(self, line: float, lines, n_sims: int, calibration: str = "batch"):
+        import today_proj
+        from calibration import artifact_path
+        from leash import Leash
+        from matchup import MatchupIndex
+        self.tp = today_proj
+        self.cal = today_proj.load_calibration(artifact_path(calibration))
+        self.rates = today_proj.RateIndex()
+        self.leash = Leash()
+        self.matchups = MatchupIndex()
+        self.line, self.lines, self.n_sims = line, today_proj.priced_lines(line, lines), n_sims
+
+    def run(self, d: str, db_path: Path) -> list[tuple]:
+        sched = self.tp.fetch_schedule_from_db(db_path, d).dropna(
+            subset=["away_pid", "home_pid", "away_lineup", "home_lineup"])
+        sched = sched[(sched["away_lineup"] != "") & (sched["home_lineup"] != "")]
+        if sched.empty:
+            return []
+        from side_cache import SideCache
+        cache = SideCache()
+        try:
+            out, recomputed = self.tp.project_slate(sched, d, self.lines, self.line, self.n_sims,
+                                                    self.cal, self.rates, cache, progress=False,
+                                                    leash=self.leash, matchups=self.matchups)
+        finally:
+            cache.close()
+        self.tp.write_table(out, f"today_ks_proj_{d}", csv=True, data_dir=self.tp.DATA_DIR)
+        return recomputed
+
+
+def main():
+    p = argparse.ArgumentParser(description="Watch lineups / probables and push changes as JSON lines 👀")
+    p.add_argument("--date", help="YYYY-MM-DD; defaults to today")
+    p.add_argument("--interval", type=float, default=120.0, help="Seconds between polls")
+    p.add_argument("--out", type=Path, help="Append JSON lines here instead of stdout")
+    p.add_argument("--once", action="store_true", help="Poll a single time and exit")
+    p.add_argument("--no-project", action="store_true", help="Only record and emit changes")
+    p.add_argument("--line", type=float, default=6.5)
+    p.add_argument("--lines", type=float, nargs="*", default=[])
+    p.add_argument("--sims", type=int, default=10000)
+    p.add_argument("--calibration", choices=["batch", "online"], default="batch",
+                   help="calibrate.py (batch) or online_calibrate.py (online) artifact")
+    args = p.parse_args()
+
+    d = args.date or date.today().isoformat()
+    sink = args.out.open("a") if args.out else sys.stdout
+    fetcher = ConditionalFetcher()
+    projector = None if args.no_project else Projector(args.line, args.lines, args.sims, args.calibration)
+
+    def emit(event: dict) -> None:
+        sink.write(json.dumps({"ts": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                               "date": d, **event}) + "\n")
+        sink.flush()
+
+    print(f"👀 Watching {d} every {args.interval:g}s", file=sys.stderr)
+    url = schedule_url(d)
+    pending = False  # changes stored but not re-projected yet
+    try:
+        while True:
+            try:
+                resp = fetcher.get(url)
+                if resp is not None:
+                    changes, merged = diff(load_current(DB_PATH, d), parse_schedule(resp, d))
+                    if changes:
+                        store(DB_PATH, d, merged)
+                        for c in changes:
+                            emit({"event": "change", **c})
+                        pending = projector is not None
+                if pending:
+                    recomputed = projector.run(d, DB_PATH)
+                    pending = False
+                    emit({"event": "projected",
+                          "recomputed": [{"game_id": int(g), "side": s} for g, s in recomputed]})
+            except (urllib.error.URLError, TimeoutError) as e:
+                print(f"⚠️  Poll failed: {e}", file=sys.stderr)
+            except Exception as e:  # e.g. DuckDB file locked by another job, projection error
+                fetcher.forget(url)  # a 304 next time would hide the unstored changes
+                print(f"⚠️  Poll failed ({type(e).__name__}: {e}) – retrying in {args.interval:g}s",
+                      file=sys.stderr)
+            if args.once:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"🏁 {fetcher.requests} polls, {fetcher.not_modified} not modified", file=sys.stderr)
+        if args.out:
+            sink.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+matchup.py
+----------
+Pitcher × batter K probabilities for the batting-order simulator.
+
+For every side on a slate, the (sides × 9) slot table is one broadcasted
+log5 / odds-ratio step against the league K rate:
+
+    odds(K) = odds(pitcher) · odds(batter) / odds(league)
+
+so a strikeout pitcher facing a strikeout-prone bat gets more than
+either rate alone, and a league-average player leaves the other's rate
+unchanged. With handedness, the pitcher's rate against each batter's
+stand, the batter's rate against the pitcher's throws and the league
+rate of that (throws, stands) pairing replace the overall rates, element
+by element, in the same step.
+
+MatchupIndex keeps finished rows by side fingerprint, so a long-running
+process (proj_service, lineup_watch) computes each side's table once;
+given max_rows it is an LRU, and proj_service sizes it like its side cache.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from k_pred_core import slot_table
+
+LEAGUE_K = 0.252   # league K rate; also the DEFAULT given to unknown players
+MATCHUPS = ("log5", "pool")   # pool: mean of the two rates (k_pred_core.slot_table)
+EPS = 1e-6
+
+
+def _odds(p):
+    p = np.clip(p, EPS, 1 - EPS)
+    return p / (1 - p)
+
+
+def log5(pitcher, batter, league=LEAGUE_K) -> np.ndarray:
+    """Odds-ratio combination of broadcastable pitcher / batter / league K rates."""
+    o = _odds(pitcher) * _odds(batter) / _odds(league)
+    return o / (1 + o)
+
+
+def slot_rates(p_rates: np.ndarray, matchup: str = "log5", **splits) -> np.ndarray:
+    """(S × 10) k_rates → (S × 9) slot table under `matchup` (log5, or pooled as in sim_game)."""
+    if matchup not in MATCHUPS:
+        raise ValueError(f"unknown matchup {matchup!r}; expected one of {MATCHUPS}")
+    if matchup == "pool":
+        return slot_table(p_rates)
+    return matchup_matrix(p_rates, **splits)
+
+
+def matchup_matrix(p_rates: np.ndarray, league=LEAGUE_K, pitcher_vs: np.ndarray | None = None,
+                   batter_vs: np.ndarray | None = None) -> np.ndarray:
+    """
+    (S × 10) [pitcher, batters 1–9] k_rates → (S × 9) log5 K probability per
+    lineup slot. Handed splits, when given, override the overall rates:
+      • pitcher_vs: (S × 9) the pitcher's rate vs each batter's stand
+      • batter_vs:  (S × 9) each batter's rate vs the pitcher's throws
+      • league:     scalar, or (S × 9) league rate per (throws, stands)
+    """
+    p_rates = np.atleast_2d(p_rates)
+    pitcher = p_rates[:, :1] if pitcher_vs is None else pitcher_vs
+    batter = p_rates[:, 1:] if batter_vs is None else batter_vs
+    return log5(pitcher, batter, league)
+
+
+class MatchupIndex:
+    """Slot tables by side fingerprint; misses are computed in one slot_rates call."""
+
+    def __init__(self, max_rows: int | None = None):
+        self.max_rows = max_rows  # None: unbounded
+        self._rows: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def table(self, fps: list[str], p_rates: np.ndarray, matchup: str = "log5", **splits) -> np.ndarray:
+        """Rows for side fingerprints `fps` (which must cover the matchup rule and splits)."""
+        with self._lock:
+            found = {fp: self._rows[fp] for fp in fps if fp in self._rows}
+            for fp in found:
+                self._rows.move_to_end(fp)
+        miss = [i for i, fp in enumerate(fps) if fp not in found]
+        if miss:
+            sub = {k: np.asarray(v)[miss] if np.ndim(v) == 2 else v for k, v in splits.items()}
+            new = dict(zip((fps[i] for i in miss), slot_rates(np.atleast_2d(p_rates)[miss], matchup, **sub)))
+            found.update(new)
+            with self._lock:
+                self._rows.update(new)
+                while self.max_rows is not None and len(self._rows) > self.max_rows:
+                    self._rows.popitem(last=False)
+        return np.vstack([found[fp] for fp in fps])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows.clear()
@@ -2,88 +2,232 @@
 """
 online_calibrate.py
 -------------------
-Merge cached predictions with actual results and retrain calibrators.
+Fold newly settled predictions into the calibrators without refitting
+on all history.
+
+The calibrators are kept as mergeable sufficient statistics:
+  • linear exp_raw → k_actual: running n, Σx, Σy, Σx², Σxy
+    (closed-form least squares)
+  • P(K ≥ line), for every line the store has priced: per-bin counts of
+    p_raw / hits over fixed bins on [0, 1], isotonic-fitted (weighted PAV)
+    over the bins into that line's map. Rows cached before per-line
+    probabilities were stored count toward --line through their p_raw.
+Each run consumes only the prediction/truth pairs the store has not yet
+marked as trained, so an update costs O(new rows). --rebuild starts the
+state over from every settled pair; so does any run that finds trained
+rows the store has flagged superseded (re-cached with different values),
+since their old values cannot be taken back out of the sums.
+
+The state file (written via a temp file and rename) also records the
+keys of the batch it last folded in; the store marks those rows only
+afterwards, so a run that died in between finishes the marking on the
+next start instead of counting the batch twice.
 
 Inputs:
-  • data/cached_predictions.csv  (from cache_predictions.py)
-  • data/historical_ks.csv       (ground truth: k_actual per start)
+  • data/predictions.duckdb      (prediction_store.py, via cache_predictions.py)
+  • data/historical_ks.parquet   (ground truth: k_actual per start; .csv fallback)
 Outputs:
-  • models/mlb_exp_lin.pkl
-  • models/mlb_p_over_iso.pkl
-  • plots/cal_exp_ks_online.png
+  • models/online_cal_state.json (sufficient statistics)
+  • models/calibration_online.json (linear + isotonic maps, see calibration.py;
+                                  calibrate.py's batch fit stays in calibration.json)
+  • plots/cal_exp_ks_online.png  (cal_report.py, in the background unless --no-plots)
   • plots/cal_p_over_online.png
 """
 import argparse
-import pickle
+import json
+import os
 from pathlib import Path
 
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.linear_model import LinearRegression
-from sklearn.isotonic import IsotonicRegression
-from sklearn.calibration import calibration_curve
+
+import cal_report
+import prediction_store
+from calibration import MODEL_DIR, ONLINE_ARTIFACT_NAME, Calibration, save
+
+STATE_NAME = "online_cal_state.json"
+STATE_VERSION = 2
+BATCH_KEYS = ["date", "game_pk", "side", "model_version"]
+
+
+def line_key(line: float) -> str:
+    return f"{line:g}"
+
+
+def empty_bins(n_bins: int) -> dict:
+    return {"count": [0] * n_bins, "hits": [0] * n_bins, "psum": [0.0] * n_bins}
+
+
+def empty_state(line: float, n_bins: int = 100) -> dict:
+    return {
+        "version": STATE_VERSION,
+        "line": line,  # main line: p_raw of rows without per-line probabilities
+        "linear": {"n": 0, "sx": 0.0, "sy": 0.0, "sxx": 0.0, "sxy": 0.0},
+        "prob": {"n_bins": n_bins, "lines": {}},  # line_key → bins
+        "last_batch": [],  # BATCH_KEYS rows folded in by the latest update
+    }
+
+
+def load_state(path: Path, line: float) -> dict:
+    if not path.exists():
+        return empty_state(line)
+    with path.open() as f:
+        state = json.load(f)
+    if state["line"] != line:
+        raise SystemExit(f"❌ State was built for line {state['line']}, not {line} – rerun with --rebuild")
+    if state["version"] == 1:  # one set of bins, for the main line
+        prob = state["prob"]
+        state["prob"] = {"n_bins": prob["n_bins"],
+                         "lines": {line_key(line): {k: prob[k] for k in ("count", "hits", "psum")}}}
+        state["version"] = STATE_VERSION
+    return state
+
+
+def save_state(state: dict, path: Path) -> None:
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def finish_marking(con, state: dict) -> int:
+    """Mark the state's last batch as trained in the store (idempotent); returns its size."""
+    import pandas as pd
+    batch = pd.DataFrame(state.get("last_batch", []), columns=BATCH_KEYS)
+    prediction_store.mark_trained(con, batch)
+    return len(batch)
+
+
+def line_probs(df, main_line: float) -> dict[float, tuple[np.ndarray, np.ndarray]]:
+    """Settled pairs → {line: (p_raw, k_actual)}, from p_raw_lines where stored, else p_raw at `main_line`."""
+    packed = df["p_raw_lines"].notna()
+    long = [(main_line, p, k) for p, k in zip(df.loc[~packed, "p_raw"], df.loc[~packed, "k_actual"])]
+    for lines, probs, k in zip(df.loc[packed, "lines"], df.loc[packed, "p_raw_lines"], df.loc[packed, "k_actual"]):
+        long.extend((line, p, k) for line, p in zip(lines, probs))
+    if not long:
+        return {}
+    line, p, k = (np.asarray(a, dtype=float) for a in zip(*long))
+    keep = ~np.isnan(p)
+    return {float(ln): (p[keep & (line == ln)], k[keep & (line == ln)]) for ln in np.unique(line[keep])}
+
+
+def update_state(state: dict, exp_raw: np.ndarray, k_actual: np.ndarray,
+                 probs: dict[float, tuple[np.ndarray, np.ndarray]]) -> None:
+    """Add a batch of settled starts to the sufficient statistics (probs: line → (p_raw, k_actual))."""
+    lin = state["linear"]
+    lin["n"] += int(len(exp_raw))
+    lin["sx"] += float(exp_raw.sum())
+    lin["sy"] += float(k_actual.sum())
+    lin["sxx"] += float((exp_raw * exp_raw).sum())
+    lin["sxy"] += float((exp_raw * k_actual).sum())
+
+    prob = state["prob"]
+    n_bins = prob["n_bins"]
+    for line, (p_raw, k) in probs.items():
+        bins = prob["lines"].setdefault(line_key(line), empty_bins(n_bins))
+        idx = np.clip((p_raw * n_bins).astype(int), 0, n_bins - 1)
+        hits = (k >= line).astype(int)
+        for key, add in (("count", np.bincount(idx, minlength=n_bins)),
+                         ("hits", np.bincount(idx, weights=hits, minlength=n_bins)),
+                         ("psum", np.bincount(idx, weights=p_raw, minlength=n_bins))):
+            bins[key] = (np.asarray(bins[key]) + add).tolist()
+
+
+def linear_fit(state: dict) -> tuple[float, float]:
+    """Closed-form least squares from the running sums → (slope, intercept)."""
+    lin = state["linear"]
+    n, sx, sy, sxx, sxy = lin["n"], lin["sx"], lin["sy"], lin["sxx"], lin["sxy"]
+    denom = n * sxx - sx * sx
+    slope = (n * sxy - sx * sy) / denom if denom else 0.0
+    intercept = (sy - slope * sx) / n if n else 0.0
+    return slope, intercept
+
+
+def binned_isotonic(state: dict, line: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Weighted pool-adjacent-violators over the occupied bins of `line`.
+    Returns breakpoints (mean p_raw per bin, calibrated frequency).
+    """
+    prob = state["prob"]["lines"][line_key(line)]
+    count = np.asarray(prob["count"], dtype=float)
+    keep = count > 0
+    x = np.asarray(prob["psum"])[keep] / count[keep]
+    rate = np.asarray(prob["hits"])[keep] / count[keep]
+    w = count[keep]
+
+    blocks = []  # [value, weight, n_bins]
+    for r, wi in zip(rate, w):
+        blocks.append([r, wi, 1])
+        while len(blocks) > 1 and blocks[-2][0] > blocks[-1][0]:
+            v2, w2, n2 = blocks.pop()
+            v1, w1, n1 = blocks.pop()
+            blocks.append([(v1 * w1 + v2 * w2) / (w1 + w2), w1 + w2, n1 + n2])
+    y = np.repeat([b[0] for b in blocks], [b[2] for b in blocks])
+    return x, y
+
 
 def main():
     p = argparse.ArgumentParser()
-    p.add_argument("--pred",     default=Path("data/cached_predictions.csv"))
-    p.add_argument("--truth",    default=Path("data/historical_ks.csv"))
+    p.add_argument("--store",    type=Path, default=prediction_store.STORE_DB)
+    p.add_argument("--truth",    type=Path, default=Path("data/historical_ks.parquet"))
     p.add_argument("--line",     type=float, default=6.5)
-    p.add_argument("--models",   default=Path("models"))
-    p.add_argument("--plots",    default=Path("plots"))
+    p.add_argument("--models",   type=Path, default=MODEL_DIR)
+    p.add_argument("--plots",    type=Path, default=Path("plots"))
+    p.add_argument("--rebuild",  action="store_true",
+                   help="Discard the saved state and refit from every settled pair")
+    p.add_argument("--no-plots", action="store_true",
+                   help="Skip the background calibration plots")
     args = p.parse_args()
 
-    # load
-    pred  = pd.read_csv(args.pred)
-    truth = pd.read_csv(args.truth)
-
-    # unify column names: historical_ks.csv has game_pk, predictions use game_id
-    pred = pred.rename(columns={"game_id":"game_pk"})
-    # merge on game_pk + side + pitcher_id
-    df = pred.merge(
-        truth[["game_pk","side","pitcher_id","k_actual"]],
-        on=["game_pk","side","pitcher_id"],
-        how="inner"
-    ).dropna(subset=["exp_raw","k_actual","p_raw"])
-
     # make sure output dirs exist
     args.models.mkdir(exist_ok=True, parents=True)
-    args.plots.mkdir(exist_ok=True, parents=True)
+    state_path = args.models / STATE_NAME
+
+    con = prediction_store.connect(args.store)
+    if not args.rebuild and (changed := prediction_store.superseded(con)):
+        print(f"⚠️  {changed} trained predictions were re-cached with new values – rebuilding")
+        args.rebuild = True
+    state = empty_state(args.line) if args.rebuild else load_state(state_path, args.line)
+
+    # newly settled prediction/truth pairs joined on game_pk + side + pitcher_id
+    if not args.rebuild:
+        finish_marking(con, state)
+    df = prediction_store.settled_pairs(con, args.truth, only_new=not args.rebuild)
+    df = df.dropna(subset=["exp_raw","k_actual"])
+    if df.empty:
+        con.close()
+        print("✔️  No newly settled predictions – calibrators unchanged")
+        return
+
+    update_state(state, df["exp_raw"].to_numpy(float), df["k_actual"].to_numpy(float),
+                 line_probs(df, args.line))
+    state["last_batch"] = df[BATCH_KEYS].astype({"game_pk": int}).values.tolist()
 
     # 1) linear calibration exp_raw → k_actual
-    X = df[["exp_raw"]].values
-    y = df["k_actual"].values
-    lin = LinearRegression().fit(X, y)
-
-    xs = np.linspace(df.exp_raw.min(), df.exp_raw.max(), 100)
-    plt.scatter(df.exp_raw, df.k_actual, s=8, alpha=0.3)
-    plt.plot(xs, lin.predict(xs.reshape(-1,1)), c="C1")
-    plt.xlabel("simulated exp_raw")
-    plt.ylabel("actual k_actual")
-    plt.title("Online MLB Ks Calibration (exp)")
-    plt.savefig(args.plots / "cal_exp_ks_online.png")
-    plt.clf()
-
-    # 2) isotonic for P(K ≥ line)
-    y_bin = (df.k_actual >= args.line).astype(int)
-    iso   = IsotonicRegression(out_of_bounds="clip").fit(df["p_raw"], y_bin)
-
-    prob_true, prob_pred = calibration_curve(y_bin, df["p_raw"], n_bins=10)
-    plt.plot(prob_pred, prob_true, marker="o")
-    plt.plot([0,1],[0,1],"--", c="gray")
-    plt.xlabel(f"simulated P(K≥{args.line})")
-    plt.ylabel("observed freq")
-    plt.title("Online MLB Ks Calibration (prob)")
-    plt.savefig(args.plots / "cal_p_over_online.png")
-    plt.clf()
-
-    # save pickles
-    with open(args.models / "mlb_exp_lin.pkl", "wb") as f:
-        pickle.dump(lin, f)
-    with open(args.models / "mlb_p_over_iso.pkl", "wb") as f:
-        pickle.dump(iso, f)
-
-    print("✅ Re‐trained calibrators →", args.models)
+    slope, intercept = linear_fit(state)
+
+    # 2) isotonic for P(K ≥ line), over each line's binned state
+    isotonic = {float(key): binned_isotonic(state, float(key)) for key in state["prob"]["lines"]}
+
+    # artifact, then the state it was fitted from, then the store: a crash
+    # before the state is saved refolds the batch, one after it only leaves
+    # the marking to finish_marking on the next run
+    cal = Calibration(slope, intercept, isotonic,
+                      meta={"source": "online_calibrate", "n": state["linear"]["n"]})
+    save(cal, args.models / ONLINE_ARTIFACT_NAME)
+    save_state(state, state_path)
+
+    finish_marking(con, state)
+    if args.rebuild:
+        prediction_store.clear_superseded(con)
+    con.close()
+    print(f"✅ Folded {len(df)} new starts (n={state['linear']['n']}) into calibrators →", args.models)
+
+    # plots off the critical path, once the store is released
+    if not args.no_plots:
+        log = args.plots / "cal_report.log"
+        cal_report.launch(["online", "--state", state_path, "--calibration", args.models / ONLINE_ARTIFACT_NAME,
+                           "--store", args.store, "--truth", args.truth, "--out", args.plots], log)
+        print(f"🖼️  Rendering plots in the background (log → {log})")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+platoon.py
+----------
+Platoon-split K rates: every pitcher's K rate vs left- and right-handed
+batters and every batter's vs left- and right-handed pitchers, per season.
+
+`build` pulls the vl / vr statSplits and the players' batSide / pitchHand
+from the people endpoint, 50 players per request behind the shared token
+bucket, for every player in stats.pitcher_stats / batter_stats. Each split
+is shrunk toward the player's overall rate times the league platoon
+factor for his hand vs that hand, with a prior worth PRIOR_OPPS
+opportunities. Tables written to data/player_stats.duckdb:
+  • stats.hands            player_id, bats, throws
+  • stats.platoon_splits   season, player_id, role, hand, vs_hand,
+                           k_total, opportunities, k_rate (shrunk)
+  • stats.platoon_league   season, throws, stands, k_rate
+
+PlatoonIndex reads them back in bulk: one query returns the (n × 2)
+[vs L, vs R] array for every batter (or pitcher) on a slate, and
+matchup_splits turns those into the handed inputs of
+matchup.matchup_matrix.
+
+Usage (from src/):
+  python platoon.py build [2024 2025] [--rate 10] [--workers 4]
+"""
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from kpred_sim import load_k_rates
+from matchup import LEAGUE_K
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = BASE_DIR / "data"
+STATS_DB = DATA_DIR / "player_stats.duckdb"
+SEASONS = ["2024", "2025"]
+
+HANDS = ("L", "R")
+PRIOR_OPPS = {"pitcher": 150.0, "batter": 100.0}   # shrinkage weight, in PAs / batters faced
+PEOPLE_PER_REQUEST = 50
+GROUP = {"pitcher": "pitching", "batter": "hitting"}
+OPPS_STAT = {"pitcher": "battersFaced", "batter": "plateAppearances"}
+
+SPLITS_SQL = """
+CREATE OR REPLACE TABLE stats.platoon_splits AS
+WITH r AS (
+    SELECT s.season, s.player_id, s.role, s.vs_hand, s.k, s.opps,
+           CASE WHEN s.role = 'pitcher' THEN h.throws ELSE h.bats END AS hand
+      FROM stats.platoon_raw s
+      LEFT JOIN stats.hands h USING (player_id)
+), grid AS (
+    SELECT DISTINCT season, player_id, role, hand FROM r
+), full_grid AS (
+    SELECT g.season, g.player_id, g.role, g.hand, v.vs_hand,
+           COALESCE(r.k, 0) AS k, COALESCE(r.opps, 0) AS opps
+      FROM grid g
+     CROSS JOIN (VALUES ('L'), ('R')) v(vs_hand)
+      LEFT JOIN r USING (season, player_id, role, vs_hand)
+), player AS (
+    SELECT season, player_id, role, SUM(k) / NULLIF(SUM(opps), 0) AS overall
+      FROM full_grid GROUP BY ALL
+), role_avg AS (
+    SELECT season, role, SUM(k) / NULLIF(SUM(opps), 0) AS rate
+      FROM full_grid GROUP BY ALL
+), hand_avg AS (
+    SELECT season, role, hand, vs_hand, SUM(k) / NULLIF(SUM(opps), 0) AS rate
+      FROM full_grid GROUP BY ALL
+)
+SELECT f.season, f.player_id, f.role, f.hand, f.vs_hand,
+       f.k AS k_total, f.opps AS opportunities,
+       (f.k + w.n * COALESCE(p.overall, ra.rate) * COALESCE(ha.rate / ra.rate, 1))
+         / (f.opps + w.n) AS k_rate
+  FROM full_grid f
+  JOIN player p USING (season, player_id, role)
+  JOIN role_avg ra USING (season, role)
+  LEFT JOIN hand_avg ha ON ha.season = f.season AND ha.role = f.role
+                       AND ha.hand IS NOT DISTINCT FROM f.hand AND ha.vs_hand = f.vs_hand
+  JOIN (VALUES ('pitcher', $pitcher_n), ('batter', $batter_n)) w(role, n) ON w.role = f.role
+"""
+
+# pitchers' splits are by the stance batters actually took, so switch
+# hitters are already counted on the side they batted from
+LEAGUE_SQL = """
+CREATE OR REPLACE TABLE stats.platoon_league AS
+SELECT season, hand AS throws, vs_hand AS stands,
+       SUM(k_total) / NULLIF(SUM(opportunities), 0) AS k_rate
+  FROM stats.platoon_splits
+ WHERE role = 'pitcher' AND hand IN ('L', 'R')
+ GROUP BY ALL
+"""
+
+
+def parse_people(resp: dict, season: str, role: str) -> tuple[list[dict], list[dict]]:
+    """people response → (split rows, hand rows)."""
+    splits, hands = [], []
+    for person in resp.get("people", []):
+        pid = int(person["id"])
+        hands.append({"player_id": pid,
+                      "bats": (person.get("batSide") or {}).get("code"),
+                      "throws": (person.get("pitchHand") or {}).get("code")})
+        for block in person.get("stats", []):
+            for sp in block.get("splits", []):
+                code = (sp.get("split") or {}).get("code")
+                if code not in ("vl", "vr") or str(sp.get("season", season)) != str(season):
+                    continue
+                stat = sp.get("stat") or {}
+                splits.append({"season": str(season), "player_id": pid, "role": role,
+                               "vs_hand": code[1].upper(),
+                               "k": int(stat.get("strikeOuts") or 0),
+                               "opps": int(stat.get(OPPS_STAT[role]) or 0)})
+    return splits, hands
+
+
+def fetch(season: str, role: str, ids: list[int], limiter, workers: int) -> tuple[list[dict], list[dict]]:
+    from boxscore_archive import api_get
+
+    hydrate = f"stats(group=[{GROUP[role]}],type=[statSplits],sitCodes=[vl,vr],season={season})"
+    chunks = [ids[i:i + PEOPLE_PER_REQUEST] for i in range(0, len(ids), PEOPLE_PER_REQUEST)]
+
+    def one(chunk):
+        resp = api_get("people", {"personIds": ",".join(map(str, chunk)), "hydrate": hydrate}, limiter)
+        return parse_people(resp, season, role)
+
+    splits, hands = [], []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for s, h in pool.map(one, chunks):
+            splits += s
+            hands += h
+    return splits, hands
+
+
+def build(seasons: list[str], rate: float, workers: int) -> None:
+    import duckdb
+    import pandas as pd
+
+    from boxscore_archive import TokenBucket
+
+    limiter = TokenBucket(rate)
+    splits, hands = [], []
+    for season in seasons:
+        for role in ("pitcher", "batter"):
+            ids = sorted(load_k_rates(season, role))
+            s, h = fetch(season, role, ids, limiter, workers)
+            print(f"📥 {season} {role}s: {len(ids):,} players, {len(s):,} split rows")
+            splits += s
+            hands += h
+
+    con = duckdb.connect(STATS_DB.as_posix())
+    try:
+        con.register("raw_splits", pd.DataFrame(splits, columns=["season", "player_id", "role", "vs_hand", "k", "opps"]))
+        con.register("raw_hands", pd.DataFrame(hands, columns=["player_id", "bats", "throws"]).drop_duplicates("player_id"))
+        con.execute("CREATE SCHEMA IF NOT EXISTS stats")
+        con.execute("CREATE TABLE IF NOT EXISTS stats.hands (player_id BIGINT PRIMARY KEY, bats VARCHAR, throws VARCHAR)")
+        con.execute("INSERT OR REPLACE INTO stats.hands SELECT player_id, bats, throws FROM raw_hands")
+        # rebuild every season present so the league factors stay consistent
+        con.execute("CREATE TABLE IF NOT EXISTS stats.platoon_raw (season VARCHAR, player_id BIGINT, role VARCHAR, "
+                    "vs_hand VARCHAR, k INTEGER, opps INTEGER)")
+        con.execute("DELETE FROM stats.platoon_raw WHERE list_contains(?, season)", [list(map(str, seasons))])
+        con.execute("INSERT INTO stats.platoon_raw SELECT * FROM raw_splits")
+        con.execute(SPLITS_SQL, {"pitcher_n": PRIOR_OPPS["pitcher"], "batter_n": PRIOR_OPPS["batter"]})
+        con.execute(LEAGUE_SQL)
+        n = con.execute("SELECT count(*) FROM stats.platoon_splits").fetchone()[0]
+    finally:
+        con.close()
+    print(f"✅ {n:,} platoon split rows → {STATS_DB.name} (stats.platoon_splits, stats.hands, stats.platoon_league)")
+
+
+class PlatoonIndex:
+    """Bulk reads of the platoon tables; every method is one query."""
+
+    def __init__(self, db: Path = STATS_DB):
+        self.db = db
+
+    def _fetch(self, sql: str, params: list) -> list[tuple]:
+        import duckdb
+        con = duckdb.connect(self.db.as_posix(), read_only=True)
+        try:
+            return con.execute(sql, params).fetchall()
+        except duckdb.CatalogException:
+            return []
+        finally:
+            con.close()
+
+    def hands(self, ids, role: str) -> np.ndarray:
+        """Throwing (pitcher) or batting (batter) hand per id; '' when unknown."""
+        ids = [int(i) for i in ids]
+        col = "throws" if role == "pitcher" else "bats"
+        known = dict(self._fetch(f"SELECT player_id, {col} FROM stats.hands WHERE list_contains(?, player_id)", [ids]))
+        return np.array([known.get(i) or "" for i in ids], dtype=object)
+
+    def splits(self, ids, season: str, role: str) -> np.ndarray:
+        """(len(ids) × 2) shrunk k_rate [vs L, vs R]; NaN where a player has no splits."""
+        ids = [int(i) for i in ids]
+        rows = self._fetch(
+            "SELECT player_id, max(k_rate) FILTER (vs_hand = 'L'), max(k_rate) FILTER (vs_hand = 'R') "
+            "FROM stats.platoon_splits WHERE season = ? AND role = ? AND list_contains(?, player_id) "
+            "GROUP BY player_id", [str(season), role, ids])
+        by_id = {pid: (vl, vr) for pid, vl, vr in rows}
+        return np.array([by_id.get(i, (np.nan, np.nan)) for i in ids], dtype=float).reshape(len(ids), 2)
+
+    def league(self, season: str) -> np.ndarray:
+        """(2 × 2) league K rate [pitcher throws L/R, batter stands L/R]; NaN when not built."""
+        out = np.full((2, 2), np.nan)
+        for throws, stands, k_rate in self._fetch(
+                "SELECT throws, stands, k_rate FROM stats.platoon_league WHERE season = ?", [str(season)]):
+            out[HANDS.index(throws), HANDS.index(stands)] = k_rate
+        return out
+
+    def side_splits(self, pids, lineups, p_rates: np.ndarray, season: str) -> dict[str, np.ndarray]:
+        """matchup_splits for S sides (pitcher ids, 9-slot lineups) in five bulk queries."""
+        batters = [int(b) for lineup in lineups for b in (list(lineup) + [0] * 9)[:9]]
+        return matchup_splits(np.atleast_2d(p_rates), self.hands(pids, "pitcher"), self.hands(batters, "batter"),
+                              self.splits(pids, season, "pitcher"), self.splits(batters, season, "batter"),
+                              self.league(season), LEAGUE_K)
+
+
+def matchup_splits(p_rates: np.ndarray, throws: np.ndarray, bats: np.ndarray, pitcher_split: np.ndarray,
+                   batter_split: np.ndarray, league: np.ndarray, league_k: float) -> dict[str, np.ndarray]:
+    """
+    Handed inputs for matchup.matchup_matrix, for S sides:
+      • p_rates (S × 10) overall rates, used where a split is missing
+      • throws (S,) and bats (S × 9) hands ('L', 'R', 'S' switch, '' unknown → R)
+      • pitcher_split (S × 2), batter_split (S × 9 × 2) [vs L, vs R] rates
+      • league (2 × 2) by throws × stands, league_k where not built
+    A switch hitter stands opposite the pitcher's throwing hand.
+    """
+    S = len(p_rates)
+    t = (np.asarray(throws) == "L").astype(int) ^ 1                     # 0 = L, 1 = R
+    bats = np.asarray(bats).reshape(S, 9)
+    stands = np.where(bats == "S", 1 - t[:, None], (bats != "L").astype(int))
+    rows = np.arange(S)[:, None]
+    pitcher_vs = pitcher_split[rows, stands]
+    batter_vs = batter_split.reshape(S, 9, 2)[rows, np.arange(9), t[:, None]]
+    league_vs = np.where(np.isnan(league), league_k, league)[t[:, None], stands]
+    return {
+        "pitcher_vs": np.where(np.isnan(pitcher_vs), p_rates[:, :1], pitcher_vs),
+        "batter_vs": np.where(np.isnan(batter_vs), p_rates[:, 1:], batter_vs),
+        "league": league_vs,
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="Build platoon-split K rate tables ✋")
+    p.add_argument("command", choices=["build"])
+    p.add_argument("seasons", nargs="*", default=SEASONS)
+    p.add_argument("--rate", type=float, default=10.0, help="Max MLB API requests per second")
+    p.add_argument("--workers", type=int, default=4, help="Concurrent requests")
+    args = p.parse_args()
+    build(args.seasons, args.rate, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+prediction_store.py
+-------------------
+Append-only store for daily K projections, replacing the
+read-concat-rewrite cached_predictions.csv.
+
+Table `predictions` in data/predictions.duckdb, keyed on
+(date, game_id, side, model_version): appends cost O(new rows) and a
+rerun for the same slate replaces its rows instead of duplicating them.
+`trained_at` records which rows a calibrator has already consumed, so
+settled_pairs(only_new=True) returns just the fresh prediction/truth pairs.
+Each row also keeps the raw P(K ≥ line) of every priced line
+(lines / p_raw_lines, packed from today_proj's p_raw_<line> columns), so
+the online calibrator can fit one map per line.
+A rerun that reproduces a trained row's raw values keeps it trained;
+one that changes them flags the row `superseded`, since its old values are
+already folded into the calibrator (online_calibrate.py then rebuilds).
+
+Usage (from src/):
+  python prediction_store.py import ../data/cached_predictions.csv [--model-version v1]
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from data_io import read_table, resolve, source_sql
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = BASE_DIR / "data"
+STORE_DB = DATA_DIR / "predictions.duckdb"
+DEFAULT_VERSION = "v1"
+
+if TYPE_CHECKING:
+    import duckdb
+    import pandas as pd
+
+KEY = ["date", "game_id", "side", "model_version"]
+VALUE_COLS = ["pitcher_id", "exp_raw", "p_raw", "exp_cal", "p_cal"]
+LINE_COLS = ["lines", "p_raw_lines"]  # optional: NULL for imports without per-line columns
+
+DDL = """
+CREATE TABLE IF NOT EXISTS predictions (
+    date          VARCHAR,
+    game_id       BIGINT,
+    side          VARCHAR,
+    model_version VARCHAR,
+    pitcher_id    BIGINT,
+    exp_raw       DOUBLE,
+    p_raw         DOUBLE,
+    exp_cal       DOUBLE,
+    p_cal         DOUBLE,
+    inserted_at   TIMESTAMP DEFAULT current_timestamp,
+    trained_at    TIMESTAMP,
+    superseded    BOOLEAN DEFAULT FALSE,
+    lines         DOUBLE[],
+    p_raw_lines   DOUBLE[],
+    PRIMARY KEY (date, game_id, side, model_version)
+)
+"""
+# stores created before these columns existed
+MIGRATIONS = [
+    "ALTER TABLE predictions ADD COLUMN IF NOT EXISTS superseded BOOLEAN DEFAULT FALSE",
+    "ALTER TABLE predictions ADD COLUMN IF NOT EXISTS lines DOUBLE[]",
+    "ALTER TABLE predictions ADD COLUMN IF NOT EXISTS p_raw_lines DOUBLE[]",
+]
+# the values a calibrator folds in; a rerun that reproduces them leaves the row trained
+FOLDED_COLS = ["exp_raw", "p_raw", "lines", "p_raw_lines"]
+
+
+def connect(path: Path = STORE_DB, read_only: bool = False) -> duckdb.DuckDBPyConnection:
+    import duckdb
+    con = duckdb.connect(str(path), read_only=read_only)
+    if not read_only:
+        con.execute(DDL)
+        for sql in MIGRATIONS:
+            con.execute(sql)
+    return con
+
+
+def pack_lines(df: pd.DataFrame) -> pd.DataFrame:
+    """today_proj's p_raw_<line> columns (e.g. p_raw_5_5) → list columns lines / p_raw_lines."""
+    cols = [c for c in df.columns if c.startswith("p_raw_") and c != "p_raw_lines"]
+    if not cols:
+        return df
+    lines = [float(c[len("p_raw_"):].replace("_", ".")) for c in cols]
+    probs = df[cols].to_numpy(float)
+    return df.drop(columns=cols).assign(lines=[lines] * len(df), p_raw_lines=[list(row) for row in probs])
+
+
+def upsert(con: duckdb.DuckDBPyConnection, df: pd.DataFrame, model_version: str = DEFAULT_VERSION) -> int:
+    """
+    Insert `df` (date, game_id, side + VALUE_COLS [+ LINE_COLS]) under `model_version`.
+    Rows already stored for the same key are replaced. A replaced row stays
+    trained when its FOLDED_COLS are unchanged; otherwise it becomes
+    untrained again and, if it had been trained, superseded.
+    """
+    rows = df.assign(model_version=model_version, **{c: None for c in LINE_COLS if c not in df.columns})
+    rows = rows[KEY + VALUE_COLS + LINE_COLS]
+    con.register("new_rows", rows)
+    cols = VALUE_COLS + LINE_COLS
+    updates = ", ".join(f"{c} = excluded.{c}" for c in cols)
+    same = " AND ".join(f"predictions.{c} IS NOT DISTINCT FROM excluded.{c}" for c in FOLDED_COLS)
+    # SET sees the stored row, so `same` compares old and new values
+    con.execute(f"""
+        INSERT INTO predictions ({', '.join(KEY + cols)})
+        SELECT {', '.join(KEY + VALUE_COLS + [f'CAST({c} AS DOUBLE[])' for c in LINE_COLS])} FROM new_rows
+        ON CONFLICT ({', '.join(KEY)}) DO UPDATE
+           SET {updates}, inserted_at = now(),
+               trained_at = CASE WHEN {same} THEN predictions.trained_at END,
+               superseded = predictions.superseded OR (predictions.trained_at IS NOT NULL AND NOT ({same}))
+    """)
+    con.unregister("new_rows")
+    return len(rows)
+
+
+def settled_pairs(con: duckdb.DuckDBPyConnection, truth: str | Path = "historical_ks",
+                  only_new: bool = True, model_version: str | None = None) -> pd.DataFrame:
+    """
+    Predictions joined with their actual K totals. With `only_new`, only
+    rows not yet marked by mark_trained() are returned.
+    """
+    where = ["p.trained_at IS NULL"] if only_new else []
+    params = []
+    if model_version:
+        where.append("p.model_version = ?")
+        params.append(model_version)
+    sql = f"""
+        SELECT p.date, p.game_id AS game_pk, p.side, p.model_version, p.pitcher_id,
+               p.exp_raw, p.p_raw, p.lines, p.p_raw_lines, t.k_actual
+          FROM predictions p
+          JOIN (SELECT game_pk, side, pitcher_id, k_actual FROM {source_sql(resolve(truth))}) t
+            ON t.game_pk = p.game_id AND t.side = p.side AND t.pitcher_id = p.pitcher_id
+         {'WHERE ' + ' AND '.join(where) if where else ''}
+    """
+    return con.execute(sql, params).fetchdf()
+
+
+def superseded(con: duckdb.DuckDBPyConnection) -> int:
+    """Rows whose values changed after a calibrator had folded them in."""
+    return con.execute("SELECT count(*) FROM predictions WHERE superseded").fetchone()[0]
+
+
+def clear_superseded(con: duckdb.DuckDBPyConnection) -> None:
+    """Reset the flags once a calibrator has been rebuilt from scratch."""
+    con.execute("UPDATE predictions SET superseded = FALSE WHERE superseded")
+
+
+def mark_trained(con: duckdb.DuckDBPyConnection, pairs: pd.DataFrame) -> None:
+    """Flag the rows behind `pairs` (from settled_pairs) as consumed."""
+    if pairs.empty:
+        return
+    keys = pairs[["date", "game_pk", "side", "model_version"]]
+    con.register("used_keys", keys)
+    con.execute("""
+        UPDATE predictions SET trained_at = now()
+          FROM used_keys u
+         WHERE predictions.date = u.date AND predictions.game_id = u.game_pk
+           AND predictions.side = u.side AND predictions.model_version = u.model_version
+    """)
+    con.unregister("used_keys")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Manage the prediction store")
+    p.add_argument("command", choices=["import"])
+    p.add_argument("path", help="cached_predictions.{csv,parquet} to import")
+    p.add_argument("--model-version", default=DEFAULT_VERSION)
+    args = p.parse_args()
+
+    df = read_table(args.path, ["date", "game_id", "side"] + VALUE_COLS)
+    df = df.drop_duplicates(subset=["date", "game_id", "side"], keep="last")
+    con = connect()
+    n = upsert(con, df, args.model_version)
+    total = con.execute("SELECT count(*) FROM predictions").fetchone()[0]
+    con.close()
+    print(f"💾 Imported {n} rows → {STORE_DB.name} ({total} total)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+proj_service.py
+---------------
+Long-running projection daemon with a local HTTP/JSON API.
+
+Imports, the calibration artifact, the k_rate tables (today_proj.RateIndex)
+and the leash tables (leash.Leash) are loaded once; matchup tables
+(matchup.MatchupIndex), schedules and simulated sides (by
+side_cache.fingerprint) are cached in memory, so a repeat request is a
+dict lookup instead of a fresh today_proj.py run.
+
+Endpoints:
+  GET  /health
+  GET  /projections?date=YYYY-MM-DD[&refresh=1]   → the slate, as today_proj writes it
+  POST /project   {"pitcher_id": 123, "lineup": [9 ids], "date": "YYYY-MM-DD",
+                   "lines": [5.5, 6.5]}         → one custom side
+  POST /reload                                   → reread calibration (--calibration), drop caches
+
+Probabilities without an isotonic map for their line (p_cal_<line>) are
+sent as null.
+
+Bad requests (lineup not 9 ids, non-numeric lines, unparseable date) get
+400, any other failure 500. Simulated sides and their matchup slot
+tables are each kept in an LRU of --max-sides entries, so a long-lived
+daemon does not grow without bound.
+
+The schedule source is injectable (ProjectionService(schedule_source=...)),
+so the service can be exercised against a stubbed slate.
+
+Usage (from src/):
+  python proj_service.py [--host 127.0.0.1] [--port 8765] [--calibration online] [--warm 2025-07-11]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date as _date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Callable
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from calibration import ARTIFACTS, artifact_path
+from k_pred_core import SEQUENCES, engine_tag
+from leash import Leash
+from matchup import MATCHUPS, MatchupIndex
+from side_cache import fingerprint
+from today_proj import (RateIndex, calibrate_slate, load_calibration, load_schedule,
+                        priced_lines, side_rates, simulate_side)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+MAX_SIDES = 20000  # simulated sides kept in memory (LRU)
+
+
+class BadRequest(ValueError):
+    """Client error, answered with 400."""
+
+
+def records(out: pd.DataFrame) -> list[dict]:
+    """Rows as JSON-ready dicts, NaN (e.g. an uncalibrated p_cal) → None."""
+    return out.astype(object).where(out.notna(), None).to_dict(orient='records')
+
+
+def parse_date(value) -> str:
+    try:
+        return _date.fromisoformat(str(value)).isoformat()
+    except ValueError:
+        raise BadRequest(f'date must be YYYY-MM-DD, got {value!r}') from None
+
+
+def parse_project(req) -> tuple[int, list[int], str, list[float]]:
+    """Validate a /project body → (pitcher_id, lineup, date, lines)."""
+    if not isinstance(req, dict):
+        raise BadRequest('body must be a JSON object')
+    try:
+        pid = int(req['pitcher_id'])
+        lineup = req['lineup']
+    except KeyError as e:
+        raise BadRequest(f'missing {e.args[0]!r}') from None
+    except (TypeError, ValueError):
+        raise BadRequest(f'pitcher_id must be an integer, got {req["pitcher_id"]!r}') from None
+    if (not isinstance(lineup, list) or len(lineup) != 9
+            or not all(isinstance(b, int) and not isinstance(b, bool) for b in lineup)):
+        raise BadRequest('lineup must be a list of 9 batter ids')
+    lines = req.get('lines', [])
+    if (not isinstance(lines, list)
+            or not all(isinstance(x, (int, float)) and not isinstance(x, bool) for x in lines)):
+        raise BadRequest('lines must be a list of numbers')
+    proj_date = parse_date(req['date']) if req.get('date') else _date.today().isoformat()
+    return pid, lineup, proj_date, [float(x) for x in lines]
+
+
+class ProjectionService:
+    """Warm state behind the HTTP handlers; safe to call from several threads."""
+
+    def __init__(self, schedule_source: Callable[[str], pd.DataFrame] = load_schedule,
+                 cal_path=artifact_path('batch'), line: float = 6.5, lines=(),
+                 n_sims: int = 10000, schedule_ttl: float = 300.0, sequence: str = 'order',
+                 matchup: str = 'log5', max_sides: int = MAX_SIDES):
+        self.schedule_source = schedule_source
+        self.cal_path = cal_path
+        self.line = line
+        self.lines = priced_lines(line, lines)
+        self.n_sims = n_sims
+        self.schedule_ttl = schedule_ttl
+        self.sequence = sequence
+        self.matchup = matchup
+        self.matchups = MatchupIndex(max_rows=max_sides)
+        self.rates = RateIndex()
+        self.leash = Leash()
+        self.cal = load_calibration(cal_path)
+        self._schedules: dict[str, tuple[float, pd.DataFrame]] = {}
+        self.max_sides = max_sides
+        self._sides: OrderedDict[str, tuple[float, np.ndarray]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def reload(self) -> None:
+        cal = load_calibration(self.cal_path)
+        with self._lock:
+            self.cal = cal
+            self._schedules.clear()
+            self._sides.clear()
+        self.rates.clear()
+        self.matchups.clear()
+        self.leash.clear()
+
+    def schedule(self, proj_date: str, refresh: bool = False) -> pd.DataFrame:
+        with self._lock:
+            hit = self._schedules.get(proj_date)
+        if hit and not refresh and time.monotonic() - hit[0] < self.schedule_ttl:
+            return hit[1]
+        sched = self.schedule_source(proj_date)
+        with self._lock:
+            self._schedules[proj_date] = (time.monotonic(), sched)
+        return sched
+
+    def side(self, pid: int, lineup: list[int], season: str, lines: np.ndarray) -> tuple[float, np.ndarray]:
+        """Raw (E[K], P(K ≥ lines)) for one side, simulated once per input fingerprint."""
+        p_rates = side_rates(pid, lineup, season, self.rates)
+        outs_pmf = self.leash.pmf([pid], season)[0]
+        key = fingerprint(pid, lineup, p_rates, outs_pmf, lines, self.n_sims,
+                          engine_tag(self.sequence, self.matchup))
+        with self._lock:
+            hit = self._sides.get(key)
+            if hit is not None:
+                self._sides.move_to_end(key)
+        if hit is None:
+            slots = self.matchups.table([key], p_rates, self.matchup) if self.sequence == 'order' else None
+            hit = simulate_side(p_rates, outs_pmf, lines, self.n_sims, self.sequence, slots)
+            with self._lock:
+                self._sides[key] = hit
+                while len(self._sides) > self.max_sides:
+                    self._sides.popitem(last=False)
+        return hit
+
+    def projections(self, proj_date: str, refresh: bool = False) -> list[dict]:
+        sched = self.schedule(proj_date, refresh)
+        if sched.empty:
+            return []
+        season = proj_date[:4]
+        rows, p_raw = [], []
+        for g in sched.itertuples(index=False):
+            for side in ('away', 'home'):
+                pid = int(getattr(g, f'{side}_pid'))
+                lineup = [int(x) for x in getattr(g, f'{side}_lineup').split(',') if x]
+                er_raw, pr_raw = self.side(pid, lineup, season, self.lines)
+                rows.append({'game_id': int(g.game_id), 'side': side, 'pitcher_id': pid, 'exp_raw': er_raw})
+                p_raw.append(pr_raw)
+        return records(calibrate_slate(rows, np.vstack(p_raw), self.lines, self.line, self.cal))
+
+    def project(self, pitcher_id: int, lineup: list[int], proj_date: str, lines=()) -> dict:
+        lines = priced_lines(self.line, lines)
+        er_raw, pr_raw = self.side(int(pitcher_id), [int(b) for b in lineup], proj_date[:4], lines)
+        row = {'pitcher_id': int(pitcher_id), 'exp_raw': er_raw}
+        return records(calibrate_slate([row], pr_raw[None, :], lines, self.line, self.cal))[0]
+
+
+def make_handler(service: ProjectionService):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, payload) -> None:
+            body = json.dumps(payload, default=lambda o: o.item()).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _handle(self, route) -> None:
+            try:
+                route()
+            except BadRequest as e:
+                self._send(400, {'error': f'bad request: {e}'})
+            except Exception as e:
+                self._send(500, {'error': f'{type(e).__name__}: {e}'})
+
+        def do_GET(self):
+            self._handle(self._get)
+
+        def do_POST(self):
+            self._handle(self._post)
+
+        def _get(self):
+            url = urlparse(self.path)
+            qs = parse_qs(url.query)
+            if url.path == '/health':
+                return self._send(200, {'status': 'ok'})
+            if url.path == '/projections':
+                proj_date = parse_date(qs.get('date', [_date.today().isoformat()])[0])
+                refresh = qs.get('refresh', ['0'])[0] in ('1', 'true')
+                t0 = time.perf_counter()
+                rows = service.projections(proj_date, refresh)
+                return self._send(200, {'date': proj_date, 'n_sides': len(rows), 'projections': rows,
+                                        'elapsed_ms': round((time.perf_counter() - t0) * 1000, 1)})
+            self._send(404, {'error': f'unknown path {url.path}'})
+
+        def _post(self):
+            url = urlparse(self.path)
+            if url.path == '/reload':
+                service.reload()
+                return self._send(200, {'status': 'reloaded'})
+            if url.path != '/project':
+                return self._send(404, {'error': f'unknown path {url.path}'})
+            try:
+                req = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            except ValueError as e:
+                raise BadRequest(f'invalid JSON: {e}') from None
+            pid, lineup, proj_date, lines = parse_project(req)
+            self._send(200, service.project(pid, lineup, proj_date, lines))
+
+        def log_message(self, fmt, *args):
+            print(f"🌐 {self.address_string()} {fmt % args}")
+
+    return Handler
+
+
+def make_server(service: ProjectionService, host: str = '127.0.0.1', port: int = 8765) -> ThreadingHTTPServer:
+    return ThreadingHTTPServer((host, port), make_handler(service))
+
+
+def main():
+    p = argparse.ArgumentParser(description='Serve K projections over a local HTTP/JSON API 🚀')
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8765)
+    p.add_argument('--line', type=float, default=6.5, help='Main K line ⚾')
+    p.add_argument('--lines', type=float, nargs='*', default=[], help='Extra priced K lines 💵')
+    p.add_argument('--sims', type=int, default=10000, help='Simulation trials per side 🎲')
+    p.add_argument('--sequence', choices=SEQUENCES, default='order', help='PA order in the simulator 🔢')
+    p.add_argument('--matchup', choices=MATCHUPS, default='log5', help='Pitcher × batter rule in batting order 🤝')
+    p.add_argument('--calibration', choices=ARTIFACTS, default='batch',
+                   help='Calibration to serve: calibrate.py (batch) or online_calibrate.py (online) 📐')
+    p.add_argument('--schedule-ttl', type=float, default=300.0, help='Seconds a cached schedule stays fresh')
+    p.add_argument('--max-sides', type=int, default=MAX_SIDES, help='Simulated sides kept in memory')
+    p.add_argument('--warm', nargs='*', default=[], help='Dates to project at start-up 🔥')
+    args = p.parse_args()
+
+    service = ProjectionService(cal_path=artifact_path(args.calibration), line=args.line, lines=args.lines, n_sims=args.sims,
+                                schedule_ttl=args.schedule_ttl, sequence=args.sequence,
+                                matchup=args.matchup, max_sides=args.max_sides)
+    for d in args.warm:
+        print(f"🔥 Warming {d}: {len(service.projections(d))} sides")
+    server = make_server(service, args.host, args.port)
+    print(f"✅ Serving on http://{args.host}:{args.port} (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
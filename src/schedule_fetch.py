@@ -7,7 +7,7 @@ Fetch MLB schedule (probable pitchers + lineups) for a given date
 (positional or --date). Defaults to today if no date provided.
 Includes Pre-Game & In Progress lineups for future/today, and Final for past.
 Saves to:
-  • data/schedule.csv
+  • data/schedule.parquet (+ schedule.csv)
   • data/schedule.duckdb (table: schedule), with fallback to src/schedule.db
 """
 import argparse
@@ -18,6 +18,8 @@ import pandas as pd
 import duckdb
 import statsapi
 
+from data_io import write_table
+
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 DB_PATH  = DATA_DIR / "schedule.duckdb"
 
@@ -118,10 +120,9 @@ def main():
     print(f"📅  Pulling schedule for {fetch_date}…")
     df = fetch_for_date(fetch_date)
 
-    # Save CSV
-    csv_path = DATA_DIR / "schedule.csv"
-    df.to_csv(csv_path, index=False)
-    print(f"✔️  Wrote {len(df)} rows → {csv_path.name}")
+    # Save Parquet + CSV
+    out_path = write_table(df, "schedule", csv=True, data_dir=DATA_DIR)
+    print(f"✔️  Wrote {len(df)} rows → {out_path.name} (+ .csv)")
 
     # Save to DuckDB with fallback, only if DataFrame has columns
     if not df.empty:
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+scoring.py
+----------
+Score simulated K distributions against actual strikeouts with proper
+scoring rules, vectorized over every start at once.
+
+Each start is a row of an (n_starts × K) PMF matrix over 0..K-1 Ks,
+built from the `k_hist` counts column when the sim file has one, else
+from a Poisson with mean exp_ks. Per model version this computes
+  • CRPS (ranked probability score over unit K bins)
+  • log-loss of the observed K
+  • Brier score of P(K > line) for every line
+  • randomized PIT histogram
+  • reliability table of P(K > line)
+and writes data/scores_<version>.parquet (+ _pit, _reliability).
+
+Usage (from src/):
+  python scoring.py ../data/historical_ks_sim.parquet [more sims ...] --lines 4.5 5.5 6.5
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_io import DATA_DIR, read_table, write_table
+
+EPS = 1e-12
+
+
+def poisson_pmf(mu: np.ndarray, k_max: int) -> np.ndarray:
+    """(n × k_max+1) Poisson PMFs; the last column absorbs the upper tail."""
+    mu = np.asarray(mu, dtype=float)[:, None]
+    k = np.arange(1, k_max + 1)
+    steps = np.hstack([np.exp(-mu), np.broadcast_to(mu, (len(mu), k_max)) / k])
+    pmf = np.cumprod(steps, axis=1)
+    pmf[:, -1] += np.clip(1.0 - pmf.sum(axis=1), 0.0, None)
+    return pmf
+
+
+def hist_pmf(hists, k_max: int) -> np.ndarray:
+    """Stack ragged per-start K histograms (counts over 0..len-1) into normalized PMFs."""
+    lens = np.fromiter((len(h) for h in hists), dtype=int, count=len(hists))
+    flat = np.concatenate([np.asarray(h, dtype=float) for h in hists])
+    rows = np.repeat(np.arange(len(hists)), lens)
+    cols = np.arange(len(flat)) - np.repeat(np.cumsum(lens) - lens, lens)
+    pmf = np.zeros((len(hists), max(k_max, lens.max()) + 1))
+    pmf[rows, cols] = flat
+    return pmf / pmf.sum(axis=1, keepdims=True)
+
+
+def pmf_matrix(df: pd.DataFrame) -> np.ndarray:
+    y_max = int(df["k_actual"].max())
+    if "k_hist" in df.columns:
+        return hist_pmf(df["k_hist"].to_list(), y_max)
+    mu_max = float(df["exp_ks"].max())
+    return poisson_pmf(df["exp_ks"].to_numpy(), max(y_max, int(mu_max + 10 * np.sqrt(mu_max) + 10)))
+
+
+def crps(pmf: np.ndarray, y: np.ndarray) -> np.ndarray:
+    cdf = np.cumsum(pmf, axis=1)
+    step = np.arange(pmf.shape[1]) >= y[:, None]
+    return ((cdf - step) ** 2).sum(axis=1)
+
+
+def log_loss(pmf: np.ndarray, y: np.ndarray) -> np.ndarray:
+    return -np.log(np.clip(pmf[np.arange(len(y)), y], EPS, None))
+
+
+def p_over(pmf: np.ndarray, lines: np.ndarray) -> np.ndarray:
+    """(n × lines) P(K > line) = 1 − F(floor(line))."""
+    cdf = np.cumsum(pmf, axis=1)
+    idx = np.clip(np.floor(lines).astype(int), 0, pmf.shape[1] - 1)
+    return np.clip(1.0 - cdf[:, idx], 0.0, 1.0)
+
+
+def pit(pmf: np.ndarray, y: np.ndarray, seed: int = 0) -> np.ndarray:
+    """Randomized PIT values F(y−1) + V·p(y), uniform under a calibrated model."""
+    cdf = np.cumsum(pmf, axis=1)
+    rows = np.arange(len(y))
+    below = np.where(y > 0, cdf[rows, np.maximum(y - 1, 0)], 0.0)
+    return below + np.random.default_rng(seed).random(len(y)) * pmf[rows, y]
+
+
+def reliability(p: np.ndarray, hit: np.ndarray, n_bins: int = 10) -> pd.DataFrame:
+    idx = np.clip((p * n_bins).astype(int), 0, n_bins - 1)
+    count = np.bincount(idx, minlength=n_bins)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return pd.DataFrame({
+            "bin": np.arange(n_bins),
+            "count": count,
+            "mean_p": np.bincount(idx, weights=p, minlength=n_bins) / count,
+            "observed": np.bincount(idx, weights=hit, minlength=n_bins) / count,
+        })
+
+
+def score(df: pd.DataFrame, lines, n_bins: int = 10) -> tuple[dict, pd.DataFrame, pd.DataFrame]:
+    """Score one model version → (summary row, PIT histogram, reliability table)."""
+    lines = np.asarray(lines, dtype=float)
+    y = df["k_actual"].to_numpy(int)
+    pmf = pmf_matrix(df)
+    y = np.minimum(y, pmf.shape[1] - 1)
+
+    probs = p_over(pmf, lines)
+    hits = (y[:, None] > lines).astype(float)
+    u = pit(pmf, y)
+
+    summary = {
+        "n": len(y),
+        "pmf_source": "k_hist" if "k_hist" in df.columns else "poisson(exp_ks)",
+        "crps": float(crps(pmf, y).mean()),
+        "log_loss": float(log_loss(pmf, y).mean()),
+        "mean_pit": float(u.mean()),
+    }
+    for j, line in enumerate(lines):
+        summary[f"brier_{line:g}".replace(".", "_")] = float(((probs[:, j] - hits[:, j]) ** 2).mean())
+
+    counts, edges = np.histogram(u, bins=n_bins, range=(0.0, 1.0))
+    pit_hist = pd.DataFrame({"lo": edges[:-1], "hi": edges[1:], "count": counts,
+                             "density": counts * n_bins / len(u)})
+    rel = pd.concat([reliability(probs[:, j], hits[:, j], n_bins).assign(line=line)
+                     for j, line in enumerate(lines)], ignore_index=True)
+    return summary, pit_hist, rel
+
+
+def main():
+    p = argparse.ArgumentParser(description="Score simulated K distributions against actuals")
+    p.add_argument("sims", nargs="+", help="Sim Parquet/CSV files (k_actual + k_hist or exp_ks)")
+    p.add_argument("--lines", type=float, nargs="+", default=[4.5, 5.5, 6.5, 7.5])
+    p.add_argument("--bins", type=int, default=10, help="PIT / reliability bins")
+    p.add_argument("--outdir", type=Path, default=DATA_DIR)
+    args = p.parse_args()
+
+    rows = []
+    for sim in args.sims:
+        df = read_table(sim).dropna(subset=["k_actual"])
+        if "model_version" not in df.columns:
+            df["model_version"] = Path(sim).stem
+        for version, part in df.groupby("model_version", sort=False):
+            summary, pit_hist, rel = score(part, args.lines, args.bins)
+            summary = {"model_version": version, **summary}
+            write_table(pd.DataFrame([summary]), f"scores_{version}", data_dir=args.outdir)
+            write_table(pit_hist, f"scores_{version}_pit", data_dir=args.outdir)
+            write_table(rel, f"scores_{version}_reliability", data_dir=args.outdir)
+            rows.append(summary)
+
+    print(pd.DataFrame(rows).set_index("model_version").T.to_string())
+    print(f"✅ Scores saved → {args.outdir}/scores_<version>*.parquet")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+side_cache.py
+-------------
+Persistent cache of simulated sides, keyed by an input fingerprint.
+
+A side's fingerprint hashes everything its raw simulation depends on:
+pitcher, ordered lineup, the k_rates and outs (leash) distribution
+actually used, priced lines, trial count and simulator version plus PA
+sequencing (k_pred_core.engine_tag) and, with platoon splits, the handed
+matchup inputs. Reruns of
+today_proj.py look every side up here first and simulate only the sides
+whose fingerprint is new, e.g. after a lineup posts or a scratch.
+Calibration is applied afterwards to the whole slate, so a new
+calibration artifact never forces a re-simulation.
+
+Table `sides` in data/side_cache.duckdb.
+
+Usage (from src/):
+  python side_cache.py prune --keep-days 14
+"""
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = BASE_DIR / "data"
+CACHE_DB = DATA_DIR / "side_cache.duckdb"
+
+DDL = """
+CREATE TABLE IF NOT EXISTS sides (
+    fingerprint VARCHAR PRIMARY KEY,
+    pitcher_id  BIGINT,
+    engine      VARCHAR,
+    exp_raw     DOUBLE,
+    p_raw       DOUBLE[],
+    computed_at TIMESTAMP DEFAULT current_timestamp
+)
+"""
+
+
+def fingerprint(pid: int, lineup: list[int], p_rates: np.ndarray, outs_pmf: np.ndarray,
+                lines: np.ndarray, n_sims: int, engine: str, splits: dict | None = None) -> str:
+    payload = {
+        "pitcher": int(pid),
+        "lineup": [int(b) for b in lineup],
+        "rates": [round(float(r), 6) for r in p_rates],
+        "outs": [round(float(p), 6) for p in outs_pmf],
+        "lines": [float(x) for x in lines],
+        "n_sims": int(n_sims),
+        "engine": engine,
+    }
+    if splits:  # handed matchup inputs (platoon.matchup_splits rows)
+        payload["splits"] = {k: np.round(np.asarray(v, dtype=float), 6).ravel().tolist()
+                             for k, v in sorted(splits.items())}
+    return hashlib.sha1(json.dumps(payload, separators=(",", ":")).encode()).hexdigest()
+
+
+class SideCache:
+    """fingerprint → (exp_raw, p_raw per line), backed by DuckDB."""
+
+    def __init__(self, path: Path = CACHE_DB):
+        import duckdb
+        self.con = duckdb.connect(str(path))
+        self.con.execute(DDL)
+
+    def get_many(self, fps: list[str]) -> dict[str, tuple[float, np.ndarray]]:
+        if not fps:
+            return {}
+        rows = self.con.execute(
+            "SELECT fingerprint, exp_raw, p_raw FROM sides WHERE list_contains(?, fingerprint)", [fps]
+        ).fetchall()
+        return {fp: (exp_raw, np.asarray(p_raw, dtype=float)) for fp, exp_raw, p_raw in rows}
+
+    def put_many(self, rows: list[tuple[str, int, str, float, np.ndarray]]) -> None:
+        """rows of (fingerprint, pitcher_id, engine, exp_raw, p_raw)."""
+        if not rows:
+            return
+        self.con.executemany(
+            "INSERT OR REPLACE INTO sides (fingerprint, pitcher_id, engine, exp_raw, p_raw) VALUES (?, ?, ?, ?, ?)",
+            [(fp, int(pid), engine, float(e), [float(x) for x in p]) for fp, pid, engine, e, p in rows],
+        )
+
+    def prune(self, keep_days: int) -> int:
+        return self.con.execute(
+            "DELETE FROM sides WHERE computed_at < now() - to_days(?)", [keep_days]
+        ).fetchone()[0]
+
+    def close(self) -> None:
+        self.con.close()
+
+
+def main():
+    p = argparse.ArgumentParser(description="Maintain the simulated-side cache")
+    p.add_argument("command", choices=["prune"])
+    p.add_argument("--keep-days", type=int, default=14)
+    args = p.parse_args()
+
+    cache = SideCache()
+    n = cache.prune(args.keep_days)
+    cache.close()
+    print(f"🧹 Pruned {n} cached sides older than {args.keep_days} days")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,38 +4,113 @@ today_proj.py
 -------------
 Project strikeout totals for games on a given date and save
 with date embedded in the filename.
+
+P(K ≥ line) is reported for every priced line (--lines) as
+p_raw_<line>/p_cal_<line> columns; p_raw/p_cal hold the main --line.
+The calibration artifact (--calibration: calibrate.py's batch fit in
+models/calibration.json, or online_calibrate.py's running fit in
+models/calibration_online.json) keeps one isotonic map per fitted line; each
+priced line's column of the (sides × lines) matrix goes through its own
+map, and p_cal_<line> is left empty (NaN) for a line without one rather
+than repeating the raw probability under a calibrated name.
+
+The steps are reusable (load_schedule → project_slate, with RateIndex
+keeping k_rate lookups warm) so proj_service.py can serve them from a
+long-running process.
+
+Each trial's outs target is drawn from the starter's empirical leash
+distribution (leash.py; fixed at 18 outs until `leash.py build` has run),
+and the sides still to simulate go through k_pred_core.sim_batch together.
+By default PAs follow the batting order (--sequence order: slot = PA
+number mod 9, each slot's K probability precomputed by slot_table);
+--sequence uniform keeps the old draw from the pitcher + batter pool.
+In batting order each slot's probability is the log5 matchup of pitcher
+and batter against the league rate (matchup.py; --matchup pool averages
+the two instead). With --platoon the log5 step uses handed splits
+(platoon.py): the pitcher's rate vs each batter's stand, the batter's vs
+the pitcher's throws and the league rate of that pairing, looked up for
+the whole slate in a few bulk queries.
+
+Simulated sides are cached by input fingerprint (side_cache.py): a rerun
+only simulates sides whose pitcher, lineup, rates, lines or engine
+changed, and reports which ones it recomputed (--no-cache forces all).
+
+pandas, DuckDB, statsapi and tqdm are imported only on the paths that use
+them: --help loads numpy alone, and a fully cached rerun never loads
+statsapi or tqdm. A cached rerun still imports pandas (DuckDB's Python
+binding pulls it in for any bound query parameter), which is most of its
+roughly one second; tests/test_startup.py budgets it.
 """
+from __future__ import annotations
+
 import argparse
+import threading
+from datetime import date as _date
 from pathlib import Path
+from typing import TYPE_CHECKING
 import numpy as np
-import pandas as pd
-import duckdb
-import statsapi
-from tqdm import tqdm
 
-from k_pred_core import sim_many
-from kpred_sim import fetch_k_rate
+from calibration import ARTIFACTS, Calibration, artifact_path, load
+from data_io import write_table
+from k_pred_core import SEQUENCES, engine_tag, pa_table, sample_outs, sim_batch
+from kpred_sim import load_k_rates
+from leash import DEFAULT_OUTS, Leash
+from matchup import MATCHUPS, MatchupIndex, slot_rates
+from platoon import PlatoonIndex
+from side_cache import SideCache, fingerprint
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 DEFAULT = 0.252
+SIDE_BATCH = 64  # sides per sim_batch call
 # Project directories
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / 'data'
-MODEL_DIR = BASE_DIR / 'models'
 
 
-def load_calibration(pkl_path: Path):
+def load_calibration(path: Path) -> Calibration:
     """
-    Load linear calibration model from pickle and return slope, intercept.
+    Load the JSON calibration artifact (linear E[K] + isotonic P(over) maps).
     """
-    import pickle
-    with pkl_path.open('rb') as f:
-        model = pickle.load(f)
-    slope = float(model.coef_[0])
-    intercept = float(model.intercept_)
-    return slope, intercept
+    if not path.exists():
+        raise FileNotFoundError(
+            f"Calibration not found: {path} (run calibrate.py / online_calibrate.py, "
+            f"or 'python calibration.py convert' for old pickles)"
+        )
+    return load(path)
+
+
+class RateIndex:
+    """
+    Warm k_rate lookups: each (season, role) table is bulk-loaded once
+    (kpred_sim.load_k_rates), after which every lookup is a dict hit.
+    """
+
+    def __init__(self, default: float = DEFAULT):
+        self.default = default
+        self._tables: dict[tuple[str, str], dict[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def table(self, season: str, role: str) -> dict[int, float]:
+        key = (str(season), role)
+        with self._lock:
+            if key not in self._tables:
+                self._tables[key] = load_k_rates(*key)
+            return self._tables[key]
+
+    def rates(self, pids, season: str, role: str) -> np.ndarray:
+        tbl = self.table(season, role)
+        return np.array([tbl.get(int(pid)) or self.default for pid in pids], dtype=float)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tables.clear()
 
 
 def fetch_schedule_from_db(db_path: Path, date: str) -> pd.DataFrame:
+    import duckdb
+    import pandas as pd
     con = duckdb.connect(str(db_path))
     try:
         df = con.execute(
@@ -53,6 +128,8 @@ def fetch_schedule_from_db(db_path: Path, date: str) -> pd.DataFrame:
 
 
 def fetch_schedule_live(date: str) -> pd.DataFrame:
+    import pandas as pd
+    import statsapi
     rows = []
     resp = statsapi.get('schedule', {'sportId': 1, 'date': date})
     for day in resp.get('dates', []):
@@ -94,6 +171,139 @@ def fetch_schedule_live(date: str) -> pd.DataFrame:
     return pd.DataFrame(rows)
 
 
+def load_schedule(proj_date: str, sched_db: Path = DATA_DIR / 'schedule.duckdb') -> pd.DataFrame:
+    """Schedule rows with both probable pitchers and lineups (DB first, then live)."""
+    sched = fetch_schedule_from_db(sched_db, proj_date)
+    if sched.empty:
+        print(f"No schedule in DB for {proj_date}, fetching live 🛰️")
+        sched = fetch_schedule_live(proj_date)
+    if sched.empty:
+        return sched
+    return sched.dropna(subset=['away_pid', 'home_pid', 'away_lineup', 'home_lineup'])
+
+
+def priced_lines(line: float, extra=()) -> np.ndarray:
+    return np.array(sorted({line, *extra}), dtype=float)
+
+
+def side_rates(pid: int, lineup: list[int], season: str, rates: RateIndex) -> np.ndarray:
+    """[pitcher k_rate, batter k_rates...] for one side."""
+    return np.concatenate([rates.rates([pid], season, 'pitcher'),
+                           rates.rates(lineup, season, 'batter')])
+
+
+def simulate_sides(p_rates: np.ndarray, outs_pmf: np.ndarray, lines: np.ndarray, n_sims: int,
+                   rng=None, sequence: str = 'order', slots: np.ndarray | None = None
+                   ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Simulate (S × 10) sides at once, each trial with its own outs target
+    drawn from the side's leash → (E[K] raw (S,), raw P(K ≥ line) (S × lines)).
+    In batting order, `slots` is the (S × 9) matchup table to use.
+    """
+    rng = np.random.default_rng(rng)
+    sims = sim_batch(pa_table(p_rates, sequence, slots), sample_outs(outs_pmf, n_sims, rng), n_sims, rng,
+                     ordered=sequence == 'order')
+    return sims.mean(axis=1), (sims[:, :, None] >= lines).mean(axis=1)
+
+
+def simulate_side(p_rates: np.ndarray, outs_pmf: np.ndarray, lines: np.ndarray, n_sims: int,
+                  sequence: str = 'order', slots: np.ndarray | None = None) -> tuple[float, np.ndarray]:
+    """Simulate one side → (E[K] raw, raw P(K ≥ line) for each line)."""
+    exp_raw, p_raw = simulate_sides(p_rates[None, :], outs_pmf[None, :], lines, n_sims, sequence=sequence,
+                                    slots=None if slots is None else np.atleast_2d(slots))
+    return float(exp_raw[0]), p_raw[0]
+
+
+def project_side(pid: int, lineup: list[int], season: str, lines: np.ndarray, n_sims: int,
+                 rates: RateIndex, leash: Leash, sequence: str = 'order',
+                 matchup: str = 'log5') -> tuple[float, np.ndarray]:
+    p_rates = side_rates(pid, lineup, season, rates)
+    slots = slot_rates(p_rates, matchup) if sequence == 'order' else None
+    return simulate_side(p_rates, leash.pmf([pid], season)[0], lines, n_sims, sequence, slots)
+
+
+def calibrate_slate(rows: list[dict], p_raw: np.ndarray, lines: np.ndarray,
+                    main_line: float, cal: Calibration) -> pd.DataFrame:
+    """Apply both calibration maps to a whole slate: rows + (sides × lines) p_raw."""
+    import pandas as pd
+    main_idx = int(np.searchsorted(lines, main_line))
+    p_raw = np.asarray(p_raw, dtype=float).reshape(len(rows), len(lines))
+    p_cal = cal.p_over_lines(p_raw, lines)
+    out = pd.DataFrame(rows)
+    out['exp_cal'] = cal.exp(out['exp_raw'].to_numpy()).round(2)
+    out['exp_raw'] = out['exp_raw'].round(2)
+    out['p_raw'] = p_raw[:, main_idx].round(3)
+    out['p_cal'] = p_cal[:, main_idx].round(3)
+    for j, line in enumerate(lines):
+        tag = f'{line:g}'.replace('.', '_')
+        out[f'p_raw_{tag}'] = p_raw[:, j].round(3)
+        out[f'p_cal_{tag}'] = p_cal[:, j].round(3)
+    return out
+
+
+def project_slate(sched: pd.DataFrame, proj_date: str, lines: np.ndarray, main_line: float,
+                  n_sims: int, cal: Calibration, rates: RateIndex, cache: SideCache | None = None,
+                  refresh: bool = False, progress: bool = True,
+                  leash: Leash | None = None, sequence: str = 'order', matchup: str = 'log5',
+                  matchups: MatchupIndex | None = None,
+                  platoon: PlatoonIndex | None = None) -> tuple[pd.DataFrame, list[tuple]]:
+    """
+    Project and calibrate every side of `sched`. With a cache, only sides
+    whose fingerprint is not stored yet are simulated (all of them with
+    `refresh`, overwriting the stored results), SIDE_BATCH sides per
+    sim_batch call. Their matchup tables come from `matchups` when given
+    (kept by fingerprint across calls); with `platoon`, log5 in batting
+    order uses the sides' handed splits.
+    Returns (projections, [(game_id, side) recomputed]).
+    """
+    season = proj_date[:4]
+    engine = engine_tag(sequence, matchup)
+    matchups = matchups or MatchupIndex()
+    sides = []
+    for g in sched.itertuples(index=False):
+        for side in ('away', 'home'):
+            pid = int(getattr(g, f'{side}_pid'))
+            lineup = [int(x) for x in getattr(g, f'{side}_lineup').split(',') if x]
+            sides.append((g.game_id, side, pid, lineup, side_rates(pid, lineup, season, rates)))
+    outs_pmf = (leash or Leash()).pmf([s[2] for s in sides], season)
+    splits = {}
+    if platoon and sides and sequence == 'order' and matchup == 'log5':
+        splits = platoon.side_splits([s[2] for s in sides], [s[3] for s in sides],
+                                     np.vstack([s[4] for s in sides]), season)
+    rows_of = [{k: v[i] for k, v in splits.items()} for i in range(len(sides))]
+    sides = [(game_id, side, pid, p_rates, pmf, sp,
+              fingerprint(pid, lineup, p_rates, pmf, lines, n_sims, engine, sp))
+             for (game_id, side, pid, lineup, p_rates), pmf, sp in zip(sides, outs_pmf, rows_of)]
+
+    known = cache.get_many([s[-1] for s in sides]) if cache and not refresh else {}
+    todo = [s for s in sides if s[-1] not in known]
+    fresh = {}
+    if todo:
+        from tqdm import tqdm
+        unique = list({fp: (p_rates, pmf, sp) for *_, p_rates, pmf, sp, fp in todo}.items())
+        pbar = tqdm(total=len(unique), desc='⏱️ Simulating sides ⚾', unit='side', disable=not progress)
+        for i in range(0, len(unique), SIDE_BATCH):
+            batch = unique[i:i + SIDE_BATCH]
+            p_rates = np.vstack([r for _, (r, _, _) in batch])
+            batch_splits = {k: np.vstack([sp[k] for _, (_, _, sp) in batch]) for k in splits}
+            slots = (matchups.table([fp for fp, _ in batch], p_rates, matchup, **batch_splits)
+                     if sequence == 'order' else None)
+            exp_raw, p_raw = simulate_sides(p_rates, np.vstack([o for _, (_, o, _) in batch]), lines, n_sims,
+                                            sequence=sequence, slots=slots)
+            fresh.update({fp: (float(e), p) for (fp, _), e, p in zip(batch, exp_raw, p_raw)})
+            pbar.update(len(batch))
+        pbar.close()
+    if cache:
+        cache.put_many([(fp, pid, engine, *fresh[fp]) for _, _, pid, *_, fp in todo])
+
+    results = {**known, **fresh}
+    rows = [{'game_id': game_id, 'side': side, 'pitcher_id': pid, 'exp_raw': results[fp][0]}
+            for game_id, side, pid, *_, fp in sides]
+    p_raw = np.vstack([results[fp][1] for *_, fp in sides])
+    recomputed = [(game_id, side) for game_id, side, *_ in todo]
+    return calibrate_slate(rows, p_raw, lines, main_line, cal), recomputed
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Project K totals for games on a given date 🚀'
@@ -102,68 +312,72 @@ def main():
         '--date', type=str, help='Date YYYY-MM-DD; defaults to today 📅', required=False
     )
     parser.add_argument(
-        '--line', type=float, default=6.5, help='Innings threshold for probability ⚾'
+        '--line', type=float, default=6.5, help='Main K line for p_raw / p_cal ⚾'
+    )
+    parser.add_argument(
+        '--lines', type=float, nargs='*', default=[],
+        help='Extra priced K lines, e.g. 4.5 5.5 7.5 💵'
     )
     parser.add_argument(
         '--sims', type=int, default=10000, help='Number of simulation trials 🎲'
     )
+    parser.add_argument(
+        '--sequence', choices=SEQUENCES, default='order',
+        help='PA order: batting order (slot = PA mod 9) or a uniform draw from the pool 🔢'
+    )
+    parser.add_argument(
+        '--matchup', choices=MATCHUPS, default='log5',
+        help='How pitcher and batter rates combine in batting order 🤝'
+    )
+    parser.add_argument(
+        '--platoon', action='store_true',
+        help='Use handed K splits in the log5 matchups (python platoon.py build) ✋'
+    )
+    parser.add_argument(
+        '--calibration', choices=ARTIFACTS, default='batch',
+        help='Calibration to apply: calibrate.py (batch) or online_calibrate.py (online) 📐'
+    )
+    parser.add_argument(
+        '--no-cache', action='store_true', help='Re-simulate every side, overwriting cached results ♻️'
+    )
     args = parser.parse_args()
-    proj_date = args.date or pd.Timestamp.now().date().isoformat()
+    proj_date = args.date or _date.today().isoformat()
 
     # Load schedule
-    sched_db = DATA_DIR / 'schedule.duckdb'
-    sched = fetch_schedule_from_db(sched_db, proj_date)
-    if sched.empty:
-        print(f"No schedule in DB for {proj_date}, fetching live 🛰️")
-        sched = fetch_schedule_live(proj_date)
-    sched = sched.dropna(subset=['away_pid', 'home_pid', 'away_lineup', 'home_lineup'])
+    sched = load_schedule(proj_date)
     if sched.empty:
         print(f"No valid games for {proj_date}. Exiting ❌")
         return
 
-    # Load calibration from pickle
-    lin_pkl = MODEL_DIR / 'mlb_exp_lin.pkl'
-    if not lin_pkl.exists():
-        raise FileNotFoundError(f"Calibration pickle not found: {lin_pkl}")
-    slope, intercept = load_calibration(lin_pkl)
-    print(f"🔄 Using calibration: E[K]_cal = {slope:.4f} * E[K]_raw + {intercept:.4f} 📈")
+    # Load calibration artifact
+    cal = load_calibration(artifact_path(args.calibration))
+    print(f"🔄 Using {args.calibration} calibration: E[K]_cal = {cal.slope:.4f} * E[K]_raw + {cal.intercept:.4f} 📈")
+    lines = priced_lines(args.line, args.lines)
+    uncalibrated = [f'{line:g}' for line in lines if cal.iso_map(line) is None]
+    if cal.has_isotonic:
+        print(f"🔄 Isotonic P(over) maps at lines {', '.join(f'{line:g}' for line in cal.lines)} 📈")
+    if uncalibrated:
+        print(f"⚠️  No isotonic map for line(s) {', '.join(uncalibrated)} – their p_cal is left empty")
 
-    outs_thresh = int(args.line * 3)
-    results = []
+    # Simulate each side, then calibrate the whole slate at once: (sides × lines)
+    leash = Leash()
+    if not leash.available:
+        print(f"⚠️  No leash table – every start runs {DEFAULT_OUTS} outs (python leash.py build)")
 
-    # Progress bar over each side
-    games = list(sched.itertuples(index=False))
-    total_sides = len(games) * 2
-    pbar = tqdm(total=total_sides, desc='⏱️ Simulating sides ⚾', unit='side')
-
-    for g in games:
-        for side in ('away', 'home'):
-            pid = int(getattr(g, f'{side}_pid'))
-            lineup = [int(x) for x in getattr(g, f'{side}_lineup').split(',') if x]
-            season = proj_date[:4]
-            rp = fetch_k_rate(pid, season, 'pitcher') or DEFAULT
-            batter_ps = [fetch_k_rate(b, season, 'batter') or DEFAULT for b in lineup]
-            p_rates = np.array([rp] + batter_ps, dtype=float)
-            sims = sim_many(p_rates, outs_thresh, args.sims)
-            er_raw = float(sims.mean())
-            pr_raw = float((sims >= outs_thresh).mean())
-            er_cal = slope * er_raw + intercept
-            results.append({
-                'game_id': g.game_id,
-                'side': side,
-                'pitcher_id': pid,
-                'exp_raw': round(er_raw, 2),
-                'p_raw': round(pr_raw, 3),
-                'exp_cal': round(er_cal, 2),
-                'p_cal': round(pr_raw, 3),
-            })
-            pbar.update(1)
-    pbar.close()
+    cache = SideCache()
+    try:
+        out, recomputed = project_slate(sched, proj_date, lines, args.line, args.sims, cal,
+                                        RateIndex(), cache, refresh=args.no_cache, leash=leash,
+                                        sequence=args.sequence, matchup=args.matchup,
+                                        platoon=PlatoonIndex() if args.platoon else None)
+    finally:
+        cache.close()
+    print(f"🔁 Recomputed {len(recomputed)}/{len(out)} sides"
+          + (": " + ", ".join(f"{gid} {side}" for gid, side in recomputed) if recomputed else ""))
 
     # Save today's projections with date embedded
-    out_path = DATA_DIR / f'today_ks_proj_{proj_date}.csv'
-    pd.DataFrame(results).to_csv(out_path, index=False)
-    print(f"✅ Projections saved to {out_path}")
+    out_path = write_table(out, f'today_ks_proj_{proj_date}', csv=True, data_dir=DATA_DIR)
+    print(f"✅ Projections saved to {out_path} (+ .csv)")
 
 if __name__ == '__main__':
     main()
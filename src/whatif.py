@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+whatif.py
+---------
+What-if sensitivity of one side's projection: sit a batter, swap one in,
+or let the pitcher go more/fewer outs, and see how far E[K] and
+P(K ≥ line) move.
+
+As in today_proj and backtest, each trial's baseline outs target is drawn
+from the pitcher's leash distribution (leash.py; --innings fixes it
+instead), and --outs-delta shifts that per-trial target.
+
+The baseline and every perturbed scenario are simulated in one pass of
+k_pred_core.sim_common, so all of them share the same random stream
+(common random numbers). Trial j is the same game under each scenario,
+and the paired difference scenario − baseline is reported with a
+confidence interval from the per-trial differences. se_indep is what the
+same trials would give if each scenario were an independent rerun;
+trials_saved = (se_indep / se)² is how many times more trials separate
+runs would need for the same precision. With the default batting-order
+sequencing (--sequence order) a swap counts with its slot's share of PAs.
+
+Usage (from src/):
+  python whatif.py --pitcher 607192 --lineup 605141,660271,... --date 2025-07-11 \\
+      --sit 3 --sit 5=669257 --outs-delta 3 -3 [--sims 2000] [--lines 5.5 7.5]
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import date as _date
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from k_pred_core import SEQUENCES, pa_table, sample_outs, sim_common
+from leash import DEFAULT_OUTS, Leash
+from matchup import MATCHUPS, slot_rates
+from today_proj import DEFAULT, RateIndex, priced_lines, side_rates
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+Z = 1.96  # 95% normal interval
+
+
+def scenarios(base_rates: np.ndarray, sits: list[tuple[int, float]] = (),
+              outs_deltas: list[int] = ()) -> list[tuple[str, np.ndarray, int]]:
+    """
+    (name, rates, outs shift) per scenario, baseline first.
+    sits: (lineup slot 1–9, replacement k_rate); outs_deltas: extra outs.
+    """
+    out = [("baseline", base_rates, 0)]
+    for slot, rate in sits:
+        rates = base_rates.copy()
+        rates[slot] = rate  # index 0 is the pitcher
+        out.append((f"slot {slot} → {rate:.3f}", rates, 0))
+    for d in outs_deltas:
+        out.append((f"outs {d:+d}", base_rates, d))
+    return out
+
+
+def compare(scens: list[tuple[str, np.ndarray, int]], base_outs, n: int, lines: np.ndarray,
+            seed: int | None = None, z: float = Z, sequence: str = "order",
+            matchup: str = "log5") -> pd.DataFrame:
+    """
+    Simulate all scenarios on common random numbers → paired effects vs the first.
+    base_outs: a fixed outs target, or the pitcher's leash pmf; its per-trial
+    draws are shared by every scenario and shifted by the scenario's delta.
+    """
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    if np.ndim(base_outs):
+        base_outs = sample_outs(base_outs, n, rng)[0]
+    outs = np.maximum(np.atleast_1d(base_outs)[None, :] + np.array([d for *_, d in scens])[:, None], 0)
+    P = np.vstack([r for _, r, _ in scens])
+    pks = pa_table(P, sequence, slot_rates(P, matchup) if sequence == "order" else None)
+    ks = sim_common(pks, outs, n, rng, ordered=sequence == "order")
+    base = ks[0]
+    rows = []
+    for (name, _, _), k, o in zip(scens, ks, outs):
+        d = k - base
+        se = d.std(ddof=1) / np.sqrt(n)
+        se_indep = np.sqrt((k.var(ddof=1) + base.var(ddof=1)) / n)
+        row = {
+            "scenario": name, "outs": o.mean(), "exp_ks": k.mean(),
+            "d_exp": d.mean(), "ci_lo": d.mean() - z * se, "ci_hi": d.mean() + z * se,
+            "se": se, "se_indep": se_indep,
+            "trials_saved": (se_indep / se) ** 2 if se > 0 else np.nan,
+        }
+        for line in lines:
+            tag = f"{line:g}".replace(".", "_")
+            hit = (k >= line).astype(float) - (base >= line)
+            row[f"p_{tag}"] = (k >= line).mean()
+            row[f"d_p_{tag}"] = hit.mean()
+            row[f"se_p_{tag}"] = hit.std(ddof=1) / np.sqrt(n)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def parse_sit(spec: str) -> tuple[int, int | None]:
+    """'3' (slot 3 sits, league-average bat) or '3=669257' (that batter replaces slot 3)."""
+    slot, _, pid = spec.partition("=")
+    if not 1 <= int(slot) <= 9:
+        raise argparse.ArgumentTypeError(f"slot must be 1–9, got {slot}")
+    return int(slot), int(pid) if pid else None
+
+
+def main():
+    p = argparse.ArgumentParser(description="What-if sensitivity of a side's K projection 🔀")
+    p.add_argument("--pitcher", type=int, required=True)
+    p.add_argument("--lineup", required=True, help="Comma-separated batter ids in batting order")
+    p.add_argument("--date", help="YYYY-MM-DD (season of the rates); defaults to today")
+    p.add_argument("--innings", type=float, help="Fixed baseline innings (outs = 3×) instead of the leash")
+    p.add_argument("--sit", type=parse_sit, action="append", default=[],
+                   help="SLOT or SLOT=BATTER_ID: bench that slot (repeatable)")
+    p.add_argument("--outs-delta", type=int, nargs="*", default=[], help="Outs added to the baseline, e.g. 3 -3")
+    p.add_argument("--sequence", choices=SEQUENCES, default="order", help="PA order in the simulator")
+    p.add_argument("--matchup", choices=MATCHUPS, default="log5", help="Pitcher × batter rule in batting order")
+    p.add_argument("--line", type=float, default=6.5)
+    p.add_argument("--lines", type=float, nargs="*", default=[])
+    p.add_argument("--sims", type=int, default=2000, help="Trials shared by every scenario 🎲")
+    p.add_argument("--seed", type=int)
+    p.add_argument("--out", type=Path, help="Also write the table to this CSV")
+    args = p.parse_args()
+
+    season = (args.date or _date.today().isoformat())[:4]
+    lineup = [int(b) for b in args.lineup.split(",") if b]
+    rates = RateIndex()
+    base = side_rates(args.pitcher, lineup, season, rates)
+    sits = [(slot, rates.rates([pid], season, "batter")[0] if pid else DEFAULT) for slot, pid in args.sit]
+    scens = scenarios(base, sits, args.outs_delta)
+    if len(scens) == 1:
+        p.error("nothing to compare: give --sit and/or --outs-delta")
+    if args.innings is not None:
+        base_outs = int(round(args.innings * 3))
+    else:
+        leash = Leash()
+        if not leash.available:
+            print(f"⚠️  No leash table – the baseline runs {DEFAULT_OUTS} outs (python leash.py build)")
+        base_outs = leash.pmf([args.pitcher], season)[0]
+
+    table = compare(scens, base_outs, args.sims, priced_lines(args.line, args.lines), args.seed,
+                    sequence=args.sequence, matchup=args.matchup)
+    print(table.round(3).to_string(index=False))
+    if args.out:
+        table.to_csv(args.out, index=False)
+        print(f"✅ Saved → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the pipeline modules are flat scripts in src/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
@@ -0,0 +1,35 @@
+"""Calibration artifact: one isotonic map per line, never borrowed across lines."""
+import json
+
+import numpy as np
+import pytest
+
+import calibration
+from calibration import Calibration
+
+
+def test_each_line_uses_its_own_map_or_nan():
+    cal = Calibration(isotonic={6.5: ([0.0, 1.0], [0.1, 0.9]), 5.5: ([0.0, 1.0], [0.0, 1.0])})
+    p_raw = np.array([[0.5, 0.5, 0.5]])
+    p_cal = cal.p_over_lines(p_raw, [4.5, 5.5, 6.5])
+    assert np.isnan(p_cal[0, 0])  # no 4.5 map: no calibrated value, not the raw one
+    assert p_cal[0, 1] == pytest.approx(0.5)
+    assert p_cal[0, 2] == pytest.approx(0.5 * 0.8 + 0.1)
+    assert cal.lines == [5.5, 6.5]
+
+
+def test_round_trip_and_version_1(tmp_path):
+    cal = Calibration(2.0, -1.0, {6.5: ([0.2, 0.8], [0.3, 0.7])}, meta={"source": "test"})
+    back = calibration.load(calibration.save(cal, tmp_path / "calibration.json"))
+    assert back.slope == 2.0 and back.lines == [6.5]
+    assert back.p_over(0.5, 6.5) == pytest.approx(0.5)
+
+    v1 = {"version": 1, "meta": {}, "linear": {"slope": 1.0, "intercept": 0.0},
+          "isotonic": {"line": 5.5, "x": [0.0, 1.0], "y": [0.2, 0.6]}}
+    (tmp_path / "v1.json").write_text(json.dumps(v1))
+    old = calibration.load(tmp_path / "v1.json")
+    assert old.lines == [5.5] and np.isnan(old.p_over(0.5, 6.5))
+
+    v1["isotonic"]["line"] = None  # cannot tell which line it was fitted on
+    (tmp_path / "v1.json").write_text(json.dumps(v1))
+    assert not calibration.load(tmp_path / "v1.json").has_isotonic
@@ -0,0 +1,21 @@
+"""data_io: an artifact's column types do not depend on Parquet vs CSV."""
+import pandas as pd
+
+import data_io
+
+
+def test_csv_fallback_uses_schema_types(tmp_path):
+    csv = tmp_path / "historical_ks.csv"
+    csv.write_text("game_pk,date,k_actual,extra\n1,2024-03-20,5,1.5\n2,2024-03-21,7,2\n")
+    from_csv = data_io.read_table(csv)
+    assert from_csv["date"].tolist() == ["2024-03-20", "2024-03-21"]  # not sniffed as DATE
+
+    out = data_io.write_table(from_csv, "historical_ks", data_dir=tmp_path)
+    from_parquet = data_io.read_table(out)
+    pd.testing.assert_frame_equal(from_csv, from_parquet)
+
+
+def test_csv_without_schema_columns_reads_as_before(tmp_path):
+    csv = tmp_path / "notes.csv"
+    csv.write_text("a,b\n1,x\n")
+    assert data_io.read_table(csv).to_dict("records") == [{"a": 1, "b": "x"}]
@@ -0,0 +1,55 @@
+"""harvest pipeline: a failing writer stops the workers instead of hanging them."""
+import threading
+
+import pytest
+
+import harvest
+from boxscore_archive import TokenBucket
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    monkeypatch.setattr(harvest, "fetch_boxscore", lambda gid, day, season, limiter=None: {"gid": gid})
+    monkeypatch.setattr(harvest, "parse_game", lambda box, gid, day, season, skips: ([], []))
+    con = harvest.stage_connect(tmp_path / "harvest.duckdb")
+    jobs = [(pk, f"2025-07-{pk % 28 + 1:02d}", "2025") for pk in range(500)]
+    yield con, jobs
+    con.close()
+
+
+def run(con, jobs, timeout: float = 20.0):
+    """harvest() in a thread, so a hang fails the test instead of the run."""
+    outcome = {}
+
+    def target():
+        try:
+            outcome["skips"] = harvest.harvest(con, jobs, TokenBucket(1e6), 4, 2, batch_size=10)
+        except Exception as e:
+            outcome["error"] = e
+
+    t = threading.Thread(target=target, daemon=True)
+    t.start()
+    t.join(timeout)
+    assert not t.is_alive(), "harvest hung"
+    return outcome
+
+
+def test_checkpoint_error_is_raised_not_hung(pipeline, monkeypatch):
+    con, jobs = pipeline
+
+    def disk_full(*args):
+        raise OSError("No space left on device")
+    monkeypatch.setattr(harvest, "checkpoint", disk_full)
+    assert "No space left" in str(run(con, jobs)["error"])
+
+
+def test_pipeline_marks_every_game(pipeline):
+    con, jobs = pipeline
+    assert run(con, jobs)["skips"]["box_err"] == 0
+    assert con.execute("SELECT count(*) FROM harvest_progress").fetchone()[0] == len(jobs)
+
+
+@pytest.mark.parametrize("rate", [0, -1])
+def test_token_bucket_rejects_non_positive_rates(rate):
+    with pytest.raises(ValueError):
+        TokenBucket(rate)
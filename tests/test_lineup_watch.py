@@ -0,0 +1,86 @@
+"""lineup_watch: the diff rules and a watcher that survives failed polls."""
+import json
+import sys
+
+import pandas as pd
+import pytest
+
+import lineup_watch as lw
+
+LINEUP = ",".join(map(str, range(100, 109)))
+
+
+def rows(*recs) -> pd.DataFrame:
+    return pd.DataFrame([{"official_date": "2025-07-10", **r} for r in recs], columns=lw.COLUMNS)
+
+
+def game(gid, away_pid=10, home_pid=20, away_lineup=LINEUP, home_lineup=LINEUP) -> dict:
+    return {"game_id": gid, "away_pid": away_pid, "home_pid": home_pid,
+            "away_lineup": away_lineup, "home_lineup": home_lineup}
+
+
+def test_empty_polled_values_never_overwrite_stored_ones():
+    old = rows(game(1))
+    changes, merged = lw.diff(old, rows(game(1, away_pid=None, home_lineup="")))
+    assert changes == []
+    assert merged.iloc[0]["away_pid"] == 10 and merged.iloc[0]["home_lineup"] == LINEUP
+
+
+def test_pitcher_change_is_a_change():
+    changes, merged = lw.diff(rows(game(1)), rows(game(1, home_pid=21)))
+    assert changes == [{"game_id": 1, "side": "home", "field": "pitcher", "old": 20, "new": 21}]
+    assert merged.iloc[0]["home_pid"] == 21
+
+
+def test_new_game_and_posted_lineup_are_changes():
+    old = rows(game(1, away_lineup=""))
+    changes, _ = lw.diff(old, rows(game(1), game(2, away_pid=None, home_pid=None, away_lineup="", home_lineup="")))
+    assert [(c["game_id"], c["field"]) for c in changes] == [(1, "lineup")]
+
+
+def test_games_no_longer_watched_are_kept():
+    changes, merged = lw.diff(rows(game(1), game(2, away_pid=30)), rows(game(1)))
+    assert changes == []
+    assert sorted(merged["game_id"]) == [1, 2]
+    assert merged.set_index("game_id").loc[2, "away_pid"] == 30
+
+
+def test_failed_store_is_retried_on_the_next_poll(tmp_path, monkeypatch):
+    polls = {"n": 0}
+
+    def get(self, url):
+        # the server answers 304 to any revalidation, so only a dropped ETag refetches
+        polls["n"] += 1
+        if self.validators.get(url):
+            return None
+        self.validators[url] = {"If-None-Match": "etag"}
+        return {"dates": []}
+
+    stored = []
+
+    def store(db_path, d, merged):
+        if not stored:
+            stored.append(None)
+            raise OSError("Could not set lock on file")  # e.g. today_proj holding schedule.duckdb
+        stored.append(merged)
+
+    sleeps = {"n": 0}
+
+    def sleep(seconds):
+        sleeps["n"] += 1
+        if sleeps["n"] == 3:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(lw.ConditionalFetcher, "get", get)
+    monkeypatch.setattr(lw, "load_current", lambda db_path, d: rows(game(1)))
+    monkeypatch.setattr(lw, "parse_schedule", lambda resp, d: rows(game(1, home_pid=21)))
+    monkeypatch.setattr(lw, "store", store)
+    monkeypatch.setattr(lw.time, "sleep", sleep)
+    out = tmp_path / "changes.jsonl"
+    monkeypatch.setattr(sys, "argv", ["lineup_watch.py", "--date", "2025-07-10", "--no-project",
+                                      "--interval", "0", "--out", str(out)])
+    lw.main()
+
+    assert polls["n"] == 3 and len(stored) == 2  # failed once, stored on the retry
+    events = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [e["event"] for e in events] == ["change"] and events[0]["new"] == 21
@@ -0,0 +1,67 @@
+"""log5 matchups (matchup.py) and the handed inputs built for them (platoon.matchup_splits)."""
+import numpy as np
+import pytest
+
+from matchup import LEAGUE_K, MatchupIndex, log5, matchup_matrix, slot_rates
+from platoon import matchup_splits
+
+
+def test_log5_identities():
+    assert log5(0.30, LEAGUE_K) == pytest.approx(0.30)
+    assert log5(LEAGUE_K, 0.18) == pytest.approx(0.18)
+    assert log5(0.30, 0.20) == pytest.approx(log5(0.20, 0.30))
+    assert log5(0.30, 0.30) > 0.30  # two strikeout-prone sides compound
+    assert log5(0.30, 0.30, league=0.30) == pytest.approx(0.30)
+
+
+def test_log5_is_monotone_and_bounded():
+    p = np.linspace(0.0, 1.0, 11)
+    out = log5(p[:, None], p[None, :])
+    assert ((out >= 0) & (out <= 1)).all()
+    assert (np.diff(out, axis=0) >= 0).all() and (np.diff(out, axis=1) >= 0).all()
+
+
+def test_matchup_matrix_shapes_and_overrides():
+    P = np.array([[0.30] + [0.20] * 9, [0.22] + [0.25] * 9])
+    table = matchup_matrix(P)
+    assert table.shape == (2, 9)
+    np.testing.assert_allclose(table[0], log5(0.30, 0.20))
+    batter_vs = np.full((2, 9), LEAGUE_K)
+    np.testing.assert_allclose(matchup_matrix(P, batter_vs=batter_vs), P[:, :1].repeat(9, axis=1))
+    np.testing.assert_allclose(slot_rates(P, "pool"), (P[:, :1] + P[:, 1:]) / 2)
+    with pytest.raises(ValueError):
+        slot_rates(P, "nope")
+
+
+def test_matchup_index_is_an_lru():
+    P = np.array([[0.30] + [0.20] * 9, [0.22] + [0.25] * 9, [0.26] + [0.21] * 9])
+    index = MatchupIndex(max_rows=2)
+    np.testing.assert_allclose(index.table(["a", "b", "c"], P), matchup_matrix(P))  # a call larger than the bound
+    assert len(index) == 2
+    index.table(["b"], P[1:2])  # b is now the most recent; a new side evicts c
+    index.table(["d"], P[:1])
+    assert set(index._rows) == {"b", "d"}
+
+
+def test_matchup_splits_picks_each_batters_side():
+    P = np.array([[0.25] + [0.20] * 9])
+    bats = np.array([["L", "R", "S", "", "L", "R", "S", "L", "R"]])
+    pitcher_split = np.array([[0.30, 0.20]])          # vs L, vs R
+    batter_split = np.tile([0.15, 0.25], (1, 9, 1))    # every batter: vs L, vs R
+    batter_split[0, 4] = np.nan                        # no splits for slot 5
+    league = np.array([[0.21, 0.24], [0.26, 0.23]])    # throws L/R × stands L/R
+    sp = matchup_splits(P, np.array(["L"]), bats, pitcher_split, batter_split, league, LEAGUE_K)
+
+    # a left-handed pitcher: switch hitters stand right, unknown hands count as R
+    stands_r = np.array([False, True, True, True, False, True, True, False, True])
+    np.testing.assert_allclose(sp["pitcher_vs"][0], np.where(stands_r, 0.20, 0.30))
+    np.testing.assert_allclose(sp["league"][0], np.where(stands_r, 0.24, 0.21))
+    # batters face a lefty; slot 5 falls back to its overall rate
+    np.testing.assert_allclose(sp["batter_vs"][0], [0.15] * 4 + [0.20] + [0.15] * 4)
+
+
+def test_matchup_splits_without_tables_reduces_to_plain_log5():
+    P = np.array([[0.27] + list(np.linspace(0.15, 0.31, 9))])
+    sp = matchup_splits(P, np.array([""]), np.full((1, 9), ""), np.full((1, 2), np.nan),
+                        np.full((1, 9, 2), np.nan), np.full((2, 2), np.nan), LEAGUE_K)
+    np.testing.assert_allclose(matchup_matrix(P, **sp), matchup_matrix(P))
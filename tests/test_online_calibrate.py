@@ -0,0 +1,84 @@
+"""online_calibrate: reruns of cache_predictions never fold a start twice."""
+import json
+import sys
+
+import pandas as pd
+import pytest
+
+import calibration
+import online_calibrate
+import prediction_store as ps
+
+
+def preds(exp_raw: float = 5.0) -> pd.DataFrame:
+    return pd.DataFrame({
+        "date": ["2025-07-10"] * 2, "game_id": [1, 1], "side": ["away", "home"],
+        "pitcher_id": [10, 20], "exp_raw": [exp_raw, 6.0], "p_raw": [0.4, 0.5],
+        "exp_cal": [5.1, 6.1], "p_cal": [0.41, 0.51],
+    })
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    truth = tmp_path / "historical_ks.parquet"
+    pd.DataFrame({"game_pk": [1, 1], "side": ["away", "home"], "pitcher_id": [10, 20],
+                  "k_actual": [4, 8]}).to_parquet(truth)
+    store, models = tmp_path / "predictions.duckdb", tmp_path / "models"
+
+    def cache(df: pd.DataFrame) -> None:
+        con = ps.connect(store)
+        ps.upsert(con, df)
+        con.close()
+
+    def run() -> dict:
+        monkeypatch.setattr(sys, "argv", ["online_calibrate.py", "--store", str(store), "--truth", str(truth),
+                                          "--models", str(models), "--no-plots"])
+        online_calibrate.main()
+        with (models / online_calibrate.STATE_NAME).open() as f:
+            return json.load(f)
+
+    return cache, run
+
+
+def test_rerun_with_same_values_is_not_refolded(env):
+    cache, run = env
+    cache(preds())
+    before = run()["linear"]
+    assert before["n"] == 2
+    cache(preds())  # cache_predictions rerun for the same date
+    after = run()["linear"]
+    assert after == before
+
+
+def test_rerun_with_new_values_rebuilds(env):
+    cache, run = env
+    cache(preds())
+    run()
+    cache(preds(exp_raw=5.5))
+    lin = run()["linear"]
+    assert lin["n"] == 2
+    assert lin["sx"] == pytest.approx(5.5 + 6.0)
+    assert run()["linear"] == lin  # flags cleared, nothing left to fold
+
+
+def test_every_priced_line_gets_its_own_map(env, tmp_path):
+    cache, run = env
+    cache(ps.pack_lines(preds().assign(p_raw_5_5=[0.6, 0.7], p_raw_6_5=[0.4, 0.5])))
+    bins = run()["prob"]["lines"]
+    assert set(bins) == {"5.5", "6.5"}
+    # k_actual 4 / 8: one hit at 5.5 (the 8), one at 6.5
+    assert sum(bins["5.5"]["hits"]) == 1 and sum(bins["6.5"]["count"]) == 2
+    cal = calibration.load(calibration.artifact_path("online", tmp_path / "models"))
+    assert cal.lines == [5.5, 6.5]
+
+
+def test_online_fit_leaves_the_batch_artifact_alone(env, tmp_path):
+    cache, run = env
+    batch = calibration.artifact_path("batch", tmp_path / "models")
+    batch.parent.mkdir()
+    calibration.save(calibration.Calibration(2.0, 1.0, meta={"source": "calibrate"}), batch)
+    before = batch.read_text()
+    cache(preds())
+    run()
+    assert batch.read_text() == before
+    assert calibration.load(calibration.artifact_path("online", tmp_path / "models")).meta["source"] == "online_calibrate"
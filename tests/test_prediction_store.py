@@ -0,0 +1,66 @@
+"""prediction_store round trip: upsert → settled_pairs → mark_trained."""
+import pandas as pd
+import pytest
+
+import prediction_store as ps
+
+
+def preds(k_offset: float = 0.0) -> pd.DataFrame:
+    return pd.DataFrame({
+        "date": ["2025-07-10", "2025-07-10", "2025-07-11"], "game_id": [1, 1, 2],
+        "side": ["away", "home", "away"], "pitcher_id": [10, 20, 30],
+        "exp_raw": [5.0 + k_offset, 6.0, 7.0], "p_raw": [0.4, 0.5, 0.6],
+        "exp_cal": [5.1, 6.1, 7.1], "p_cal": [0.41, 0.51, 0.61],
+    })
+
+
+@pytest.fixture
+def store(tmp_path):
+    # only game 1 has settled; game 2 has no truth row yet
+    truth = tmp_path / "historical_ks.parquet"
+    pd.DataFrame({"game_pk": [1, 1], "side": ["away", "home"], "pitcher_id": [10, 20],
+                  "k_actual": [4, 8]}).to_parquet(truth)
+    con = ps.connect(tmp_path / "predictions.duckdb")
+    yield con, truth
+    con.close()
+
+
+def test_round_trip(store):
+    con, truth = store
+    assert ps.upsert(con, preds()) == 3
+    assert ps.upsert(con, preds()) == 3  # rerun of the slate replaces, never duplicates
+    assert con.execute("SELECT count(*) FROM predictions").fetchone()[0] == 3
+
+    pairs = ps.settled_pairs(con, truth)
+    assert sorted(zip(pairs["side"], pairs["k_actual"])) == [("away", 4), ("home", 8)]
+
+    ps.mark_trained(con, pairs)
+    assert ps.settled_pairs(con, truth).empty
+    assert len(ps.settled_pairs(con, truth, only_new=False)) == 2
+    ps.mark_trained(con, pairs.iloc[:0])  # nothing to mark is a no-op
+
+
+def test_reupsert_keeps_unchanged_rows_trained(store):
+    con, truth = store
+    ps.upsert(con, preds())
+    ps.mark_trained(con, ps.settled_pairs(con, truth))
+    ps.upsert(con, preds())  # same slate again
+    assert ps.settled_pairs(con, truth).empty
+    assert ps.superseded(con) == 0
+
+    ps.upsert(con, preds(k_offset=0.5))  # only the away start changed
+    pairs = ps.settled_pairs(con, truth)
+    assert list(pairs["side"]) == ["away"]
+    assert pairs["exp_raw"].iloc[0] == pytest.approx(5.5)
+    assert ps.superseded(con) == 1
+    ps.clear_superseded(con)
+    assert ps.superseded(con) == 0
+
+
+def test_model_versions_are_kept_apart(store):
+    con, truth = store
+    ps.upsert(con, preds(), model_version="v1")
+    ps.upsert(con, preds(), model_version="v2")
+    ps.mark_trained(con, ps.settled_pairs(con, truth, model_version="v1"))
+    left = ps.settled_pairs(con, truth)
+    assert set(left["model_version"]) == {"v2"} and len(left) == 2
@@ -0,0 +1,92 @@
+"""proj_service against a stubbed schedule source, over real HTTP."""
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import proj_service
+import today_proj
+from calibration import Calibration, save
+
+LINEUP = list(range(100, 109))
+
+
+class Rates(today_proj.RateIndex):
+    def table(self, season, role):
+        return {}
+
+
+def stub_schedule(proj_date: str) -> pd.DataFrame:
+    return pd.DataFrame({"game_id": [1], "away_pid": [10], "home_pid": [20],
+                         "away_lineup": [",".join(map(str, LINEUP))],
+                         "home_lineup": [",".join(map(str, range(200, 209)))]})
+
+
+@pytest.fixture
+def server(tmp_path):
+    cal_path = save(Calibration(), tmp_path / "calibration.json")
+    service = proj_service.ProjectionService(schedule_source=stub_schedule, cal_path=cal_path,
+                                             n_sims=200, max_sides=2)
+    service.rates = Rates()
+    srv = proj_service.make_server(service, port=0)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield service, f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def request(url: str, body=None) -> tuple[int, dict]:
+    data = None if body is None else (body if isinstance(body, bytes) else json.dumps(body).encode())
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data, method="POST" if data else "GET")) as r:
+            return r.status, json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_projections_and_custom_side(server):
+    service, base = server
+    status, body = request(f"{base}/projections?date=2025-07-10")
+    assert status == 200 and body["n_sides"] == 2
+    assert {"exp_raw", "exp_cal", "p_raw", "p_cal"} <= set(body["projections"][0])
+
+    status, row = request(f"{base}/project", {"pitcher_id": 10, "lineup": LINEUP, "date": "2025-07-10",
+                                              "lines": [5.5]})
+    assert status == 200 and 0 <= row["p_raw_5_5"] <= 1
+
+
+@pytest.mark.parametrize("body", [
+    {"pitcher_id": 10, "lineup": []},
+    {"pitcher_id": 10, "lineup": LINEUP[:8]},
+    {"pitcher_id": 10, "lineup": LINEUP, "lines": "5.5"},
+    {"pitcher_id": 10, "lineup": LINEUP, "date": "bad"},
+    {"lineup": LINEUP},
+    b"not json",
+])
+def test_bad_project_requests_get_400(server, body):
+    _, base = server
+    status, payload = request(f"{base}/project", body)
+    assert status == 400 and "error" in payload
+
+
+def test_bad_date_and_failures(server, monkeypatch):
+    service, base = server
+    assert request(f"{base}/projections?date=bad")[0] == 400
+
+    def boom(proj_date):
+        raise RuntimeError("schedule down")
+    monkeypatch.setattr(service, "schedule_source", boom)
+    status, payload = request(f"{base}/projections?date=2025-07-11")
+    assert status == 500 and "schedule down" in payload["error"]
+
+
+def test_side_cache_is_bounded(server):
+    service, _ = server
+    for pid in range(5):
+        service.side(pid, LINEUP, "2025", np.array([6.5]))
+    assert len(service._sides) == 2
+    assert len(service.matchups) == 2  # slot tables are evicted with the sides
@@ -0,0 +1,32 @@
+"""Inverse-CDF outs sampling over row-shifted CDFs (k_pred_core.sample_outs)."""
+import numpy as np
+
+from k_pred_core import sample_outs
+
+
+def test_point_masses_stay_in_their_rows():
+    pmf = np.zeros((4, 31))
+    for i, outs in enumerate([0, 9, 18, 30]):
+        pmf[i, outs] = 1.0
+    draws = sample_outs(pmf, 1000, rng=0)
+    assert draws.shape == (4, 1000) and draws.dtype == np.int32
+    np.testing.assert_array_equal(draws, np.array([0, 9, 18, 30])[:, None].repeat(1000, axis=1))
+
+
+def test_frequencies_follow_each_rows_pmf():
+    rng = np.random.default_rng(5)
+    pmf = rng.random((6, 31)) ** 4
+    pmf[2, :15] = 0.0  # rows with empty ranges must not borrow from neighbours
+    pmf[3, 20:] = 0.0
+    draws = sample_outs(pmf * 7.0, 40000, rng=1)  # unnormalised input
+    expected = pmf / pmf.sum(axis=1, keepdims=True)
+    for row, p in zip(draws, expected):
+        freq = np.bincount(row, minlength=31) / row.size
+        assert np.abs(freq - p).max() < 0.01
+    assert draws[2].min() >= 15 and draws[3].max() < 20
+
+
+def test_seeded_draws_repeat():
+    pmf = np.full((2, 31), 1 / 31)
+    np.testing.assert_array_equal(sample_outs(pmf, 100, rng=3), sample_outs(pmf, 100, rng=3))
+    assert sample_outs(pmf[0], 10, rng=0).shape == (1, 10)
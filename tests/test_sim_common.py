@@ -0,0 +1,45 @@
+"""Common-random-number invariants of k_pred_core.sim_common."""
+import numpy as np
+import pytest
+
+from k_pred_core import sim_batch, sim_common, slot_table
+
+RATES = np.array([0.28, 0.22, 0.18, 0.31, 0.25, 0.20, 0.27, 0.24, 0.19, 0.30])
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_identical_rows_get_identical_trials(ordered):
+    pks = np.tile(slot_table(RATES) if ordered else RATES, (3, 1))
+    ks = sim_common(pks, 18, 500, rng=1, ordered=ordered)
+    assert (ks == ks[0]).all()
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_rows_do_not_depend_on_their_neighbours(ordered):
+    pks = slot_table(np.vstack([RATES, RATES * 1.3])) if ordered else np.vstack([RATES, RATES * 1.3])
+    alone = sim_common(pks[:1], 18, 500, rng=7, ordered=ordered)
+    together = sim_common(pks, 18, 500, rng=7, ordered=ordered)
+    np.testing.assert_array_equal(alone[0], together[0])
+
+
+def test_higher_rates_and_more_outs_never_lose_ks_per_trial():
+    base = slot_table(RATES)[0]
+    pks = np.vstack([base, base + 0.05, base])
+    ks = sim_common(pks, np.array([18, 18, 21]), 1000, rng=3, ordered=True)
+    assert (ks[1] >= ks[0]).all() and (ks[2] >= ks[0]).all()
+    assert ks[1].mean() > ks[0].mean()
+
+
+def test_per_trial_outs_and_zero_outs():
+    outs = np.vstack([np.full(200, 18), np.zeros(200, dtype=int)])
+    ks = sim_common(np.tile(RATES, (2, 1)), outs, 200, rng=0)
+    assert ks[1].sum() == 0
+    np.testing.assert_array_equal(ks[0], sim_common(RATES, 18, 200, rng=0)[0])
+
+
+def test_marginals_match_independent_sampling():
+    pks = slot_table(RATES)
+    crn = sim_common(pks, 18, 20000, rng=11, ordered=True)[0]
+    ind = sim_batch(pks, 18, 20000, rng=12, ordered=True)[0]
+    assert abs(crn.mean() - ind.mean()) < 0.1
+    assert abs(crn.std() - ind.std()) < 0.1
@@ -0,0 +1,108 @@
+"""Start-up budgets for the pipeline CLIs: imports via `python -X importtime`, cached reruns on the clock."""
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+HEAVY = {"pandas", "duckdb", "statsapi", "tqdm", "sklearn", "matplotlib", "requests"}
+IMPORT_BUDGET_S = 0.5
+CACHED_BUDGET_S = 2.0  # wall-clock for a fully cached today_proj.py rerun; ~1s locally, mostly pandas
+
+CACHED_RUN = """
+import sys
+import numpy as np
+import pandas as pd
+import today_proj as tp
+from calibration import Calibration
+
+class Rates(tp.RateIndex):
+    def table(self, season, role):
+        return {}
+
+class Cache:
+    def get_many(self, fps):
+        return {fp: (5.0, np.array([0.4])) for fp in fps}
+    def put_many(self, rows):
+        assert not rows
+
+sched = pd.DataFrame({"game_id": [1], "away_pid": [10], "home_pid": [20],
+                      "away_lineup": [",".join(map(str, range(100, 109)))],
+                      "home_lineup": [",".join(map(str, range(200, 209)))]})
+out, recomputed = tp.project_slate(sched, "2025-07-10", np.array([6.5]), 6.5, 100,
+                                   Calibration(), Rates(), Cache(), progress=False)
+assert len(out) == 2 and not recomputed
+print(",".join(m for m in ("statsapi", "tqdm") if m in sys.modules))
+"""
+
+
+def _importtime(*argv: str, cwd: Path = SRC) -> tuple[set[str], float, subprocess.CompletedProcess]:
+    """Run a script under -X importtime → (modules imported, top-level import seconds, process)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", *argv],
+                          cwd=cwd, capture_output=True, text=True)
+    modules, total_us = set(), 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum, name = line.split("|")
+        modules.add(name.strip())
+        if not name.startswith("  "):  # nested imports are indented under their parent
+            total_us += int(cum)
+    return modules, total_us / 1e6, proc
+
+
+@pytest.mark.parametrize("script", [
+    "today_proj.py", "calibrate.py", "online_calibrate.py", "proj_service.py",
+    "lineup_watch.py", "cal_report.py",
+])
+def test_help_skips_heavy_imports(script: str) -> None:
+    modules, seconds, proc = _importtime(script, "--help")
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    assert not HEAVY & modules, f"{script} --help imported {sorted(HEAVY & modules)}"
+    assert seconds < IMPORT_BUDGET_S, f"{script} --help spent {seconds:.2f}s importing"
+
+
+def test_cached_slate_skips_fetch_and_progress_bar() -> None:
+    proc = subprocess.run([sys.executable, "-c", CACHED_RUN], cwd=SRC, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    assert proc.stdout.strip() == ""
+
+
+def _slate_tree(root: Path) -> Path:
+    """A copy of src/ next to a one-date data/schedule.duckdb and a linear calibration."""
+    import duckdb
+    shutil.copytree(SRC, root / "src", ignore=shutil.ignore_patterns("helper", "__pycache__", "*.duckdb", "*.db"))
+    (root / "data").mkdir()
+    (root / "models").mkdir()
+    (root / "models" / "calibration.json").write_text('{"slope": 1.0, "intercept": 0.0}')
+    con = duckdb.connect(str(root / "data" / "schedule.duckdb"))
+    con.execute("CREATE TABLE schedule (game_id BIGINT, official_date VARCHAR, away_pid BIGINT, home_pid BIGINT, "
+                "away_lineup VARCHAR, home_lineup VARCHAR)")
+    con.executemany("INSERT INTO schedule VALUES (?, '2025-07-10', ?, ?, ?, ?)", [
+        (g, 10 + g, 50 + g, ",".join(map(str, range(100 + 10 * g, 109 + 10 * g))),
+         ",".join(map(str, range(300 + 10 * g, 309 + 10 * g)))) for g in range(15)])
+    con.close()
+    return root / "src"
+
+
+def test_cached_rerun_within_budget(tmp_path: Path) -> None:
+    src = _slate_tree(tmp_path)
+    argv = [sys.executable, "today_proj.py", "--date", "2025-07-10", "--sims", "200"]
+    first = subprocess.run(argv, cwd=src, capture_output=True, text=True)
+    assert first.returncode == 0, first.stderr[-2000:]
+    assert "Recomputed 30/30" in first.stdout
+
+    t0 = time.perf_counter()
+    rerun = subprocess.run(argv, cwd=src, capture_output=True, text=True)
+    seconds = time.perf_counter() - t0
+    assert rerun.returncode == 0, rerun.stderr[-2000:]
+    assert "Recomputed 0/30" in rerun.stdout
+    assert seconds < CACHED_BUDGET_S, f"cached today_proj.py rerun took {seconds:.2f}s"
+
+    modules, _, proc = _importtime(*argv[1:], cwd=src)
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    assert not {"statsapi", "tqdm"} & modules